@@ -0,0 +1,236 @@
+# API authentication: claims-based JWTs (no query per request) and DB tokens
+# behind a process-local LRU plus the shared cache (see TOKEN_AUTH_CACHE)
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import User
+from .roles import ROLE_PROFILE_ACCESSORS
+from .tokens import token_state
+
+DEFAULTS = {
+    "CACHE_ALIAS": "default",
+    "LOCAL_MAX_ENTRIES": 10000,
+    "LOCAL_TTL": 10,
+    "SHARED_TTL": 60,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "TOKEN_AUTH_CACHE", {}).get(name, DEFAULTS[name])
+
+
+class LRUCache:
+    # Bounded, thread-safe LRU with per-entry expiry
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CacheStats:
+    # Per-process lookup counters
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.local_hits = self.shared_hits = self.misses = 0
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            hits = self.local_hits + self.shared_hits
+            return {
+                "lookups": lookups,
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "local_entries": len(local_cache),
+            }
+
+
+local_cache = LRUCache(get_setting("LOCAL_MAX_ENTRIES"))
+stats = CacheStats()
+
+
+def cache_key(key):
+    # Raw tokens never become cache keys
+    return "auth:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def shared_cache():
+    return caches[get_setting("CACHE_ALIAS")]
+
+
+def invalidate_token(key):
+    cache_id = cache_key(key)
+    local_cache.delete(cache_id)
+    shared_cache().delete(cache_id)
+
+
+def invalidate_user_tokens(user):
+    # Drop cached lookups for the user's token(s) so the next request re-reads
+    # the user; takes a User or a user id
+    for key in Token.objects.filter(user=user).values_list("key", flat=True):
+        invalidate_token(key)
+
+
+# Fields a cache entry or token claim rebuilds request.user from (never the password hash)
+IDENTITY_FIELDS = ("id", "username", "role", "is_active")
+
+
+# What a cache entry holds for a token's user: identity fields and profile ids
+def identity(user):
+    data = {name: getattr(user, name) for name in IDENTITY_FIELDS}
+    for accessor in ROLE_PROFILE_ACCESSORS.values():
+        profile = getattr(User, accessor).related.get_cached_value(user, None)
+        data[f"{accessor}_id"] = profile.pk if profile is not None else None
+    return data
+
+
+# A User built from known field values without a query; other fields load on
+# first access, and the profile relations hold id-only profiles (or None)
+def build_user(fields, profile_ids):
+    from profiles.models import OwnerProfile, SitterProfile
+
+    db = router.db_for_read(User)
+    user = _from_db(User, db, fields)
+    for descriptor, model, accessor in (
+        (User.owner_profile, OwnerProfile, "owner_profile"),
+        (User.sitter_profile, SitterProfile, "sitter_profile"),
+    ):
+        profile_id = profile_ids.get(f"{accessor}_id")
+        profile = None
+        if profile_id is not None:
+            profile = _from_db(model, db, {"id": model._meta.pk.to_python(profile_id), "user_id": user.pk})
+            model.user.field.set_cached_value(profile, user)
+        descriptor.related.set_cached_value(user, profile)
+    return user
+
+
+# TokenAuthentication ("Authorization: Token <key>") serving repeat lookups from the
+# local LRU or shared cache. Logout and user/profile changes invalidate entries
+# (accounts/signals.py); other workers' LRU entries age out after LOCAL_TTL
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache_id = cache_key(key)
+
+        cached = local_cache.get(cache_id)
+        if cached is not None:
+            stats.record("local_hits")
+            return self.credentials_from(key, cached)
+
+        cached = shared_cache().get(cache_id)
+        if cached is not None:
+            stats.record("shared_hits")
+        else:
+            stats.record("misses")
+            # Raises AuthenticationFailed for unknown tokens and inactive users; never cached
+            user, _ = self.load_credentials(key)
+            cached = identity(user)
+            shared_cache().set(cache_id, cached, get_setting("SHARED_TTL"))
+
+        local_cache.set(cache_id, cached, get_setting("LOCAL_TTL"))
+        return self.credentials_from(key, cached)
+
+    def load_credentials(self, key):
+        # TokenAuthentication's lookup, with the role profiles joined in
+        model = self.get_model()
+        joins = ["user"] + [f"user__{accessor}" for accessor in ROLE_PROFILE_ACCESSORS.values()]
+        try:
+            token = model.objects.select_related(*joins).get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        return (token.user, token)
+
+    def credentials_from(self, key, cached):
+        fields = {name: cached[name] for name in IDENTITY_FIELDS if name in cached}
+        user = build_user(fields, cached)
+        token = self.get_model()(key=key)
+        token.user = user
+        return user, token
+
+
+# A User built from a validated token's claims without a query. is_active is not
+# a claim and stays deferred, so saves must pass update_fields
+def user_from_claims(token):
+    fields = {name: token[name] for name in ("username", "role") if name in token}
+    fields["id"] = User._meta.pk.to_python(token[jwt_settings.USER_ID_CLAIM])
+    return build_user(fields, token)
+
+
+def _from_db(model, db, data):
+    # Model.from_db wants values in concrete field order; the rest stay deferred
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in data]
+    return model.from_db(db, names, [data[name] for name in names])
+
+
+# JWTAuthentication that trusts the role/profile claims instead of loading the
+# user, and rejects revoked tokens
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        revoked, token.claims_stale = token_state(token)
+        if revoked:
+            raise InvalidToken("Token has been revoked.")
+        return token
+
+    def get_user(self, validated_token):
+        # Tokens minted without our claims, or issued before the user's
+        # profiles/account last changed, fall back to a database lookup
+        if "role" not in validated_token or getattr(validated_token, "claims_stale", False):
+            return super().get_user(validated_token)
+        return user_from_claims(validated_token)
@@ -0,0 +1,54 @@
+# Password hashers whose cost comes from settings.PASSWORD_HASHING; hashes from
+# another algorithm or cost are upgraded on the user's next login
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+DEFAULTS = {
+    # scrypt uses about 128 * n * r * p bytes, 16 MiB per hash here. maxmem
+    # caps it (OpenSSL's own 32 MiB default only fits n <= 2**14 at r=8) and
+    # has to cover the largest parameters still found in stored hashes
+    "SCRYPT": {"work_factor": 2**14, "block_size": 8, "parallelism": 1, "maxmem": 256 * 1024 * 1024},
+    # memory_cost is in KiB
+    "ARGON2": {"time_cost": 2, "memory_cost": 65536, "parallelism": 1},
+}
+
+
+def get_cost(algorithm, name):
+    costs = getattr(settings, "PASSWORD_HASHING", {}).get(algorithm, {})
+    return costs.get(name, DEFAULTS[algorithm][name])
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    # Stored hashes keep the "scrypt" prefix, so this replaces Django's scrypt hasher
+
+    @property
+    def work_factor(self):
+        return get_cost("SCRYPT", "work_factor")
+
+    @property
+    def block_size(self):
+        return get_cost("SCRYPT", "block_size")
+
+    @property
+    def parallelism(self):
+        return get_cost("SCRYPT", "parallelism")
+
+    @property
+    def maxmem(self):
+        return get_cost("SCRYPT", "maxmem")
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    # Needs the argon2-cffi package (pip install "django[argon2]")
+
+    @property
+    def time_cost(self):
+        return get_cost("ARGON2", "time_cost")
+
+    @property
+    def memory_cost(self):
+        return get_cost("ARGON2", "memory_cost")
+
+    @property
+    def parallelism(self):
+        return get_cost("ARGON2", "parallelism")
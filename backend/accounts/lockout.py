@@ -0,0 +1,86 @@
+# Lockout after repeated failed logins for one username from one client IP
+# (LOGIN_LOCKOUT); locked attempts get 429 before any password hashing
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    "CACHE_ALIAS": "default",
+    "MAX_FAILURES": 5,
+    "WINDOW_SECONDS": 60 * 15,
+    "LOCKOUT_SECONDS": 60 * 15,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "LOGIN_LOCKOUT", {}).get(name, DEFAULTS[name])
+
+
+def lockout_cache():
+    return caches[get_setting("CACHE_ALIAS")]
+
+
+def client_ident(request):
+    # Client IP, honouring REST_FRAMEWORK["NUM_PROXIES"] like the throttles do
+    return BaseThrottle().get_ident(request)
+
+
+def _digest(username, request):
+    # Usernames are case-insensitive here, so "Alice" and "alice " share one count
+    username = str(username or "").strip().lower()
+    return hashlib.sha256(f"{username}\0{client_ident(request)}".encode()).hexdigest()
+
+
+def _failures_key(username, request):
+    return f"login:failures:{_digest(username, request)}"
+
+
+def _locked_key(username, request):
+    return f"login:locked:{_digest(username, request)}"
+
+
+def locked_for(username, request):
+    # Seconds until this client can try the username again, or 0 if not locked
+    until = lockout_cache().get(_locked_key(username, request))
+    if until is None:
+        return 0
+    return max(until - time.time(), 0)
+
+
+def check_lockout(username, request):
+    # Raise Throttled (429 + Retry-After) if this client is locked out of the username
+    wait = locked_for(username, request)
+    if wait:
+        raise Throttled(wait=math.ceil(wait), detail="Too many failed login attempts. Try again later.")
+
+
+def register_failure(username, request):
+    # Count a failed login; the one reaching MAX_FAILURES locks the username
+    # for this client. Returns True if it is now locked
+    cache = lockout_cache()
+    key = _failures_key(username, request)
+    # add() then incr() so the first failure creates the counter without a race;
+    # the window runs from that first failure
+    cache.add(key, 0, get_setting("WINDOW_SECONDS"))
+    try:
+        failures = cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.add(key, 1, get_setting("WINDOW_SECONDS"))
+        failures = 1
+
+    if failures < get_setting("MAX_FAILURES"):
+        return False
+    lockout = get_setting("LOCKOUT_SECONDS")
+    cache.set(_locked_key(username, request), time.time() + lockout, lockout)
+    cache.delete(key)
+    return True
+
+
+def clear_failures(username, request):
+    lockout_cache().delete(_failures_key(username, request))
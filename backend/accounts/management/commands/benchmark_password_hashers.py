@@ -0,0 +1,74 @@
+# accounts/management/commands/benchmark_password_hashers.py
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+# safe_summary() fields that are per-hash data rather than cost parameters
+NON_COST_FIELDS = {"algorithm", "salt", "hash"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures password verification cost for each configured hasher "
+        "(PASSWORD_HASHERS): milliseconds per check and logins/sec on one core. "
+        "Use it to tune PASSWORD_HASHING for the production hardware."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Verifications timed per hasher (default 20)'
+        )
+        parser.add_argument(
+            '--hasher',
+            action='append',
+            dest='algorithms',
+            help='Only benchmark this algorithm (e.g. scrypt, argon2, pbkdf2_sha256); repeatable'
+        )
+        parser.add_argument(
+            '--password',
+            default='correct horse battery staple',
+            help='Password to hash and verify'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        hashers = get_hashers()
+        preferred = hashers[0].algorithm
+        if options['algorithms']:
+            unknown = set(options['algorithms']) - {hasher.algorithm for hasher in hashers}
+            if unknown:
+                raise CommandError(f"Not in PASSWORD_HASHERS: {', '.join(sorted(unknown))}")
+            hashers = [hasher for hasher in hashers if hasher.algorithm in options['algorithms']]
+
+        # One process, one thread: the figures are per core
+        self.stdout.write(f'Timing {iterations} verification(s) per hasher on one core...')
+        for hasher in hashers:
+            label = hasher.algorithm + (' (preferred)' if hasher.algorithm == preferred else '')
+            try:
+                encoded = hasher.encode(options['password'], hasher.salt())
+            except ValueError as exc:
+                # e.g. argon2-cffi not installed
+                self.stdout.write(self.style.WARNING(f'{label}: skipped ({exc})'))
+                continue
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                hasher.verify(options['password'], encoded)
+            elapsed = (time.perf_counter() - start) / iterations
+
+            costs = ', '.join(
+                f'{name}={value}'
+                for name, value in hasher.safe_summary(encoded).items()
+                if name not in NON_COST_FIELDS
+            )
+            self.stdout.write(
+                f'{label}: {elapsed * 1000:.1f} ms/login, '
+                f'{1 / elapsed:.1f} logins/sec/core [{costs}]'
+            )
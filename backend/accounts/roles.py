@@ -0,0 +1,37 @@
+from .models import User
+
+# Reverse one-to-one accessor on User holding each role's profile
+ROLE_PROFILE_ACCESSORS = {
+    "OWNER": "owner_profile",
+    "SITTER": "sitter_profile",
+}
+
+
+# The requester's OwnerProfile or SitterProfile (by user.role), or None; resolved
+# once per request. With role given, users of any other role get None
+def role_profile(request, role=None):
+    cache = request.__dict__
+    if "_role_profile" not in cache:
+        cache["_role_profile"] = _load_role_profile(request.user)
+    if role is not None and getattr(request.user, "role", None) != role:
+        return None
+    return cache["_role_profile"]
+
+
+def _load_role_profile(user):
+    if not getattr(user, "is_authenticated", False):
+        return None
+    accessor = ROLE_PROFILE_ACCESSORS.get(user.role)
+    if accessor is None:
+        return None
+
+    related = getattr(User, accessor).related
+    if related.is_cached(user):
+        return related.get_cached_value(user)
+
+    model = related.related_model
+    profile = model.objects.filter(user_id=user.pk).first()
+    related.set_cached_value(user, profile)
+    if profile is not None:
+        model.user.field.set_cached_value(profile, user)
+    return profile
@@ -1,5 +1,11 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .lockout import check_lockout, clear_failures, register_failure
+from .tokens import add_role_claims, is_revoked, revoke_token, set_role_claims
 from .models import User
 from profiles.models import OwnerProfile, SitterProfile
 
@@ -61,7 +67,9 @@ class ChangePasswordSerializer(serializers.Serializer):
     def save(self):
         user = self.context['request'].user
         user.set_password(self.validated_data['new_password'])
-        user.save()
+        # request.user may be built from token claims with other fields
+        # deferred or assumed; write the password only
+        user.save(update_fields=['password'])
         return user
 
 class ResetPasswordByEmailSerializer(serializers.Serializer):
@@ -77,4 +85,54 @@ class ResetPasswordByEmailSerializer(serializers.Serializer):
             User.objects.get(email=value)
         except User.DoesNotExist:
             raise serializers.ValidationError("No user found with this email address")
-        return value
\ No newline at end of file
+        return value
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    # /api/token/ pairs carry the same role/profile claims as login_view's
+    @classmethod
+    def get_token(cls, user):
+        return add_role_claims(super().get_token(user), user)
+
+    # Same per-username, per-client lockout as login_view
+    def validate(self, attrs):
+        username = attrs.get(self.username_field)
+        request = self.context['request']
+        check_lockout(username, request)
+        try:
+            data = super().validate(attrs)
+        except AuthenticationFailed:
+            register_failure(username, request)
+            raise
+        clear_failures(username, request)
+        return data
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    # Each refresh token can be used once: it is revoked as the new pair is issued.
+    # The new pair's role/profile claims are re-read from the user, so a
+    # profile created or deleted mid-session shows up at the next refresh.
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise InvalidToken("Token has been revoked.")
+        # Claim the old token first, so a replayed or concurrent refresh gets nothing
+        if jwt_settings.ROTATE_REFRESH_TOKENS and not revoke_token(refresh):
+            raise InvalidToken("Token has been revoked.")
+
+        user = User.objects.filter(
+            **{jwt_settings.USER_ID_FIELD: refresh.get(jwt_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        set_role_claims(refresh, user)
+
+        # TokenRefreshSerializer.validate, minus its own user lookup
+        data = {"access": str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+        return data
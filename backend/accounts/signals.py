@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from profiles.models import OwnerProfile, SitterProfile
+from .authentication import invalidate_user_tokens
+from .models import User
+from .tokens import mark_claims_changed
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop cached token lookups whenever the user row changes, and send older
+    JWT access tokens to the database, so a deactivation or role change takes
+    effect on the next request.
+    """
+    invalidate_user_tokens(instance)
+    mark_claims_changed(instance.pk)
+
+
+@receiver(post_save, sender=OwnerProfile)
+@receiver(post_save, sender=SitterProfile)
+def invalidate_cached_profile_ids(sender, instance, created, **kwargs):
+    """
+    Cached lookups and JWT claims carry the user's profile ids; a new
+    profile replaces them.
+    """
+    if created:
+        invalidate_user_tokens(instance.user_id)
+        mark_claims_changed(instance.user_id)
+
+
+@receiver(post_delete, sender=OwnerProfile)
+@receiver(post_delete, sender=SitterProfile)
+def invalidate_deleted_profile_ids(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.user_id)
+    mark_claims_changed(instance.user_id)
@@ -1,3 +1,420 @@
-from django.test import TestCase
+import re
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import (
+    CachedTokenAuthentication,
+    ClaimsJWTAuthentication,
+    LRUCache,
+    cache_key,
+    local_cache,
+    stats,
+)
+from accounts.models import User
+from accounts.roles import role_profile
+from core.throttling import get_store
+from profiles.models import OwnerProfile, Pet, SitterProfile
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication and its invalidation"""
+
+    def setUp(self):
+        local_cache.clear()
+        cache.clear()
+        stats.reset()
+        self.user = User.objects.create_user(
+            username='cacheduser', email='cached@example.com', password='testpass123', role='OWNER'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def auth_queries(self, url='/api/accounts/logout/'):
+        # Queries touching the token table during one authenticated request
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        return [q['sql'] for q in ctx.captured_queries if 'authtoken_token' in q['sql']]
+
+    def test_repeat_requests_skip_the_token_query(self):
+        """Test that only the first request looks the token up in the database"""
+        self.assertEqual(len(self.auth_queries()), 1)
+        self.assertEqual(self.auth_queries(), [])
+
+        local_cache.clear()
+        self.assertEqual(self.auth_queries(), [])
+        snapshot = stats.snapshot()
+        self.assertEqual(
+            (snapshot['misses'], snapshot['local_hits'], snapshot['shared_hits']), (1, 1, 1)
+        )
+        self.assertEqual(snapshot['hit_rate'], 0.6667)
+
+    def test_logout_revokes_token_immediately(self):
+        """Test that a logged-out token is rejected even though it was cached"""
+        self.auth_queries()
+        response = self.client.post('/api/accounts/logout/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+        response = self.client.post('/api/accounts/logout/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates_cached_user(self):
+        """Test that changing the password drops the cached lookup"""
+        self.auth_queries()
+        response = self.client.post('/api/accounts/change-password/', {
+            'current_password': 'testpass123', 'new_password': 'N3w-secure-pass!'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.auth_queries()), 1)
+
+    def test_password_reset_invalidates_cached_user(self):
+        """Test that resetting the password by email drops the cached lookup"""
+        self.auth_queries()
+        response = APIClient().post('/api/accounts/reset-password/', {
+            'email': 'cached@example.com', 'new_password': 'N3w-secure-pass!'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.auth_queries()), 1)
+
+    def test_cached_user_is_not_shared_between_requests(self):
+        """Test that each request gets its own user instance, built without a query"""
+        auth = CachedTokenAuthentication()
+        first, _ = auth.authenticate_credentials(self.token.key)
+        first.role = 'SITTER'
+        with CaptureQueriesContext(connection) as ctx:
+            second, token = auth.authenticate_credentials(self.token.key)
+            self.assertEqual(str(second), 'cacheduser (OWNER)')
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(second.role, 'OWNER')
+        self.assertIs(token.user, second)
+
+    def test_cache_holds_identity_only(self):
+        """Test that cache entries carry ids, username, role and active flag but no password hash"""
+        self.auth_queries()
+        entry = cache.get(cache_key(self.token.key))
+        self.assertEqual(entry, {
+            'id': self.user.id, 'username': 'cacheduser', 'role': 'OWNER', 'is_active': True,
+            'owner_profile_id': None, 'sitter_profile_id': None,
+        })
+
+    def test_user_and_profile_changes_invalidate_cache(self):
+        """Test that deactivation, role changes and new profiles take effect immediately"""
+        self.auth_queries()
+        profile = OwnerProfile.objects.create(user=self.user, name='Cached Owner')
+        user, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual(user.owner_profile.pk, profile.pk)
+
+        self.user.role = 'SITTER'
+        self.user.save()
+        user, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual(user.role, 'SITTER')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/accounts/logout/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stats_endpoint_is_admin_only(self):
+        """Test that hit rates are exposed to admins only"""
+        response = self.client.get('/api/accounts/token-cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        admin = User.objects.create_superuser(username='admin', email='a@example.com', password='adminpass123')
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        response = client.get('/api/accounts/token-cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('hit_rate', response.data)
+
+    def test_lru_evicts_least_recently_used(self):
+        """Test that the local cache stays bounded"""
+        lru = LRUCache(2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+        lru.set('d', 4, 0)
+        self.assertIsNone(lru.get('d'))
+
+
+class JWTAuthenticationTests(TestCase):
+    """Test claims-based JWT authentication, refresh rotation and revocation"""
+
+    def setUp(self):
+        cache.clear()
+        get_store().reset()
+        self.user = User.objects.create_user(
+            username='jwtowner', email='jwt@example.com', password='testpass123', role='OWNER'
+        )
+        self.owner_profile = OwnerProfile.objects.create(user=self.user, name='JWT Owner')
+        self.client = APIClient()
+        response = self.client.post('/api/accounts/login/', {'username': 'jwtowner', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.access = response.data['access']
+        self.refresh = response.data['refresh']
+
+    def bearer(self, access=None):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access or self.access}')
+        return client
+
+    def test_login_token_carries_role_claims(self):
+        """Test that access tokens carry the user id, role and profile ids"""
+        token = AccessToken(self.access)
+        self.assertEqual(token['user_id'], str(self.user.id))
+        self.assertEqual(token['role'], 'OWNER')
+        self.assertEqual(token['owner_profile_id'], self.owner_profile.id)
+        self.assertIsNone(token['sitter_profile_id'])
+
+    def test_authentication_needs_no_queries(self):
+        """Test that a bearer token authenticates without touching the database"""
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        with CaptureQueriesContext(connection) as ctx:
+            user, _ = ClaimsJWTAuthentication().authenticate(request)
+            self.assertEqual(user, self.user)
+            self.assertEqual(user.role, 'OWNER')
+            self.assertEqual(str(user), 'jwtowner (OWNER)')
+            self.assertEqual(user.owner_profile.pk, self.owner_profile.pk)
+            self.assertFalse(hasattr(user, 'sitter_profile'))
+        self.assertEqual(len(ctx.captured_queries), 0)
+        # Fields outside the claims still load on demand
+        self.assertEqual(user.email, 'jwt@example.com')
+
+    def test_bearer_token_works_api_wide(self):
+        """Test that views accept the bearer token and see the right profile"""
+        response = self.bearer().get('/api/reviews/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_refresh_rotates_and_old_refresh_is_single_use(self):
+        """Test that a refresh returns a new pair and the used refresh token stops working"""
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['refresh'], self.refresh)
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'OWNER')
+
+        replay = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(replay.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        again = self.client.post('/api/accounts/refresh/', {'refresh': response.data['refresh']})
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+
+    def test_logout_revokes_access_and_refresh(self):
+        """Test that logout revokes the presented access token and the refresh token"""
+        client = self.bearer()
+        response = client.post('/api/accounts/logout/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(client.get('/api/reviews/').status_code, status.HTTP_401_UNAUTHORIZED)
+        refresh = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(refresh.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_ends_other_sessions(self):
+        """Test that a password change revokes earlier tokens and issues a fresh pair"""
+        other = self.client.post('/api/accounts/login/', {'username': 'jwtowner', 'password': 'testpass123'}).data
+        response = self.bearer().post('/api/accounts/change-password/', {
+            'current_password': 'testpass123', 'new_password': 'N3w-secure-pass!'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.bearer(other['access']).get('/api/reviews/').status_code, status.HTTP_401_UNAUTHORIZED)
+        refresh = self.client.post('/api/token/refresh/', {'refresh': other['refresh']})
+        self.assertEqual(refresh.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.bearer(response.data['access']).get('/api/reviews/').status_code, status.HTTP_200_OK)
+
+    def test_refresh_rereads_role_claims(self):
+        """Test that a refreshed pair carries a profile created after login"""
+        sitter_profile = SitterProfile.objects.create(user=self.user, display_name='JWT Sitter')
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data['access'])['sitter_profile_id'], sitter_profile.id)
+
+    def test_profile_change_sends_older_tokens_to_database(self):
+        """Test that access tokens issued before a profile change authenticate from the database"""
+        sitter_profile = SitterProfile.objects.create(user=self.user, display_name='JWT Sitter')
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        with CaptureQueriesContext(connection) as ctx:
+            user, _ = ClaimsJWTAuthentication().authenticate(request)
+            self.assertEqual(user.sitter_profile.pk, sitter_profile.pk)
+        self.assertGreater(len(ctx.captured_queries), 0)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.bearer().get('/api/reviews/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_writes_only_the_password(self):
+        """Test that a password change from a claims-built user leaves other fields alone"""
+        # Bypass signals, so the token still authenticates from its claims
+        User.objects.filter(pk=self.user.pk).update(is_active=False, role='SITTER')
+        response = self.bearer().post('/api/accounts/change-password/', {
+            'current_password': 'testpass123', 'new_password': 'N3w-secure-pass!'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.role, 'SITTER')
+        self.assertTrue(self.user.check_password('N3w-secure-pass!'))
+
+
+class RoleProfileTests(TestCase):
+    """Test the request-scoped owner/sitter profile resolver"""
+
+    def setUp(self):
+        local_cache.clear()
+        cache.clear()
+        self.owner_user = User.objects.create_user(username='roleowner', password='testpass123', role='OWNER')
+        self.owner_profile = OwnerProfile.objects.create(user=self.owner_user, name='Role Owner')
+        self.sitter_user = User.objects.create_user(username='rolesitter', password='testpass123', role='SITTER')
+        self.sitter_profile = SitterProfile.objects.create(user=self.sitter_user, display_name='Role Sitter')
+        self.pet = Pet.objects.create(owner=self.owner_profile, name='Rex', species='dog', age=3)
+
+    def profile_queries(self, ctx):
+        return [
+            q['sql'] for q in ctx.captured_queries
+            if re.search(r'FROM "profiles_(owner|sitter)profile"', q['sql'])
+        ]
+
+    def test_token_lookup_joins_the_profile(self):
+        """Test that token authentication brings the profile along, so views never load it"""
+        token = Token.objects.create(user=self.owner_user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/bookings/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.profile_queries(ctx), [])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f'/api/profiles/owners/{self.owner_profile.pk}/pets/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([pet['name'] for pet in response.data], ['Rex'])
+        self.assertEqual(self.profile_queries(ctx), [])
+
+    def test_resolved_once_per_request(self):
+        """Test that the profile is loaded at most once and filtered by role"""
+        request = APIRequestFactory().get('/')
+        request.user = User.objects.get(pk=self.sitter_user.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(role_profile(request), self.sitter_profile)
+            self.assertEqual(role_profile(request, 'SITTER'), self.sitter_profile)
+            self.assertIsNone(role_profile(request, 'OWNER'))
+            self.assertEqual(request.user.sitter_profile, self.sitter_profile)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_other_owners_pets_are_forbidden(self):
+        """Test that the nested pet routes only serve the requester's own profile"""
+        other_user = User.objects.create_user(username='otherowner', password='testpass123', role='OWNER')
+        OwnerProfile.objects.create(user=other_user, name='Other Owner')
+        client = APIClient()
+        client.force_authenticate(user=other_user)
+        url = f'/api/profiles/owners/{self.owner_profile.pk}/pets/'
+        self.assertEqual(client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        response = client.post(url, {'name': 'Max', 'species': 'cat', 'age': 2})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        client.force_authenticate(user=self.sitter_user)
+        self.assertEqual(client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PasswordHashingTests(TestCase):
+    """Test the tuned hasher policy and upgrade-on-login rehashing"""
+
+    def setUp(self):
+        cache.clear()
+        get_store().reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='hashed', email='h@example.com', password='testpass123')
+
+    def login(self, password='testpass123'):
+        return self.client.post('/api/accounts/login/', {'username': 'hashed', 'password': password})
+
+    def test_new_passwords_use_tuned_scrypt(self):
+        """Test that new passwords are hashed with scrypt at the configured cost"""
+        decoded = identify_hasher(self.user.password).decode(self.user.password)
+        self.assertEqual(decoded['algorithm'], 'scrypt')
+        self.assertEqual((decoded['work_factor'], decoded['block_size'], decoded['parallelism']), (16384, 8, 1))
+
+    def test_login_upgrades_legacy_pbkdf2_hash(self):
+        """Test that logging in rehashes a PBKDF2 password with the preferred hasher"""
+        User.objects.filter(pk=self.user.pk).update(password=make_password('testpass123', hasher='pbkdf2_sha256'))
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    def test_cost_change_rehashes_on_login(self):
+        """Test that raising the scrypt work factor upgrades stored hashes on the next login"""
+        stronger = {'SCRYPT': {'work_factor': 2**15}}
+        with override_settings(PASSWORD_HASHING=stronger):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+            self.user.refresh_from_db()
+            self.assertEqual(identify_hasher(self.user.password).decode(self.user.password)['work_factor'], 32768)
+        # Hashes made at a higher cost still verify after lowering it again
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    def test_benchmark_command_reports_each_hasher(self):
+        """Test that the benchmark prints per-core login rates for the configured hashers"""
+        out = StringIO()
+        call_command('benchmark_password_hashers', iterations=1, algorithms=['scrypt', 'pbkdf2_sha256'], stdout=out)
+        output = out.getvalue()
+        self.assertIn('scrypt (preferred):', output)
+        self.assertIn('work factor=16384', output)
+        self.assertIn('pbkdf2_sha256:', output)
+        self.assertIn('logins/sec/core', output)
+
+
+@override_settings(LOGIN_LOCKOUT={'MAX_FAILURES': 3, 'WINDOW_SECONDS': 60, 'LOCKOUT_SECONDS': 120})
+class LoginLockoutTests(TestCase):
+    """Test the per-username, per-client lockout after repeated failed logins"""
+
+    def setUp(self):
+        cache.clear()
+        get_store().reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='locked', email='l@example.com', password='testpass123')
+
+    def login(self, password, username='locked', ip='127.0.0.1'):
+        return self.client.post(
+            '/api/accounts/login/', {'username': username, 'password': password}, REMOTE_ADDR=ip
+        )
+
+    def test_lockout_after_repeated_failures(self):
+        """Test that the account locks after MAX_FAILURES, even for the right password"""
+        codes = [self.login('wrong').status_code for _ in range(3)]
+        self.assertEqual(codes, [400, 400, 400])
+        response = self.login('testpass123')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(119 <= int(response['Retry-After']) <= 120)
+        # Usernames are matched case-insensitively
+        self.assertEqual(self.login('testpass123', username='LOCKED').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_successful_login_clears_failures(self):
+        """Test that a successful login resets the failure count"""
+        self.login('wrong')
+        self.login('wrong')
+        self.assertEqual(self.login('testpass123').status_code, status.HTTP_200_OK)
+        self.login('wrong')
+        self.login('wrong')
+        self.assertEqual(self.login('testpass123').status_code, status.HTTP_200_OK)
+
+    def test_token_endpoint_shares_the_lockout(self):
+        """Test that /api/token/ counts failures and honours the lock"""
+        for _ in range(3):
+            response = self.client.post('/api/token/', {'username': 'locked', 'password': 'wrong'})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login('testpass123').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.client.post('/api/token/', {'username': 'locked', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_lockout_only_blocks_the_failing_client(self):
+        """Test that failures from one IP do not lock the account for other clients"""
+        for _ in range(3):
+            self.login('wrong', ip='10.0.0.66')
+        self.assertEqual(self.login('testpass123', ip='10.0.0.66').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login('testpass123', ip='10.0.0.2').status_code, status.HTTP_200_OK)
@@ -0,0 +1,10 @@
+from core.throttling import TokenBucketThrottle
+
+
+# Function-based views can't carry a throttle_scope, so each gets its own class
+class LoginThrottle(TokenBucketThrottle):
+    scope = "login"
+
+
+class PasswordResetThrottle(TokenBucketThrottle):
+    scope = "password_reset"
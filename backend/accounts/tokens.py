@@ -0,0 +1,109 @@
+# JWT issuing and revocation. Tokens carry the user's id, username, role and
+# profile ids, so requests authenticate without a query; revocations live in
+# the shared cache (use a shared backend with several workers)
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+ROLE_CLAIMS = ("username", "role", "owner_profile_id", "sitter_profile_id")
+# When the login that started this chain of refreshes happened (epoch seconds,
+# millisecond precision); copied into every access/rotated refresh token
+SESSION_CLAIM = "auth_time"
+# When the role/profile claims were read from the database (same precision)
+CLAIMS_CLAIM = "claims_time"
+
+
+def _now():
+    # Truncated to whole milliseconds, so a session started right after a
+    # revocation never compares as earlier than it
+    return int(time.time() * 1000) / 1000
+
+
+def revocation_cache():
+    # Same shared cache the token authentication cache uses
+    return caches[getattr(settings, "TOKEN_AUTH_CACHE", {}).get("CACHE_ALIAS", "default")]
+
+
+def _jti_key(jti):
+    return f"jwt:revoked:{jti}"
+
+
+def _user_key(user_id):
+    return f"jwt:revoked-before:{user_id}"
+
+
+def _claims_key(user_id):
+    return f"jwt:claims-changed:{user_id}"
+
+
+def add_role_claims(token, user):
+    # Claims for a new session; refreshes only re-read the role claims
+    token[SESSION_CLAIM] = _now()
+    return set_role_claims(token, user)
+
+
+def set_role_claims(token, user):
+    # Profile ids are looked up here, at issue/refresh time, instead of on every request
+    from profiles.models import OwnerProfile, SitterProfile
+
+    # Stamped before reading, so a change racing the reads still marks it stale
+    token[CLAIMS_CLAIM] = _now()
+    token["username"] = user.username
+    token["role"] = user.role
+    token["owner_profile_id"] = OwnerProfile.objects.filter(user_id=user.pk).values_list("pk", flat=True).first()
+    token["sitter_profile_id"] = SitterProfile.objects.filter(user_id=user.pk).values_list("pk", flat=True).first()
+    return token
+
+
+def issue_tokens(user):
+    # New refresh/access pair for a user who just authenticated
+    refresh = add_role_claims(RefreshToken.for_user(user), user)
+    return {"access": str(refresh.access_token), "refresh": str(refresh)}
+
+
+def _remaining_lifetime(token):
+    return max(int(token["exp"] - time.time()), 1)
+
+
+def revoke_token(token):
+    # Deny-list a validated token until it expires; False if it already was.
+    # cache.add is atomic, so two concurrent refreshes can't both claim one token
+    return revocation_cache().add(_jti_key(token[jwt_settings.JTI_CLAIM]), 1, _remaining_lifetime(token))
+
+
+def revoke_user_tokens(user_id):
+    # Invalidate every session the user started up to now; kept as long as a refresh token lives
+    lifetime = int(jwt_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    revocation_cache().set(_user_key(user_id), _now(), lifetime)
+
+
+def mark_claims_changed(user_id):
+    # Access tokens issued before now authenticate from the database until they
+    # expire; sessions stay signed in and the next refresh gets current claims
+    lifetime = int(jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 1
+    revocation_cache().set(_claims_key(user_id), _now(), lifetime)
+
+
+def token_state(token):
+    # (revoked, claims_stale) for a validated token, in one cache round trip
+    user_id = token.get(jwt_settings.USER_ID_CLAIM)
+    jti_key = _jti_key(token[jwt_settings.JTI_CLAIM])
+    user_key = _user_key(user_id)
+    claims_key = _claims_key(user_id)
+    found = revocation_cache().get_many([jti_key, user_key, claims_key])
+    if jti_key in found:
+        return True, False
+    revoked_before = found.get(user_key)
+    started = token.get(SESSION_CLAIM, token.get("iat", 0))
+    if revoked_before is not None and started < revoked_before:
+        return True, False
+    changed_at = found.get(claims_key)
+    read_at = token.get(CLAIMS_CLAIM, token.get("iat", 0))
+    return False, changed_at is not None and read_at < changed_at
+
+
+def is_revoked(token):
+    return token_state(token)[0]
@@ -1,5 +1,8 @@
 from django.urls import path
-from .views import RegisterView, login_view, change_password_view, reset_password_by_email_view 
+from .views import (
+    RegisterView, login_view, logout_view, change_password_view, reset_password_by_email_view,
+    token_cache_stats_view,
+)
 from rest_framework_simplejwt.views import TokenRefreshView
 
 
@@ -9,11 +12,17 @@ urlpatterns = [
     
     # User login endpoint - returns auth token
     path("login/", login_view, name="login"),
+
+    # Logout endpoint - revokes the auth token
+    path("logout/", logout_view, name="logout"),
     
     # Change password endpoint - requires authentication
     path("change-password/", change_password_view, name="change-password"),
     path("reset-password/", reset_password_by_email_view, name="reset-password"),
 
+    # Token authentication cache hit rates (admin only)
+    path("token-cache-stats/", token_cache_stats_view, name="token-cache-stats"),
+
     # JWT token refresh endpoint
     path("refresh/", TokenRefreshView.as_view(), name="refresh"),
 ]
\ No newline at end of file
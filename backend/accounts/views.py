@@ -1,10 +1,19 @@
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework import generics
 from rest_framework.authtoken.models import Token
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from django.contrib.auth import authenticate
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
+from .authentication import invalidate_token, stats as token_cache_stats
+from core.throttling import ScopedTokenBucketThrottle
+from .lockout import check_lockout, clear_failures, register_failure
 from .models import User
+from .throttles import LoginThrottle, PasswordResetThrottle
+from .tokens import issue_tokens, revoke_token, revoke_user_tokens
 from .serializers import RegisterSerializer, ChangePasswordSerializer, ResetPasswordByEmailSerializer
 
 class RegisterView(generics.CreateAPIView):
@@ -13,25 +22,40 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = "register"
+
+
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    # /api/token/ is a password login too, so it shares login_view's bucket
+    throttle_classes = [LoginThrottle]
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginThrottle])
 def login_view(request):
     # API endpoint for user login
-    # Authenticates user and returns an auth token
+    # Authenticates user and returns a JWT access/refresh pair, plus the
+    # legacy auth token for clients that still send "Token <key>"
     username = request.data.get('username')
     password = request.data.get('password')
-    
-    # Authenticate user with username and password
+
+    # A client locked out of this username is refused before any password hashing
+    check_lockout(username, request)
+
+    # Authenticate user with username and password; a stored hash from an
+    # older hasher or cost policy is upgraded here (see accounts/hashers.py)
     user = authenticate(username=username, password=password)
     
     if user is not None:
+        clear_failures(username, request)
         # Create or get existing token for the user
         token, _ = Token.objects.get_or_create(user=user)
         
         return Response({
             'token': token.key,
+            **issue_tokens(user),
             'user': {
                 'id': user.id,
                 'username': user.username,
@@ -41,9 +65,33 @@ def login_view(request):
         })
     
     # Invalid credentials
+    register_failure(username, request)
     return Response({'error': 'Invalid credentials'}, status=400)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout_view(request):
+    # API endpoint for logout
+    # Deletes the auth token and drops its cached lookup, or revokes the JWT
+    # access token (and the refresh token, if sent), so it stops working immediately
+    if isinstance(request.auth, Token):
+        invalidate_token(request.auth.key)
+        Token.objects.filter(key=request.auth.key).delete()
+    elif isinstance(request.auth, AccessToken):
+        revoke_token(request.auth)
+
+    refresh = request.data.get('refresh')
+    if refresh:
+        try:
+            refresh = RefreshToken(refresh)
+        except TokenError:
+            refresh = None
+        if refresh is not None and str(refresh.get(jwt_settings.USER_ID_CLAIM)) == str(request.user.id):
+            revoke_token(refresh)
+    return Response(status=204)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password_view(request):
@@ -55,10 +103,13 @@ def change_password_view(request):
     )
     
     if serializer.is_valid():
-        # Save the new password (hashed automatically)
+        # Save the new password (hashed automatically); the save drops cached token lookups
         serializer.save()
+        # Sign out every JWT session, then hand this client a fresh pair
+        revoke_user_tokens(request.user.id)
         return Response({
-            'message': 'Password changed successfully'
+            'message': 'Password changed successfully',
+            **issue_tokens(request.user),
         }, status=200)
     
     # Return validation errors if any
@@ -66,6 +117,7 @@ def change_password_view(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([PasswordResetThrottle])
 def reset_password_by_email_view(request):
     # API endpoint for resetting password with just email (no token needed)
     serializer = ResetPasswordByEmailSerializer(data=request.data)
@@ -76,10 +128,19 @@ def reset_password_by_email_view(request):
         
         user = User.objects.get(email=email)
         user.set_password(new_password)
+        # The save drops cached token lookups (accounts/signals.py)
         user.save()
+        revoke_user_tokens(user.id)
         
         return Response({
             'message': 'Password has been reset successfully'
         }, status=200)
     
-    return Response(serializer.errors, status=400)
\ No newline at end of file
+    return Response(serializer.errors, status=400)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def token_cache_stats_view(request):
+    # Token authentication cache hit rates for this worker process
+    return Response(token_cache_stats.snapshot())
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from accounts.roles import role_profile
 from .models import AvailabilitySlot
 
 class AvailabilitySlotSerializer(serializers.ModelSerializer):
@@ -19,9 +20,9 @@ class AvailabilitySlotSerializer(serializers.ModelSerializer):
         if self.instance:
             sitter = self.instance.sitter
         elif request and request.user.role == "SITTER":
-            try:
-                sitter = request.user.sitter_profile
-            except AttributeError:
+            # Same request-scoped profile the view assigns the slot to
+            sitter = role_profile(request, "SITTER")
+            if sitter is None:
                 raise ValidationError("Sitter profile not found")
         else:
             return attrs
@@ -1,4 +1,5 @@
 from django.test import TestCase
+from unittest import mock
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework.test import APIClient
@@ -6,6 +7,7 @@ from rest_framework import status
 from datetime import timedelta
 from availability.models import AvailabilitySlot
 from profiles.models import SitterProfile
+from accounts.roles import role_profile
 
 User = get_user_model()
 
@@ -259,3 +261,17 @@ class AvailabilitySlotAPITests(TestCase):
         response = self.client.get('/api/availability/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 0)
+    
+    # Test that validation reads the request-scoped sitter profile the view uses
+    def test_validation_uses_request_scoped_profile(self):
+        self.client.force_authenticate(user=self.sitter_user)
+        data = {
+            'start_ts': self.start_time.isoformat(),
+            'end_ts': self.end_time.isoformat(),
+            'status': 'open'
+        }
+        with mock.patch('availability.serializers.role_profile', wraps=role_profile) as resolver:
+            response = self.client.post('/api/availability/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        resolver.assert_called_once()
+        self.assertEqual(resolver.call_args.args[1], 'SITTER')
@@ -1,5 +1,6 @@
 from rest_framework import viewsets, permissions
 from rest_framework.exceptions import PermissionDenied
+from accounts.roles import role_profile
 from .models import AvailabilitySlot
 from .serializers import AvailabilitySlotSerializer
 
@@ -26,36 +27,35 @@ class AvailabilitySlotViewSet(viewsets.ModelViewSet):
 
         # Filter for current sitter's own slots: /api/availability/?mine=true
         mine = self.request.query_params.get("mine")
-        user = self.request.user
         
         if mine == "true":
-            if not user.is_authenticated:
-                return qs.none()  # Return empty queryset if not authenticated
-            if not hasattr(user, "sitter_profile"):
-                return qs.none()  # Return empty queryset if not a sitter
-            return qs.filter(sitter=user.sitter_profile)
+            # Anonymous users and non-sitters have no profile, so no slots
+            sitter = role_profile(self.request, "SITTER")
+            if sitter is None:
+                return qs.none()
+            return qs.filter(sitter=sitter)
 
         # Default: return all slots (for public browsing)
         return qs
     
     # Automatically assign sitter when creating a slot
     def perform_create(self, serializer):
-        user = self.request.user
-        if user.role != "SITTER":
+        sitter = role_profile(self.request, "SITTER")
+        if sitter is None:
             raise PermissionDenied("Only sitters can create availability slots.")
-        serializer.save(sitter=user.sitter_profile)
+        serializer.save(sitter=sitter)
     
     # Ensure sitter can only update their own slots
     def perform_update(self, serializer):
         slot = self.get_object()
-        user = self.request.user
-        if user.role != "SITTER" or slot.sitter != user.sitter_profile:
+        sitter = role_profile(self.request, "SITTER")
+        if sitter is None or slot.sitter_id != sitter.pk:
             raise PermissionDenied("You can only update your own availability.")
         serializer.save()
     
     # Ensure sitter can only delete their own slots
     def perform_destroy(self, instance):
-        user = self.request.user
-        if user.role != "SITTER" or instance.sitter != user.sitter_profile:
+        sitter = role_profile(self.request, "SITTER")
+        if sitter is None or instance.sitter_id != sitter.pk:
             raise PermissionDenied("You can only delete your own availability.")
         instance.delete()
@@ -1,3 +1,4 @@
+from django import forms
 from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
@@ -5,9 +6,31 @@ from django.utils import timezone
 from decimal import Decimal
 
 from .models import Booking
+from . import services as booking_services
+
+class BookingAdminForm(forms.ModelForm):
+    class Meta:
+        model = Booking
+        fields = "__all__"
+
+    # Status edits on the change page follow the same lifecycle as the API.
+    # The admin runs the whole change view in one transaction, so the row lock
+    # taken here is held until save_model has written the new status.
+    def clean_status(self):
+        new_status = self.cleaned_data["status"]
+        if self.instance.pk:
+            self.locked_booking = booking_services.lock_booking(self.instance.pk)
+            try:
+                booking_services.check_transition(self.locked_booking.status, new_status)
+            except booking_services.InvalidTransition as exc:
+                raise forms.ValidationError(str(exc))
+        return new_status
+
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
+    form = BookingAdminForm
+
     # Columns displayed in the list view
     list_display = (
         'id',
@@ -153,7 +176,8 @@ class BookingAdmin(admin.ModelAdmin):
             'requested': '#ffc107',   # yellow
             'confirmed': '#007bff',   # blue
             'completed': '#28a745',   # green
-            'canceled': '#dc3545'     # red
+            'canceled': '#dc3545',    # red
+            'expired': '#6c757d'      # gray
         }
         color = colors.get(obj.status, '#6c757d')
         return format_html(
@@ -184,22 +208,24 @@ class BookingAdmin(admin.ModelAdmin):
 
     # ---------- Admin Actions ----------
     
+    # Status actions go through the booking state machine so slots stay in sync
+    def _bulk_transition(self, request, queryset, new_status):
+        updated = booking_services.bulk_transition(queryset, new_status)
+        self.message_user(request, f"{updated} booking(s) marked as {new_status}.")
+
     # Mark selected bookings as confirmed
     def mark_confirmed(self, request, queryset):
-        updated = queryset.filter(status='requested').update(status='confirmed')
-        self.message_user(request, f"{updated} booking(s) marked as confirmed.")
+        self._bulk_transition(request, queryset, 'confirmed')
     mark_confirmed.short_description = "Mark selected bookings as CONFIRMED"
 
     # Mark selected bookings as completed
     def mark_completed(self, request, queryset):
-        updated = queryset.filter(status='confirmed').update(status='completed')
-        self.message_user(request, f"{updated} booking(s) marked as completed.")
+        self._bulk_transition(request, queryset, 'completed')
     mark_completed.short_description = "Mark selected bookings as COMPLETED"
 
     # Mark selected bookings as canceled
     def mark_canceled(self, request, queryset):
-        updated = queryset.exclude(status__in=['completed', 'canceled']).update(status='canceled')
-        self.message_user(request, f"{updated} booking(s) marked as canceled.")
+        self._bulk_transition(request, queryset, 'canceled')
     mark_canceled.short_description = "Mark selected bookings as CANCELED"
 
     # Optimize queryset for performance (reduce DB queries)
@@ -207,5 +233,12 @@ class BookingAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs.select_related('owner', 'owner__user', 'sitter', 'sitter__user')
 
+    # Status edits on the change page go through the booking state machine
+    # (against the row clean_status locked) so slots stay in sync
+    def save_model(self, request, obj, form, change):
+        if change and 'status' in form.changed_data:
+            booking_services.transition(form.locked_booking, obj.status, save=False)
+        super().save_model(request, obj, form, change)
+
     # Pagination
     list_per_page = 25
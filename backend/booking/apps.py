@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking'
+
+    def ready(self):
+        import booking.signals
+        import booking.services  # registers outbox handlers
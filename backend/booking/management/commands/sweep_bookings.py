@@ -0,0 +1,79 @@
+# booking/management/commands/sweep_bookings.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from booking.models import Booking
+from booking import services as booking_services
+
+
+class Command(BaseCommand):
+    help = (
+        'Completes confirmed bookings that have ended and expires unanswered '
+        'booking requests. Works in small SKIP LOCKED batches, so it is safe to '
+        'run every minute (e.g. from cron) alongside live traffic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Bookings transitioned per transaction (default: 500)'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=20,
+            help='Stop after this many batches per phase so a run stays short (default: 20)'
+        )
+        parser.add_argument(
+            '--request-ttl-hours',
+            type=int,
+            default=48,
+            help='Expire requests left unanswered for this many hours (default: 48)'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        request_cutoff = now - timedelta(hours=options['request_ttl_hours'])
+
+        # Confirmed bookings whose end time has passed
+        completed = self.sweep(
+            Booking.objects.filter(status='confirmed', end_ts__lte=now),
+            'completed',
+            options,
+        )
+
+        # Requests that already started or were never answered within the TTL
+        expired = self.sweep(
+            Booking.objects.filter(status='requested').filter(
+                Q(start_ts__lte=now) | Q(created_at__lte=request_cutoff)
+            ),
+            'expired',
+            options,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Completed {completed} booking(s), expired {expired} request(s)'
+            )
+        )
+
+    def sweep(self, queryset, new_status, options):
+        # Transition matching bookings batch by batch; each batch is its own
+        # short transaction and skips rows locked by concurrent requests
+        total = 0
+        for _ in range(options['max_batches']):
+            updated = booking_services.bulk_transition(
+                queryset,
+                new_status,
+                limit=options['batch_size'],
+                skip_locked=True,
+            )
+            total += updated
+            if updated < options['batch_size']:
+                break
+        return total
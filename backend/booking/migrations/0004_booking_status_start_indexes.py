@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0003_booking_pets"),
+        ("profiles", "0007_alter_ownerprofile_name_alter_ownerprofile_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["sitter", "status", "start_ts"],
+                name="booking_sitter_status_start",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["owner", "status", "start_ts"],
+                name="booking_owner_status_start",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0004_booking_status_start_indexes"),
+        ("profiles", "0007_alter_ownerprofile_name_alter_ownerprofile_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="booking",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("requested", "Requested"),
+                    ("confirmed", "Confirmed"),
+                    ("completed", "Completed"),
+                    ("canceled", "Canceled"),
+                    ("expired", "Expired"),
+                ],
+                default="requested",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("status", "confirmed")),
+                fields=["end_ts"],
+                name="booking_confirmed_end",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("status", "requested")),
+                fields=["start_ts"],
+                name="booking_requested_start",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("status", "requested")),
+                fields=["created_at"],
+                name="booking_requested_created",
+            ),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 
 class Booking(models.Model):
@@ -8,6 +9,7 @@ class Booking(models.Model):
         ("confirmed", "Confirmed"),
         ("completed", "Completed"),
         ("canceled", "Canceled"),
+        ("expired", "Expired"),
     ]
 
     # Service type options
@@ -54,6 +56,15 @@ class Booking(models.Model):
     class Meta:
         # Order by newest first
         ordering = ["-created_at"]
+        # Composite indexes backing the filtered booking history views
+        indexes = [
+            models.Index(fields=["sitter", "status", "start_ts"], name="booking_sitter_status_start"),
+            models.Index(fields=["owner", "status", "start_ts"], name="booking_owner_status_start"),
+            # Small partial indexes for the lifecycle sweep (sweep_bookings command)
+            models.Index(fields=["end_ts"], condition=Q(status="confirmed"), name="booking_confirmed_end"),
+            models.Index(fields=["start_ts"], condition=Q(status="requested"), name="booking_requested_start"),
+            models.Index(fields=["created_at"], condition=Q(status="requested"), name="booking_requested_created"),
+        ]
 
     def __str__(self):
         # Display booking with pets
@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+
+class BookingCursorPagination(CursorPagination):
+    # Keyset pagination for booking history so deep pages stay cheap
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-created_at"
+
+    # Orderings clients may pick with ?ordering=
+    # start_ts orderings line up with the (sitter|owner, status, start_ts) indexes
+    allowed_orderings = ("-created_at", "created_at", "start_ts", "-start_ts")
+
+    def get_ordering(self, request, queryset, view):
+        ordering = request.query_params.get("ordering")
+        if ordering in self.allowed_orderings:
+            return (ordering,)
+        return (self.ordering,)
@@ -0,0 +1,79 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.cache import cache
+
+from profiles.models import SitterProfile
+
+# Multiplier applied to the sitter's hourly rate per service type.
+# Defaults are neutral; override with settings.BOOKING_PRICING["SERVICE_MULTIPLIERS"].
+DEFAULT_SERVICE_MULTIPLIERS = {
+    "house_sitting": Decimal("1.00"),
+    "pet_boarding": Decimal("1.00"),
+    "in_home_visit": Decimal("1.00"),
+    "pet_grooming": Decimal("1.00"),
+    "pet_walking": Decimal("1.00"),
+}
+
+# Surcharge per additional pet, as a fraction of the base price
+DEFAULT_EXTRA_PET_RATE = Decimal("0.25")
+
+# How long a cached rate card lives; profile saves invalidate it sooner
+DEFAULT_RATE_CARD_TTL = 60 * 15
+
+RATE_CARD_KEY = "booking:rate_card:{}"
+
+
+def _pricing_setting(name, default):
+    return getattr(settings, "BOOKING_PRICING", {}).get(name, default)
+
+
+def service_multiplier(service_type):
+    multipliers = _pricing_setting("SERVICE_MULTIPLIERS", DEFAULT_SERVICE_MULTIPLIERS)
+    return Decimal(str(multipliers.get(service_type, Decimal("1.00"))))
+
+
+def compute_price(rate_hourly, service_type, start_ts, end_ts, pet_count=1):
+    # Price = hourly rate x hours x service multiplier, plus a surcharge per extra pet
+    hours = Decimal(str((end_ts - start_ts).total_seconds())) / Decimal(3600)
+    base = Decimal(rate_hourly) * hours * service_multiplier(service_type)
+    extra_pet_rate = Decimal(str(_pricing_setting("EXTRA_PET_RATE", DEFAULT_EXTRA_PET_RATE)))
+    total = base * (1 + extra_pet_rate * max(pet_count - 1, 0))
+    return total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+# ----------------- Rate card cache ----------------- #
+
+def get_rate_cards(sitter_ids):
+    # Return {sitter_id: rate_hourly} for the given sitters.
+    # Reads every card in one cache round trip and loads all misses with one query.
+    sitter_ids = list(dict.fromkeys(int(pk) for pk in sitter_ids))
+    keys = {RATE_CARD_KEY.format(pk): pk for pk in sitter_ids}
+    cached = cache.get_many(keys.keys())
+    cards = {keys[key]: Decimal(value) for key, value in cached.items()}
+
+    missing = [pk for pk in sitter_ids if pk not in cards]
+    if missing:
+        fetched = dict(
+            SitterProfile.objects.filter(pk__in=missing).values_list("pk", "rate_hourly")
+        )
+        cache.set_many(
+            {RATE_CARD_KEY.format(pk): str(rate) for pk, rate in fetched.items()},
+            _pricing_setting("RATE_CARD_TTL", DEFAULT_RATE_CARD_TTL),
+        )
+        cards.update(fetched)
+    return cards
+
+
+def invalidate_rate_card(sitter_id):
+    cache.delete(RATE_CARD_KEY.format(sitter_id))
+
+
+def quote_many(sitter_ids, service_type, start_ts, end_ts, pet_count=1):
+    # Quote the same request against many sitters (e.g. a search results page).
+    # Unknown sitters are left out of the result.
+    cards = get_rate_cards(sitter_ids)
+    return {
+        sitter_id: compute_price(rate, service_type, start_ts, end_ts, pet_count)
+        for sitter_id, rate in cards.items()
+    }
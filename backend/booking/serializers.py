@@ -3,12 +3,17 @@ from rest_framework.exceptions import ValidationError
 from django.db.models import Q
 from django.contrib.auth import get_user_model
 
+from accounts.roles import role_profile
 from .models import Booking
+from .pricing import compute_price
 from profiles.models import SitterProfile, Pet, OwnerProfile
 from availability.models import AvailabilitySlot
 
 User = get_user_model()
 
+# Booking fields price_quote is computed from (besides the pets)
+PRICED_FIELDS = {"sitter", "service_type", "start_ts", "end_ts"}
+
 class OwnerUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -67,7 +72,8 @@ class BookingSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ("id", "created_at", "updated_at", "pet_ids", "pet_details", "owner", "sitter_name")
+        # price_quote is computed server-side from the sitter's rate card
+        read_only_fields = ("id", "created_at", "updated_at", "pet_ids", "pet_details", "owner", "sitter_name", "price_quote")
 
     # Methods to retrieve pet info
     def get_pet_ids(self, obj):
@@ -88,17 +94,15 @@ class BookingSerializer(serializers.ModelSerializer):
 
     # Validate pets belong to the booking owner
     def validate_pets(self, pets):
-        user = self.context["request"].user
-        try:
-            owner_profile = user.owner_profile
-        except AttributeError:
+        owner_profile = role_profile(self.context["request"], "OWNER")
+        if owner_profile is None:
             raise ValidationError("Authenticated user must have an owner profile.")
         
         if not pets:
             raise ValidationError("At least one pet is required for booking.")
         
         for pet in pets:
-            if pet.owner != owner_profile:
+            if pet.owner_id != owner_profile.pk:
                 raise ValidationError(f"Pet '{pet.name}' does not belong to you.")
         
         return pets
@@ -164,27 +168,64 @@ class BookingSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    # Server-side price from the sitter's rate; values missing from
+    # validated_data come from instance (partial updates)
+    def _price(self, validated_data, pet_count, instance=None):
+        def value(field, default=None):
+            if field in validated_data:
+                return validated_data[field]
+            return getattr(instance, field) if instance is not None else default
+
+        return compute_price(
+            value("sitter").rate_hourly,
+            value("service_type", "house_sitting"),
+            value("start_ts"),
+            value("end_ts"),
+            pet_count=pet_count,
+        )
+
     # Create booking and assign pets
     def create(self, validated_data):
-        user = self.context["request"].user
-        try:
-            owner_profile = user.owner_profile
-        except AttributeError:
+        owner_profile = role_profile(self.context["request"], "OWNER")
+        if owner_profile is None:
             raise ValidationError("Authenticated user must have an owner profile.")
         
         pets = validated_data.pop('pets')
         validated_data["owner"] = owner_profile
+        validated_data["price_quote"] = self._price(validated_data, len(pets))
         booking = super().create(validated_data)
         booking.pets.set(pets)
         
         return booking
     
     # Update booking and handle pets assignment
+    # Re-prices the booking whenever a field the price depends on changes
     def update(self, instance, validated_data):
         pets = validated_data.pop('pets', None)
+        if pets is not None or PRICED_FIELDS & validated_data.keys():
+            pet_count = len(pets) if pets is not None else instance.pets.count()
+            validated_data["price_quote"] = self._price(validated_data, pet_count, instance)
         booking = super().update(instance, validated_data)
         
         if pets is not None:
             booking.pets.set(pets)
         
         return booking
+
+
+# Input for the quote endpoint: one request priced against one or more sitters
+class QuoteRequestSerializer(serializers.Serializer):
+    sitters = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100
+    )
+    service_type = serializers.ChoiceField(choices=Booking.SERVICE_CHOICES, default="house_sitting")
+    start_ts = serializers.DateTimeField()
+    end_ts = serializers.DateTimeField()
+    pet_count = serializers.IntegerField(min_value=1, default=1)
+
+    def validate(self, attrs):
+        if attrs["start_ts"] >= attrs["end_ts"]:
+            raise serializers.ValidationError("End time must be after start time.")
+        return attrs
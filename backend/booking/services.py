@@ -0,0 +1,143 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from core import outbox
+from .models import Booking
+from availability.models import AvailabilitySlot
+
+# Statuses that still hold a sitter's time
+ACTIVE_STATUSES = ("requested", "confirmed")
+
+# Allowed booking status transitions: current status -> reachable statuses
+TRANSITIONS = {
+    "requested": ("confirmed", "canceled", "expired"),
+    "confirmed": ("completed", "canceled"),
+    "completed": (),
+    "canceled": (),
+    "expired": (),
+}
+
+
+class InvalidTransition(Exception):
+    # Raised when a booking cannot move from its current status to the target
+    pass
+
+
+def can_transition(old_status, new_status):
+    return new_status in TRANSITIONS.get(old_status, ())
+
+
+def check_transition(old_status, new_status):
+    # Staying in the same status is a no-op, anything else must be an allowed edge
+    if old_status != new_status and not can_transition(old_status, new_status):
+        raise InvalidTransition(
+            f"Cannot change a booking from {old_status} to {new_status}."
+        )
+
+
+def lock_booking(booking_id, queryset=None):
+    # Fetch a booking with its row locked until the surrounding transaction ends.
+    # Status checks must read this copy: one read before the lock may already be stale.
+    # Pass the caller's queryset to keep its select_related/prefetch_related; only
+    # the booking row itself is locked
+    if queryset is None:
+        queryset = Booking.objects.all()
+    return queryset.select_for_update(of=("self",)).get(pk=booking_id)
+
+
+@transaction.atomic
+def transition(booking, new_status, save=True):
+    # Move a booking fetched with lock_booking to new_status and queue its slot
+    # side effects. save=False leaves writing the row to the caller, e.g. a
+    # serializer or admin form saving other fields with it in the same transaction
+    old_status = booking.status
+    check_transition(old_status, new_status)
+    booking.status = new_status
+    if old_status == new_status:
+        return booking
+    if save:
+        booking.save(update_fields=["status", "updated_at"])
+    enqueue_slot_effects([booking.pk], new_status)
+    return booking
+
+
+@transaction.atomic
+def bulk_transition(queryset, new_status, limit=None, skip_locked=False):
+    # Move every booking in queryset that may legally reach new_status.
+    # Uses a fixed number of set-based queries regardless of how many rows match;
+    # bookings that cannot make the transition are left untouched.
+    # limit caps the batch size and skip_locked skips rows another transaction holds,
+    # which lets background sweeps run alongside user traffic.
+    # Returns the number of bookings transitioned.
+    sources = [status for status, targets in TRANSITIONS.items() if new_status in targets]
+
+    # Lock the affected rows in a stable order so concurrent transitions don't deadlock
+    locked = (
+        Booking.objects.filter(pk__in=queryset.values("pk"), status__in=sources)
+        .order_by("pk")
+        .select_for_update(skip_locked=skip_locked)
+        .values_list("pk", flat=True)
+    )
+    if limit is not None:
+        locked = locked[:limit]
+    ids = list(locked)
+    if not ids:
+        return 0
+
+    # QuerySet.update() skips auto_now, so bump updated_at explicitly
+    Booking.objects.filter(pk__in=ids).update(status=new_status, updated_at=timezone.now())
+    enqueue_slot_effects(ids, new_status)
+    return len(ids)
+
+
+def enqueue_slot_effects(booking_ids, new_status):
+    # Record the slot update in the outbox; it commits with the status change
+    # and is applied by the drain_outbox worker
+    return outbox.enqueue(
+        "booking.status_changed", {"booking_ids": list(booking_ids), "status": new_status}
+    )
+
+
+@outbox.handler("booking.status_changed")
+def handle_status_changed(payload):
+    apply_slot_effects(payload["booking_ids"], payload["status"])
+
+
+def apply_slot_effects(booking_ids, new_status):
+    # Keep availability slots in sync with bookings that just entered new_status
+    if new_status == "confirmed":
+        mark_slots_booked(booking_ids)
+    elif new_status in ("completed", "canceled", "expired"):
+        reopen_slots(booking_ids)
+
+
+def _overlapping(booking_qs):
+    # Exists() matching slots that overlap any booking in booking_qs for the same sitter
+    return Exists(
+        booking_qs.filter(
+            sitter_id=OuterRef("sitter_id"),
+            start_ts__lt=OuterRef("end_ts"),
+            end_ts__gt=OuterRef("start_ts"),
+        )
+    )
+
+
+def mark_slots_booked(booking_ids):
+    # Mark open slots overlapping the given bookings as booked in one UPDATE
+    return AvailabilitySlot.objects.filter(
+        _overlapping(Booking.objects.filter(pk__in=booking_ids)),
+        status="open",
+    ).update(status="booked")
+
+
+def reopen_slots(booking_ids):
+    # Reopen booked slots overlapping the given bookings, unless another
+    # active booking still occupies them, in one UPDATE
+    others = Booking.objects.filter(status__in=ACTIVE_STATUSES).exclude(pk__in=booking_ids)
+    return AvailabilitySlot.objects.filter(
+        _overlapping(Booking.objects.filter(pk__in=booking_ids)),
+        status="booked",
+    ).exclude(
+        _overlapping(others)
+    ).update(status="open")
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from profiles.models import SitterProfile
+from .pricing import invalidate_rate_card
+
+
+@receiver([post_save, post_delete], sender=SitterProfile)
+def invalidate_sitter_rate_card(sender, instance, **kwargs):
+    """
+    Drop the cached rate card whenever a sitter profile changes.
+    """
+    invalidate_rate_card(instance.pk)
@@ -1,12 +1,26 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
+from django.core.cache import cache
+from django.core.management import call_command
+from django.forms.models import model_to_dict
+from unittest import mock
 from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
+from django.contrib import admin
+from booking.admin import BookingAdmin, BookingAdminForm
 from booking.models import Booking
-from profiles.models import SitterProfile, OwnerProfile
+from booking import services as booking_services
+from booking.pricing import compute_price, get_rate_cards
+from booking.serializers import BookingSerializer
+from booking.views import BookingViewSet
+from core.outbox import drain_all
+from profiles.models import SitterProfile, OwnerProfile, Pet
 from availability.models import AvailabilitySlot
 
 User = get_user_model()
@@ -216,8 +230,8 @@ class BookingAPITests(TestCase):
         
         response = self.client.get('/api/bookings/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['owner_id'], self.owner_profile.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['owner_id'], self.owner_profile.id)
     
     def test_sitter_can_only_see_own_bookings(self):
         """Test that sitters only see bookings assigned to them"""
@@ -258,8 +272,8 @@ class BookingAPITests(TestCase):
         
         response = self.client.get('/api/bookings/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['sitter_id'], self.sitter_profile.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['sitter_id'], self.sitter_profile.id)
     
     def test_validate_end_time_after_start_time(self):
         """Test that end time must be after start time"""
@@ -446,6 +460,540 @@ class BookingAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class BookingHistoryFilterTests(TestCase):
+    """Test filtering and cursor pagination of the booking list"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        
+        # Create sitter
+        self.sitter_user = User.objects.create_user(
+            username='testsitter',
+            password='testpass123',
+            role='SITTER'
+        )
+        self.sitter_profile = SitterProfile.objects.create(
+            user=self.sitter_user,
+            display_name='Test Sitter',
+            rate_hourly=25.00,
+            home_zip='12345'
+        )
+        
+        # Create owner
+        self.owner_user = User.objects.create_user(
+            username='testowner',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.owner_profile = OwnerProfile.objects.create(
+            user=self.owner_user,
+            name='Test Owner',
+            phone='1234567890'
+        )
+        
+        # One booking per day: past confirmed, upcoming confirmed x2, upcoming requested
+        now = timezone.now()
+        self.past = self._booking(now - timedelta(days=2), 'confirmed')
+        self.upcoming_1 = self._booking(now + timedelta(days=1), 'confirmed')
+        self.upcoming_2 = self._booking(now + timedelta(days=2), 'confirmed', 'house_sitting')
+        self.requested = self._booking(now + timedelta(days=3), 'requested')
+        
+        self.client.force_authenticate(user=self.sitter_user)
+    
+    def _booking(self, start, booking_status, service_type='pet_walking'):
+        return Booking.objects.create(
+            owner=self.owner_profile,
+            sitter=self.sitter_profile,
+            service_type=service_type,
+            start_ts=start,
+            end_ts=start + timedelta(hours=2),
+            price_quote=Decimal('50.00'),
+            status=booking_status
+        )
+    
+    def test_filter_upcoming_confirmed(self):
+        """Test status and start_after filters combine"""
+        response = self.client.get('/api/bookings/', {
+            'status': 'confirmed',
+            'start_after': timezone.now().isoformat(),
+            'ordering': 'start_ts',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [b['id'] for b in response.data['results']]
+        self.assertEqual(ids, [self.upcoming_1.id, self.upcoming_2.id])
+    
+    def test_filter_service_type_and_start_before(self):
+        """Test service_type and start_before filters"""
+        response = self.client.get('/api/bookings/', {
+            'service_type': 'pet_walking',
+            'start_before': (timezone.now() + timedelta(days=2)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = {b['id'] for b in response.data['results']}
+        self.assertEqual(ids, {self.past.id, self.upcoming_1.id})
+    
+    def test_invalid_filters_rejected(self):
+        """Test that unknown statuses and malformed timestamps return 400"""
+        response = self.client.get('/api/bookings/', {'status': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.get('/api/bookings/', {'start_after': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        # Well-formed but impossible dates are rejected the same way
+        response = self.client.get('/api/bookings/', {'start_after': '2025-13-01T00:00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_naive_and_end_after_filters(self):
+        """Test that naive timestamps are accepted and end_after keeps running bookings"""
+        naive = timezone.localtime().replace(tzinfo=None).isoformat()
+        response = self.client.get('/api/bookings/', {'start_after': naive, 'status': 'confirmed', 'ordering': 'start_ts'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([b['id'] for b in response.data['results']], [self.upcoming_1.id, self.upcoming_2.id])
+        
+        response = self.client.get('/api/bookings/', {'end_after': timezone.now().isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(self.past.id, [b['id'] for b in response.data['results']])
+    
+    def test_cursor_pagination_walks_all_pages(self):
+        """Test that following next links returns every booking exactly once"""
+        seen = []
+        response = self.client.get('/api/bookings/', {'page_size': 3, 'ordering': 'start_ts'})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(b['id'] for b in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        
+        self.assertEqual(seen, [self.past.id, self.upcoming_1.id, self.upcoming_2.id, self.requested.id])
+
+
+class BookingStateMachineTests(TestCase):
+    """Test booking lifecycle transitions and their slot side effects"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        
+        # Create sitter
+        self.sitter_user = User.objects.create_user(
+            username='testsitter',
+            password='testpass123',
+            role='SITTER'
+        )
+        self.sitter_profile = SitterProfile.objects.create(
+            user=self.sitter_user,
+            display_name='Test Sitter',
+            rate_hourly=25.00,
+            home_zip='12345'
+        )
+        
+        # Create owner
+        self.owner_user = User.objects.create_user(
+            username='testowner',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.owner_profile = OwnerProfile.objects.create(
+            user=self.owner_user,
+            name='Test Owner',
+            phone='1234567890'
+        )
+        
+        self.start_time = timezone.now() + timedelta(days=1)
+    
+    def _booking_with_slot(self, offset_days, booking_status='requested'):
+        start = self.start_time + timedelta(days=offset_days)
+        slot = AvailabilitySlot.objects.create(
+            sitter=self.sitter_profile,
+            start_ts=start - timedelta(hours=1),
+            end_ts=start + timedelta(hours=5),
+            status='open'
+        )
+        booking = Booking.objects.create(
+            owner=self.owner_profile,
+            sitter=self.sitter_profile,
+            service_type='pet_walking',
+            start_ts=start,
+            end_ts=start + timedelta(hours=4),
+            price_quote=Decimal('100.00'),
+            status=booking_status
+        )
+        return booking, slot
+    
+    def test_transition_table(self):
+        """Test allowed and rejected transitions"""
+        self.assertTrue(booking_services.can_transition('requested', 'confirmed'))
+        self.assertTrue(booking_services.can_transition('confirmed', 'completed'))
+        self.assertFalse(booking_services.can_transition('requested', 'completed'))
+        self.assertFalse(booking_services.can_transition('canceled', 'confirmed'))
+        with self.assertRaises(booking_services.InvalidTransition):
+            booking_services.check_transition('completed', 'canceled')
+    
+    def test_bulk_confirm_books_slots(self):
+        """Test bulk confirmation updates bookings and books their slots"""
+        pairs = [self._booking_with_slot(i) for i in range(3)]
+        completed, _ = self._booking_with_slot(5, 'completed')
+        
+        updated = booking_services.bulk_transition(Booking.objects.all(), 'confirmed')
+        self.assertEqual(updated, 3)
+        drain_all()
+        
+        for booking, slot in pairs:
+            booking.refresh_from_db()
+            slot.refresh_from_db()
+            self.assertEqual(booking.status, 'confirmed')
+            self.assertEqual(slot.status, 'booked')
+        
+        completed.refresh_from_db()
+        self.assertEqual(completed.status, 'completed')
+    
+    def test_bulk_transition_query_count_is_constant(self):
+        """Test bulk transitions don't issue per-booking queries"""
+        self._booking_with_slot(0)
+        with CaptureQueriesContext(connection) as single:
+            booking_services.bulk_transition(Booking.objects.all(), 'confirmed')
+        
+        for i in range(1, 6):
+            self._booking_with_slot(i)
+        with CaptureQueriesContext(connection) as many:
+            booking_services.bulk_transition(Booking.objects.filter(status='requested'), 'confirmed')
+        
+        self.assertEqual(len(single.captured_queries), len(many.captured_queries))
+    
+    def test_cancel_keeps_slot_booked_for_other_active_booking(self):
+        """Test a canceled booking doesn't reopen a slot another booking still uses"""
+        booking, slot = self._booking_with_slot(0, 'confirmed')
+        Booking.objects.create(
+            owner=self.owner_profile,
+            sitter=self.sitter_profile,
+            service_type='pet_walking',
+            start_ts=booking.start_ts,
+            end_ts=booking.end_ts,
+            price_quote=Decimal('100.00'),
+            status='confirmed'
+        )
+        slot.status = 'booked'
+        slot.save()
+        
+        booking_services.transition(booking_services.lock_booking(booking.pk), 'canceled')
+        drain_all()
+        
+        slot.refresh_from_db()
+        self.assertEqual(slot.status, 'booked')
+    
+    def test_api_rejects_invalid_transition(self):
+        """Test reopening a completed booking through the API returns 400"""
+        booking, _ = self._booking_with_slot(0, 'completed')
+        self.client.force_authenticate(user=self.sitter_user)
+        
+        response = self.client.patch(f'/api/bookings/{booking.id}/', {'status': 'confirmed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'completed')
+    
+    def test_api_cancel_reopens_slot(self):
+        """Test canceling a confirmed booking through the API reopens its slot"""
+        booking, slot = self._booking_with_slot(0, 'confirmed')
+        slot.status = 'booked'
+        slot.save()
+        self.client.force_authenticate(user=self.owner_user)
+        
+        response = self.client.patch(f'/api/bookings/{booking.id}/', {'status': 'canceled'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Slot update is queued in the outbox until the worker runs
+        slot.refresh_from_db()
+        self.assertEqual(slot.status, 'booked')
+        
+        drain_all()
+        slot.refresh_from_db()
+        self.assertEqual(slot.status, 'open')
+    
+    def test_api_checks_transition_against_locked_row(self):
+        """Test a status change is checked against the current row, not the copy read before it"""
+        booking, _ = self._booking_with_slot(0)
+        stale = Booking.objects.get(pk=booking.pk)
+        # Another request cancels the booking after this one loaded it
+        booking_services.transition(booking_services.lock_booking(booking.pk), 'canceled')
+        self.client.force_authenticate(user=self.sitter_user)
+        
+        with mock.patch.object(BookingViewSet, 'get_object', return_value=stale):
+            response = self.client.patch(f'/api/bookings/{booking.id}/', {'status': 'confirmed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'canceled')
+    
+    def test_admin_form_rejects_invalid_transition(self):
+        """Test the admin change form enforces the booking lifecycle"""
+        booking, _ = self._booking_with_slot(0, 'completed')
+        booking.pets.add(Pet.objects.create(owner=self.owner_profile, name='Rex', species='Dog', age=3))
+        data = model_to_dict(booking)
+        data['status'] = 'requested'
+        form = BookingAdminForm(data=data, instance=booking)
+        self.assertFalse(form.is_valid())
+        self.assertIn('status', form.errors)
+        
+        data['status'] = 'completed'
+        form = BookingAdminForm(data=data, instance=booking)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_admin_status_edit_goes_through_transition(self):
+        """Test a status edit on the admin change page queues the slot update"""
+        booking, slot = self._booking_with_slot(0)
+        booking.pets.add(Pet.objects.create(owner=self.owner_profile, name='Rex', species='Dog', age=3))
+        data = model_to_dict(booking)
+        data['status'] = 'confirmed'
+        form = BookingAdminForm(data=data, instance=booking)
+        self.assertTrue(form.is_valid(), form.errors)
+        BookingAdmin(Booking, admin.site).save_model(None, form.save(commit=False), form, True)
+        drain_all()
+
+        booking.refresh_from_db()
+        slot.refresh_from_db()
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertEqual(slot.status, 'booked')
+
+    def test_api_update_query_count_is_constant(self):
+        """Test a sitter confirm doesn't load the response's relations row by row"""
+        self.client.force_authenticate(user=self.sitter_user)
+        counts = []
+        for offset, pet_count in ((0, 1), (1, 3)):
+            booking, _ = self._booking_with_slot(offset)
+            for i in range(pet_count):
+                booking.pets.add(Pet.objects.create(owner=self.owner_profile, name=f'Pet {i}', species='Dog', age=3))
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.patch(f'/api/bookings/{booking.id}/', {'status': 'confirmed'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counts.append(len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]))
+        # Booking + pets read twice (permission lookup, then locked), outbox insert, update
+        self.assertEqual(counts, [6, 6])
+
+
+class BookingSweepCommandTests(TestCase):
+    """Test the sweep_bookings management command"""
+    
+    def setUp(self):
+        # Create sitter
+        self.sitter_user = User.objects.create_user(
+            username='testsitter',
+            password='testpass123',
+            role='SITTER'
+        )
+        self.sitter_profile = SitterProfile.objects.create(
+            user=self.sitter_user,
+            display_name='Test Sitter',
+            rate_hourly=25.00,
+            home_zip='12345'
+        )
+        
+        # Create owner
+        self.owner_user = User.objects.create_user(
+            username='testowner',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.owner_profile = OwnerProfile.objects.create(
+            user=self.owner_user,
+            name='Test Owner',
+            phone='1234567890'
+        )
+    
+    def _booking(self, start, booking_status):
+        return Booking.objects.create(
+            owner=self.owner_profile,
+            sitter=self.sitter_profile,
+            service_type='pet_walking',
+            start_ts=start,
+            end_ts=start + timedelta(hours=2),
+            price_quote=Decimal('50.00'),
+            status=booking_status
+        )
+    
+    def test_sweep_completes_and_expires(self):
+        """Test past confirmed bookings complete and stale requests expire"""
+        now = timezone.now()
+        past_confirmed = [self._booking(now - timedelta(days=1, hours=i), 'confirmed') for i in range(3)]
+        future_confirmed = self._booking(now + timedelta(days=1), 'confirmed')
+        started_request = self._booking(now - timedelta(hours=3), 'requested')
+        fresh_request = self._booking(now + timedelta(days=2), 'requested')
+        old_request = self._booking(now + timedelta(days=3), 'requested')
+        Booking.objects.filter(pk=old_request.pk).update(created_at=now - timedelta(days=5))
+        
+        # Past confirmed booking held a slot that should reopen
+        slot = AvailabilitySlot.objects.create(
+            sitter=self.sitter_profile,
+            start_ts=past_confirmed[0].start_ts,
+            end_ts=past_confirmed[0].end_ts,
+            status='booked'
+        )
+        
+        out = StringIO()
+        call_command('sweep_bookings', '--batch-size', '2', stdout=out)
+        self.assertIn('Completed 3 booking(s), expired 2 request(s)', out.getvalue())
+        
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        for booking in past_confirmed:
+            self.assertEqual(statuses[booking.pk], 'completed')
+        self.assertEqual(statuses[future_confirmed.pk], 'confirmed')
+        self.assertEqual(statuses[started_request.pk], 'expired')
+        self.assertEqual(statuses[old_request.pk], 'expired')
+        self.assertEqual(statuses[fresh_request.pk], 'requested')
+        
+        drain_all()
+        slot.refresh_from_db()
+        self.assertEqual(slot.status, 'open')
+    
+    def test_sweep_respects_max_batches(self):
+        """Test a run stops after max_batches batches"""
+        now = timezone.now()
+        for i in range(5):
+            self._booking(now - timedelta(days=1, hours=i), 'confirmed')
+        
+        call_command('sweep_bookings', '--batch-size', '2', '--max-batches', '1', stdout=StringIO())
+        self.assertEqual(Booking.objects.filter(status='completed').count(), 2)
+
+
+class BookingPricingTests(TestCase):
+    """Test server-side price quotes and rate card caching"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        
+        self.sitters = []
+        for i, rate in enumerate(['20.00', '30.00', '45.50']):
+            user = User.objects.create_user(
+                username=f'sitter{i}',
+                password='testpass123',
+                role='SITTER'
+            )
+            self.sitters.append(SitterProfile.objects.create(
+                user=user,
+                display_name=f'Sitter {i}',
+                rate_hourly=Decimal(rate),
+                home_zip='12345'
+            ))
+        
+        # Create owner
+        self.owner_user = User.objects.create_user(
+            username='testowner',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.owner_profile = OwnerProfile.objects.create(
+            user=self.owner_user,
+            name='Test Owner',
+            phone='1234567890'
+        )
+        
+        self.start_time = timezone.now() + timedelta(days=1)
+        self.end_time = self.start_time + timedelta(hours=4)
+    
+    def test_compute_price(self):
+        """Test price scales with duration and extra pets"""
+        self.assertEqual(
+            compute_price(Decimal('20.00'), 'pet_walking', self.start_time, self.end_time),
+            Decimal('80.00')
+        )
+        # Two extra pets add 2 x 25%
+        self.assertEqual(
+            compute_price(Decimal('20.00'), 'pet_walking', self.start_time, self.end_time, pet_count=3),
+            Decimal('120.00')
+        )
+    
+    def test_rate_cards_batched_and_cached(self):
+        """Test many sitters load in one query, then come from cache"""
+        ids = [s.id for s in self.sitters]
+        with self.assertNumQueries(1):
+            cards = get_rate_cards(ids)
+        self.assertEqual(cards[self.sitters[2].id], Decimal('45.50'))
+        
+        with self.assertNumQueries(0):
+            get_rate_cards(ids)
+    
+    def test_profile_update_invalidates_rate_card(self):
+        """Test saving a sitter profile drops its cached rate card"""
+        sitter = self.sitters[0]
+        get_rate_cards([sitter.id])
+        
+        sitter.rate_hourly = Decimal('25.00')
+        sitter.save()
+        
+        self.assertEqual(get_rate_cards([sitter.id])[sitter.id], Decimal('25.00'))
+    
+    def test_quote_endpoint(self):
+        """Test quoting several sitters in one request"""
+        data = {
+            'sitters': [s.id for s in self.sitters] + [999999],
+            'service_type': 'pet_walking',
+            'start_ts': self.start_time.isoformat(),
+            'end_ts': self.end_time.isoformat(),
+            'pet_count': 1,
+        }
+        response = self.client.post('/api/bookings/quote/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        quotes = {q['sitter_id']: q['price_quote'] for q in response.data['quotes']}
+        self.assertEqual(quotes, {
+            self.sitters[0].id: '80.00',
+            self.sitters[1].id: '120.00',
+            self.sitters[2].id: '182.00',
+        })
+    
+    def test_booking_creation_uses_server_quote(self):
+        """Test the client-supplied price_quote is ignored on create"""
+        sitter = self.sitters[0]
+        AvailabilitySlot.objects.create(
+            sitter=sitter,
+            start_ts=self.start_time - timedelta(hours=1),
+            end_ts=self.end_time + timedelta(hours=1),
+            status='open'
+        )
+        pet = Pet.objects.create(owner=self.owner_profile, name='Rex', species='Dog', age=3)
+        
+        self.client.force_authenticate(user=self.owner_user)
+        data = {
+            'sitter': sitter.id,
+            'pets': [pet.id],
+            'service_type': 'pet_walking',
+            'start_ts': self.start_time.isoformat(),
+            'end_ts': self.end_time.isoformat(),
+            'price_quote': '1.00',
+        }
+        response = self.client.post('/api/bookings/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Booking.objects.get().price_quote, Decimal('80.00'))
+    
+    def test_update_reprices_booking(self):
+        """Test changing the times or pets of a booking recomputes its price"""
+        booking = Booking.objects.create(
+            owner=self.owner_profile,
+            sitter=self.sitters[0],
+            service_type='pet_walking',
+            start_ts=self.start_time,
+            end_ts=self.end_time,
+            price_quote=Decimal('80.00')
+        )
+        pets = [
+            Pet.objects.create(owner=self.owner_profile, name=name, species='Dog', age=3)
+            for name in ('Rex', 'Fido')
+        ]
+        booking.pets.set(pets[:1])
+        serializer = BookingSerializer()
+        
+        serializer.update(booking, {'end_ts': self.start_time + timedelta(hours=2)})
+        self.assertEqual(booking.price_quote, Decimal('40.00'))
+        
+        serializer.update(booking, {'pets': pets})
+        self.assertEqual(booking.price_quote, Decimal('50.00'))
+        
+        # Status-only updates keep the quote
+        serializer.update(booking, {'status': 'confirmed'})
+        booking.refresh_from_db()
+        self.assertEqual(booking.price_quote, Decimal('50.00'))
+
+
 class BookingSignalTests(TestCase):
     """Test booking signals that update availability"""
     
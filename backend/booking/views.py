@@ -1,93 +1,157 @@
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from accounts.roles import role_profile
+from core.idempotency import IdempotentCreateMixin
+from core.throttling import ScopedTokenBucketThrottle
 from .models import Booking
-from .serializers import BookingSerializer
-from availability.models import AvailabilitySlot
+from .pagination import BookingCursorPagination
+from .serializers import BookingSerializer, QuoteRequestSerializer
+from . import services as booking_services
+from .pricing import quote_many
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = BookingCursorPagination
+
+    # Quotes are public and price many sitters per call, so they are rate limited
+    throttle_scope = "booking_quote"
+
+    def get_throttles(self):
+        if self.action == "quote":
+            return [ScopedTokenBucketThrottle()]
+        return super().get_throttles()
 
     def get_queryset(self):
         user = self.request.user
+        profile = role_profile(self.request)
         # Owners see only their bookings, sitters see only theirs
-        if user.role == "OWNER":
-            return Booking.objects.filter(owner=user.owner_profile)
+        if profile is None:
+            return Booking.objects.none()
+        elif user.role == "OWNER":
+            qs = Booking.objects.filter(owner=profile)
         elif user.role == "SITTER":
-            return Booking.objects.filter(sitter=user.sitter_profile)
-        return Booking.objects.none()
+            qs = Booking.objects.filter(sitter=profile)
+        else:
+            return Booking.objects.none()
+
+        qs = qs.select_related("owner__user", "sitter").prefetch_related("pets")
+        if self.action == "list":
+            qs = self._apply_filters(qs)
+        return qs
+
+    def _apply_filters(self, qs):
+        # Filters for the history view: /api/bookings/?status=confirmed&start_after=...
+        q = self.request.query_params
+
+        # Status filter; accepts a comma-separated list
+        status_param = q.get("status")
+        if status_param:
+            statuses = [s.strip() for s in status_param.split(",") if s.strip()]
+            valid = {choice for choice, _ in Booking.STATUS_CHOICES}
+            if not set(statuses) <= valid:
+                raise ValidationError({"status": "Invalid booking status."})
+            qs = qs.filter(status__in=statuses)
+
+        service_type = q.get("service_type")
+        if service_type:
+            qs = qs.filter(service_type=service_type)
+
+        # Start time window; start_after is inclusive, start_before exclusive
+        start_after = self._parse_ts_param("start_after")
+        if start_after is not None:
+            qs = qs.filter(start_ts__gte=start_after)
+
+        start_before = self._parse_ts_param("start_before")
+        if start_before is not None:
+            qs = qs.filter(start_ts__lt=start_before)
+
+        # Bookings still running at or after a moment (e.g. end_after=now for the active schedule)
+        end_after = self._parse_ts_param("end_after")
+        if end_after is not None:
+            qs = qs.filter(end_ts__gte=end_after)
+
+        return qs
+
+    def _parse_ts_param(self, name):
+        # Parse an ISO-8601 timestamp query param, rejecting malformed values
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        # parse_datetime returns None for malformed input and raises ValueError
+        # for well-formed but impossible values (e.g. month 13)
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: "Expected an ISO-8601 datetime."})
+        # Naive values are read in the server's time zone
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
 
     @transaction.atomic
     def perform_update(self, serializer):
-        # Handle booking status updates with permission checks
-        booking = self.get_object()
+        # Handle booking status updates with permission checks.
+        # The row is locked first and every check reads the locked copy, so
+        # concurrent updates (two confirms, confirm vs cancel) are decided one at a time
+        booking = booking_services.lock_booking(serializer.instance.pk, self.get_queryset())
+        serializer.instance = booking
         user = self.request.user
-        old_status = booking.status
+        profile = role_profile(self.request)
         new_status = serializer.validated_data.get("status")
 
         # Role-based permission checks
-        if user.role == "SITTER" and booking.sitter == user.sitter_profile:
+        if profile is None:
+            raise PermissionDenied("You cannot update this booking.")
+        elif user.role == "SITTER" and booking.sitter_id == profile.pk:
             if new_status not in ["confirmed", "completed", "canceled"]:
                 raise PermissionDenied("Sitter cannot set this status.")
-        elif user.role == "OWNER" and booking.owner == user.owner_profile:
+        elif user.role == "OWNER" and booking.owner_id == profile.pk:
             if new_status != "canceled":
                 raise PermissionDenied("Owner can only cancel the booking.")
         else:
             raise PermissionDenied("You cannot update this booking.")
 
+        # Reject transitions the booking lifecycle doesn't allow, and queue the
+        # availability slot update; the serializer writes the row
+        try:
+            booking_services.transition(booking, new_status, save=False)
+        except booking_services.InvalidTransition as exc:
+            raise ValidationError({"status": str(exc)})
+
         serializer.save()
-        # Update availability slots according to new status
-        self._update_availability_slots(booking, old_status, new_status)
 
     @transaction.atomic
     def perform_create(self, serializer):
-        # On booking creation, mark overlapping slots as booked if confirmed
+        # On booking creation, queue marking overlapping slots as booked if confirmed
         booking = serializer.save()
         if booking.status == 'confirmed':
-            self._mark_slots_as_booked(booking)
-
-    # ----------------- Internal helper methods ----------------- #
-
-    def _update_availability_slots(self, booking, old_status, new_status):
-        # Adjust availability slots when booking status changes
-        if old_status != new_status:
-            if new_status == 'confirmed' and old_status == 'requested':
-                self._mark_slots_as_booked(booking)
-            elif new_status in ['canceled', 'completed'] and old_status in ['requested', 'confirmed']:
-                self._mark_slots_as_open(booking)
-
-    def _mark_slots_as_booked(self, booking):
-        # Mark overlapping open slots as booked
-        overlapping_slots = AvailabilitySlot.objects.filter(
-            sitter=booking.sitter,
-            status='open',
-            start_ts__lt=booking.end_ts,
-            end_ts__gt=booking.start_ts
-        )
-        overlapping_slots.update(status='booked')
-
-    def _mark_slots_as_open(self, booking):
-        # Revert overlapping booked slots to open if no other bookings exist
-        overlapping_slots = AvailabilitySlot.objects.filter(
-            sitter=booking.sitter,
-            status='booked',
-            start_ts__lt=booking.end_ts,
-            end_ts__gt=booking.start_ts
-        )
+            booking_services.enqueue_slot_effects([booking.pk], 'confirmed')
 
-        for slot in overlapping_slots:
-            # Ensure no other booking occupies this slot before reopening
-            other_bookings = Booking.objects.filter(
-                sitter=booking.sitter,
-                status__in=['requested', 'confirmed'],
-                start_ts__lt=slot.end_ts,
-                end_ts__gt=slot.start_ts
-            ).exclude(pk=booking.pk)
-
-            if not other_bookings.exists():
-                slot.status = 'open'
-                slot.save()
+    @action(detail=False, methods=["post"], permission_classes=[AllowAny])
+    def quote(self, request):
+        # Price a booking request against one or many sitters in one call
+        # POST /api/bookings/quote/ {"sitters": [1, 2], "service_type": ..., "start_ts": ..., "end_ts": ..., "pet_count": 2}
+        serializer = QuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        quotes = quote_many(
+            data["sitters"], data["service_type"], data["start_ts"], data["end_ts"], data["pet_count"]
+        )
+        return Response({
+            "quotes": [
+                {"sitter_id": sitter_id, "price_quote": str(quotes[sitter_id])}
+                for sitter_id in dict.fromkeys(data["sitters"]) if sitter_id in quotes
+            ]
+        })
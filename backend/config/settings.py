@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework.authtoken",
     "corsheaders",
+    "core",
     "profiles.apps.ProfilesConfig",
     "accounts",
     "availability",
@@ -114,23 +115,112 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing (see accounts/hashers.py)
+# The first hasher hashes new passwords; the others only verify existing hashes,
+# which are upgraded to the first one on the user's next login. Move
+# TunedArgon2PasswordHasher to the top once argon2-cffi is installed.
+# Compare costs with `manage.py benchmark_password_hashers`.
+
+PASSWORD_HASHERS = [
+    "accounts.hashers.TunedScryptPasswordHasher",
+    "accounts.hashers.TunedArgon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+PASSWORD_HASHING = {
+    "SCRYPT": {"work_factor": 2**14, "block_size": 8, "parallelism": 1},
+    "ARGON2": {"time_cost": 2, "memory_cost": 65536, "parallelism": 1},  # memory_cost in KiB
+}
+
+# Failed logins for a username from one client IP before that client is locked
+# out of it (see accounts/lockout.py); LoginThrottle still limits each IP overall
+LOGIN_LOCKOUT = {
+    "MAX_FAILURES": 5,
+    "WINDOW_SECONDS": 60 * 15,
+    "LOCKOUT_SECONDS": 60 * 15,
+}
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication",
+        "accounts.authentication.CachedTokenAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
+    # Token-bucket rates per scope (see core/throttling.py): N requests per
+    # period, refilled continuously, so a client may burst up to N at once
+    "DEFAULT_THROTTLE_RATES": {
+        "login": "10/min",
+        "password_reset": "5/hour",
+        "register": "20/hour",
+        "message_post": "60/min",
+        "sitter_search": "120/min",
+        "booking_quote": "60/min",
+    },
+}
+
+# Where throttle buckets live: LocalBucketStore (per process) or
+# CacheBucketStore (the shared cache, for several workers)
+THROTTLING = {
+    "BACKEND": "core.throttling.LocalBucketStore",
+    "CACHE_ALIAS": "default",
 }
 
+# Short-lived access tokens authenticate from their claims alone; refresh tokens
+# rotate on every use and are revoked through accounts/tokens.py
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
-    "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    "ROTATE_REFRESH_TOKENS": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.RotatingTokenRefreshSerializer",
 }
 
 AUTH_USER_MODEL = "accounts.User"
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Process-local by default; point this at Redis/Memcached when running several workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pawsitter",
+    }
+}
+
+# Token lookups cached by accounts.authentication.CachedTokenAuthentication (seconds)
+TOKEN_AUTH_CACHE = {
+    "CACHE_ALIAS": "default",
+    "LOCAL_MAX_ENTRIES": 10000,
+    "LOCAL_TTL": 10,
+    "SHARED_TTL": 60,
+}
+
+# Stored responses for POSTs sent with an Idempotency-Key header (see core/idempotency.py)
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # seconds
+# A first request still running after this long is presumed dead and a retry may take its key over
+IDEMPOTENCY_IN_FLIGHT_TIMEOUT = 60  # seconds
+
+# Transactional outbox (see core/outbox.py); run `manage.py drain_outbox --loop` as a worker
+OUTBOX_MAX_ATTEMPTS = 5
+
+# Booking price quotes (see booking/pricing.py)
+BOOKING_PRICING = {
+    "EXTRA_PET_RATE": "0.25",  # surcharge per additional pet, fraction of base price
+    "RATE_CARD_TTL": 60 * 15,  # seconds a cached sitter rate card is kept
+}
+
+# Messaging event stream (see messaging/events.py); the local backend is per process
+MESSAGING_EVENTS = {
+    "BACKEND": "messaging.events.LocalEventBackend",
+    "KEEPALIVE_SECONDS": 15,  # comment line sent on idle streams so proxies keep them open
+    "QUEUE_SIZE": 100,  # events buffered per stream before the client is told to resync
+}
+
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5174",
@@ -19,7 +19,9 @@ from django.contrib import admin
 from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path, include
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
+from accounts.views import ThrottledTokenObtainPairView
+from core.views import throttle_stats_view
 from . import views
 
 urlpatterns = [
@@ -27,9 +29,12 @@ urlpatterns = [
     path("admin/", admin.site.urls),
 
     # auth (JWT)
-    path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("api/token/", ThrottledTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 
+    # Rejected requests per throttle scope (admin only)
+    path("api/throttle-stats/", throttle_stats_view, name="throttle-stats"),
+
     # All app APIs under /api/
     path("api/accounts/", include("accounts.urls")), # where /accounts/register/ lives
     path("api/profiles/", include("profiles.urls")),   # sitters viewset/router
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    # Lets staff inspect stuck or failed side effects
+    list_display = ("id", "topic", "status", "attempts", "available_at", "created_at")
+    list_filter = ("status", "topic")
+    readonly_fields = ("created_at",)
+    ordering = ["id"]
+    actions = ["retry_now"]
+
+    def retry_now(self, request, queryset):
+        # Put selected events back in the queue immediately
+        updated = queryset.update(status="pending", available_at=timezone.now())
+        self.message_user(request, f"{updated} event(s) queued for retry.")
+    retry_now.short_description = "Retry selected events now"
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+# How long a stored response can be replayed (seconds)
+DEFAULT_TTL = 60 * 60 * 24
+
+# How long a first request may run before a retry can take its key over (seconds)
+DEFAULT_IN_FLIGHT_TIMEOUT = 60
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", DEFAULT_TTL))
+
+
+def _in_flight_timeout():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_IN_FLIGHT_TIMEOUT", DEFAULT_IN_FLIGHT_TIMEOUT))
+
+
+def request_fingerprint(request):
+    # Hash of what the client asked for, so a reused key with a different body is caught
+    payload = request.data
+    if hasattr(payload, "lists"):
+        # QueryDict from form/multipart bodies
+        payload = dict(payload.lists())
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(json.dumps(payload, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class IdempotentCreateMixin:
+    # Mixin for DRF views with a create() handler (ModelViewSet, ListCreateAPIView, ...).
+    # A POST carrying an Idempotency-Key header runs once per user and key; retries
+    # within the TTL get the stored response back without re-running the view.
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return super().create(request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_fingerprint(request)
+        record, replay = self._claim_key(request.user, key, fingerprint)
+        if replay is not None:
+            return replay
+
+        # First time we see this key: run the view, then store what it returned.
+        # Every write is conditional on still holding the lease, so a request
+        # that overran it cannot clobber the retry that took the key over.
+        held = IdempotencyKey.objects.filter(pk=record.pk, in_flight_until=record.in_flight_until)
+        try:
+            response = super().create(request, *args, **kwargs)
+        except Exception:
+            held.delete()
+            raise
+
+        if response.status_code >= 500:
+            # Server errors are not final; let the client retry for real
+            held.delete()
+        else:
+            held.update(status_code=response.status_code, response_body=response.data, in_flight_until=None)
+        return response
+
+    def _claim_key(self, user, key, fingerprint):
+        # Returns (record, None) when this request owns the key,
+        # or (None, response) when a stored/conflict response should be sent instead
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    fingerprint=fingerprint,
+                    in_flight_until=now + _in_flight_timeout(),
+                    expires_at=now + _ttl(),
+                )
+            return record, None
+        except IntegrityError:
+            pass
+
+        existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if existing is None or existing.expires_at <= now:
+            # Expired (or purged in between): start over with a fresh record
+            IdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=now).delete()
+            return self._claim_key(user, key, fingerprint)
+
+        if existing.fingerprint != fingerprint:
+            return None, Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if existing.status_code is None:
+            if existing.in_flight_until is None or existing.in_flight_until <= now:
+                # The first request's lease ran out: take the key over, unless
+                # another retry just did
+                lease = now + _in_flight_timeout()
+                taken = IdempotencyKey.objects.filter(
+                    pk=existing.pk, status_code__isnull=True, in_flight_until=existing.in_flight_until
+                ).update(in_flight_until=lease, expires_at=now + _ttl())
+                if taken:
+                    existing.in_flight_until = lease
+                    return existing, None
+                return self._claim_key(user, key, fingerprint)
+
+            response = Response(
+                {"detail": "A request with this Idempotency-Key is still in progress."},
+                status=status.HTTP_409_CONFLICT,
+            )
+            response["Retry-After"] = str(math.ceil((existing.in_flight_until - now).total_seconds()))
+            return None, response
+
+        response = Response(existing.response_body, status=existing.status_code)
+        response["Idempotent-Replayed"] = "true"
+        return None, response
+
+
+def purge_expired_keys(batch_size=1000):
+    # Delete expired keys in bounded batches; returns the number removed
+    total = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,41 @@
+# core/management/commands/drain_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import drain_all
+
+
+class Command(BaseCommand):
+    help = 'Dispatches pending outbox events (booking slot updates, rating recalculation, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Events claimed per transaction (default: 100)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll for new events'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls when idle in --loop mode (default: 1)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            dispatched, errored = drain_all(batch_size=options['batch_size'])
+            if dispatched or errored or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Dispatched {dispatched} event(s), {errored} error(s)')
+                )
+            if not options['loop']:
+                return
+            if not (dispatched or errored):
+                time.sleep(options['sleep'])
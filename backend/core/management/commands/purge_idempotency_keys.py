@@ -0,0 +1,20 @@
+# core/management/commands/purge_idempotency_keys.py
+from django.core.management.base import BaseCommand
+
+from core.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired Idempotency-Key records in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per statement (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        removed = purge_expired_keys(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} expired idempotency key(s)'))
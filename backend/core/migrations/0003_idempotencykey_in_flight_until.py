@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_outboxevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="in_flight_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+# -----------------------------
+# IdempotencyKey model
+# -----------------------------
+class IdempotencyKey(models.Model):
+    # Client-supplied Idempotency-Key, scoped per user
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=255)
+    # Method + path + body hash of the first request; replays must match it
+    fingerprint = models.CharField(max_length=64)
+    # Cached first response; status_code is null while the first request is in flight
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    # Lease of the request in flight: past it, a retry may take the key over
+    # (the worker running it is presumed dead)
+    in_flight_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="uniq_idempotency_key_per_user"),
+        ]
+        # Index used by the purge command to find expired keys
+        indexes = [models.Index(fields=["expires_at"])]
+
+    def __str__(self):
+        return f"IdempotencyKey({self.user_id}, {self.key})"
+
+
+# -----------------------------
+# OutboxEvent model
+# -----------------------------
+class OutboxEvent(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("failed", "Failed"),
+    ]
+
+    # Handler name the event is dispatched to (see core/outbox.py)
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Earliest time the worker may pick the event up (pushed back on retry)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        # The worker only scans pending rows, so keep that index small
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"],
+                condition=models.Q(status="pending"),
+                name="outbox_pending_available",
+            ),
+        ]
+
+    def __str__(self):
+        return f"OutboxEvent #{self.pk} {self.topic} ({self.status})"
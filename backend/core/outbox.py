@@ -0,0 +1,90 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# topic -> handler(payload)
+_handlers = {}
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+
+def handler(topic):
+    # Decorator registering the function that processes events for topic
+    def register(func):
+        _handlers[topic] = func
+        return func
+    return register
+
+
+def enqueue(topic, payload):
+    # Record a side effect in the caller's transaction; it commits or rolls back with it
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def _max_attempts():
+    return getattr(settings, "OUTBOX_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+
+
+def _backoff(attempts):
+    # Exponential backoff between retries, capped at one hour
+    return timedelta(seconds=min(2 ** attempts, 3600))
+
+
+@transaction.atomic
+def drain(batch_size=100):
+    # Dispatch one batch of due events. Rows are claimed with SKIP LOCKED so several
+    # workers can drain in parallel. Handled events are deleted; failing ones are
+    # retried with backoff and parked as "failed" after OUTBOX_MAX_ATTEMPTS.
+    # Returns (dispatched, errored).
+    now = timezone.now()
+    events = list(
+        OutboxEvent.objects.filter(status="pending", available_at__lte=now)
+        .order_by("available_at", "id")
+        .select_for_update(skip_locked=True)[:batch_size]
+    )
+
+    done_ids, retry = [], []
+    for event in events:
+        func = _handlers.get(event.topic)
+        try:
+            if func is None:
+                raise LookupError(f"No outbox handler registered for {event.topic!r}")
+            # Savepoint per event so one failure doesn't undo the rest of the batch
+            with transaction.atomic():
+                func(event.payload)
+        except Exception as exc:
+            logger.exception("Outbox event %s (%s) failed", event.pk, event.topic)
+            event.attempts += 1
+            event.last_error = repr(exc)
+            event.available_at = now + _backoff(event.attempts)
+            if event.attempts >= _max_attempts():
+                event.status = "failed"
+            retry.append(event)
+        else:
+            done_ids.append(event.pk)
+
+    if done_ids:
+        OutboxEvent.objects.filter(pk__in=done_ids).delete()
+    if retry:
+        OutboxEvent.objects.bulk_update(retry, ["attempts", "last_error", "available_at", "status"])
+    return len(done_ids), len(retry)
+
+
+def drain_all(batch_size=100, max_batches=None):
+    # Keep draining until nothing due is left (or max_batches is hit)
+    dispatched = errored = batches = 0
+    while max_batches is None or batches < max_batches:
+        done, failed = drain(batch_size)
+        dispatched += done
+        errored += failed
+        batches += 1
+        if done + failed < batch_size:
+            break
+    return dispatched, errored
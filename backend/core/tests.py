@@ -0,0 +1,241 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import outbox, throttling
+from core.models import IdempotencyKey, OutboxEvent
+from messaging.models import MessageThread, Message
+
+User = get_user_model()
+
+
+class IdempotencyKeyTests(TestCase):
+    """Test Idempotency-Key handling on create endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user_a = User.objects.create_user(username="a", email="a@example.com", password="pass123")
+        self.user_b = User.objects.create_user(username="b", email="b@example.com", password="pass123")
+        self.thread = MessageThread.objects.create(user_a=self.user_a, user_b=self.user_b)
+        self.url = reverse("thread-messages", kwargs={"pk": self.thread.id})
+        self.client.force_authenticate(user=self.user_a)
+
+    def test_replay_returns_first_response_without_duplicate(self):
+        """Test a retried POST returns the stored response and creates nothing"""
+        first = self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        second = self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data["id"], first.data["id"])
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Message.objects.count(), 1)
+
+    def test_key_reused_with_different_body_rejected(self):
+        """Test reusing a key for a different payload returns 422"""
+        self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        res = self.client.post(self.url, {"body": "other"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Message.objects.count(), 1)
+
+    def test_keys_are_scoped_per_user(self):
+        """Test two users can use the same key independently"""
+        self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.client.force_authenticate(user=self.user_b)
+        res = self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Message.objects.count(), 2)
+
+    def test_expired_key_runs_again(self):
+        """Test a key past its TTL is treated as new"""
+        self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        res = self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Message.objects.count(), 2)
+
+    def test_in_flight_key_conflicts_until_its_lease_runs_out(self):
+        """Test a retry gets 409 while the first request holds the key, then takes it over"""
+        first = self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        # Rewind the key to "first request still running"
+        now = timezone.now()
+        IdempotencyKey.objects.update(status_code=None, response_body=None, in_flight_until=now + timedelta(seconds=30))
+
+        res = self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertTrue(29 <= int(res["Retry-After"]) <= 30)
+
+        # Its worker died: once the lease has passed, the retry runs and its response is stored
+        IdempotencyKey.objects.update(in_flight_until=now - timedelta(seconds=1))
+        res = self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(res.data["id"], first.data["id"])
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(record.in_flight_until)
+
+        replay = self.client.post(self.url, {"body": "hi"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(replay.data["id"], res.data["id"])
+
+    def test_purge_command_removes_expired_keys(self):
+        """Test purge_idempotency_keys deletes only expired rows"""
+        now = timezone.now()
+        IdempotencyKey.objects.create(user=self.user_a, key="old", fingerprint="x", expires_at=now - timedelta(hours=1))
+        IdempotencyKey.objects.create(user=self.user_a, key="new", fingerprint="x", expires_at=now + timedelta(hours=1))
+
+        out = StringIO()
+        call_command("purge_idempotency_keys", stdout=out)
+        self.assertIn("Removed 1", out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
+
+
+class OutboxTests(TestCase):
+    """Test outbox enqueue/drain and retry behaviour"""
+
+    def setUp(self):
+        self.calls = []
+        outbox.handler("test.ok")(self.calls.append)
+        outbox.handler("test.fail")(self._fail)
+
+    def _fail(self, payload):
+        raise RuntimeError("boom")
+
+    def test_drain_dispatches_and_deletes(self):
+        """Test handled events run once and are removed"""
+        outbox.enqueue("test.ok", {"n": 1})
+        outbox.enqueue("test.ok", {"n": 2})
+
+        self.assertEqual(outbox.drain_all(), (2, 0))
+        self.assertEqual(self.calls, [{"n": 1}, {"n": 2}])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failing_event_retried_then_parked(self):
+        """Test failures back off and end up failed after max attempts"""
+        event = outbox.enqueue("test.fail", {})
+        outbox.enqueue("test.ok", {"n": 1})
+
+        self.assertEqual(outbox.drain_all(), (1, 1))
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.status, "pending")
+        self.assertGreater(event.available_at, timezone.now())
+
+        # Not due yet, so nothing is picked up
+        self.assertEqual(outbox.drain_all(), (0, 0))
+
+        with self.settings(OUTBOX_MAX_ATTEMPTS=2):
+            OutboxEvent.objects.update(available_at=timezone.now())
+            outbox.drain_all()
+        event.refresh_from_db()
+        self.assertEqual(event.status, "failed")
+        self.assertIn("boom", event.last_error)
+
+    def test_drain_command(self):
+        """Test drain_outbox reports what it dispatched"""
+        outbox.enqueue("test.ok", {})
+        out = StringIO()
+        call_command("drain_outbox", stdout=out)
+        self.assertIn("Dispatched 1 event(s), 0 error(s)", out.getvalue())
+
+
+THROTTLE_RATES = {
+    "login": "2/min",
+    "password_reset": "5/hour",
+    "register": "20/hour",
+    "message_post": "3/min",
+    "sitter_search": "120/min",
+    "booking_quote": "2/min",
+}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": THROTTLE_RATES})
+class ThrottlingTests(TestCase):
+    """Test token-bucket throttling of the scoped endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        throttling.get_store().reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="throttled", email="t@example.com", password="pass123")
+        self.other = User.objects.create_user(username="other", email="o@example.com", password="pass123")
+
+    def login(self):
+        return self.client.post("/api/accounts/login/", {"username": "throttled", "password": "wrong"})
+
+    def test_bucket_refills_continuously(self):
+        """Test the bucket arithmetic: bursts up to capacity, then one token per refill interval"""
+        state = None
+        for _ in range(2):
+            state, wait = throttling.take_token(state, 2, 1 / 30, now=100.0)
+            self.assertEqual(wait, 0)
+        state, wait = throttling.take_token(state, 2, 1 / 30, now=100.0)
+        self.assertAlmostEqual(wait, 30.0)
+        state, wait = throttling.take_token(state, 2, 1 / 30, now=115.0)
+        self.assertAlmostEqual(wait, 15.0)
+        state, wait = throttling.take_token(state, 2, 1 / 30, now=130.0)
+        self.assertEqual(wait, 0)
+
+    def test_login_is_rejected_with_retry_after(self):
+        """Test that the login scope returns 429 with Retry-After once its bucket is empty"""
+        self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(29 <= int(response["Retry-After"]) <= 30)
+        self.assertEqual(throttling.rejection_counts()["login"], 1)
+
+    def test_token_endpoint_shares_the_login_bucket(self):
+        """Test that /api/token/ is throttled with login_view, not beside it"""
+        self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post("/api/token/", {"username": "throttled", "password": "wrong"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post("/api/token/", {"username": "throttled", "password": "wrong"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_booking_quotes_are_limited(self):
+        """Test that the public quote endpoint has its own bucket"""
+        codes = [self.client.post("/api/bookings/quote/", {}, format="json").status_code for _ in range(3)]
+        self.assertEqual(codes, [400, 400, 429])
+        self.assertEqual(throttling.rejection_counts()["booking_quote"], 1)
+
+    def test_message_posts_are_limited_per_user(self):
+        """Test that posting is limited per user while reading the thread is not"""
+        thread = MessageThread.objects.create(user_a=self.user, user_b=self.other)
+        url = reverse("thread-messages", kwargs={"pk": thread.id})
+        self.client.force_authenticate(user=self.user)
+        codes = [self.client.post(url, {"body": f"m{i}"}, format="json").status_code for i in range(4)]
+        self.assertEqual(codes, [201, 201, 201, 429])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.post(url, {"body": "hi"}, format="json").status_code, 201)
+
+    @override_settings(THROTTLING={"BACKEND": "core.throttling.CacheBucketStore"})
+    def test_shared_cache_backend(self):
+        """Test that the shared-cache store enforces the same limits and counts rejections"""
+        self.assertIsInstance(throttling.get_store(), throttling.CacheBucketStore)
+        codes = [self.login().status_code for _ in range(3)]
+        self.assertEqual(codes, [400, 400, 429])
+        self.assertEqual(throttling.rejection_counts()["login"], 1)
+
+    def test_stats_endpoint_is_admin_only(self):
+        """Test that rejection counters are exposed to admins"""
+        for _ in range(3):
+            self.login()
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get("/api/throttle-stats/").status_code, status.HTTP_403_FORBIDDEN)
+        admin = User.objects.create_superuser(username="admin", email="a@example.com", password="adminpass123")
+        self.client.force_authenticate(user=admin)
+        response = self.client.get("/api/throttle-stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rejected"]["login"], 1)
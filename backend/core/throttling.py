@@ -0,0 +1,174 @@
+# Token-bucket throttling for DRF views: one O(1) bucket per (scope, client),
+# kept in THROTTLING["BACKEND"] (this process, or the shared cache)
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "BACKEND": "core.throttling.LocalBucketStore",
+    "CACHE_ALIAS": "default",
+    "MAX_LOCAL_BUCKETS": 100000,
+}
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 60 * 60 * 24}
+
+
+def get_setting(name):
+    return getattr(settings, "THROTTLING", {}).get(name, DEFAULTS[name])
+
+
+def parse_rate(rate):
+    # "10/min" -> (capacity 10, refill 10/60 tokens per second)
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def take_token(state, capacity, refill_rate, now):
+    # Refill state ((tokens, updated_at), or None for a full bucket) and spend
+    # one token. Returns (new_state, seconds to wait, 0 if allowed)
+    tokens, updated_at = state or (capacity, now)
+    tokens = min(capacity, tokens + max(now - updated_at, 0) * refill_rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / refill_rate
+
+
+class LocalBucketStore:
+    # Buckets in process memory, least recently used evicted past MAX_LOCAL_BUCKETS
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self._rejections = {}
+
+    def consume(self, key, capacity, refill_rate):
+        with self._lock:
+            state, wait = take_token(self._buckets.get(key), capacity, refill_rate, time.monotonic())
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > get_setting("MAX_LOCAL_BUCKETS"):
+                self._buckets.popitem(last=False)
+        return wait
+
+    def record_rejection(self, scope):
+        with self._lock:
+            self._rejections[scope] = self._rejections.get(scope, 0) + 1
+
+    def rejection_counts(self, scopes):
+        with self._lock:
+            return {scope: self._rejections.get(scope, 0) for scope in scopes}
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._rejections.clear()
+
+
+class CacheBucketStore:
+    # Buckets in the shared cache, expiring once full again. The update is not
+    # atomic across workers, so simultaneous requests may slip a token past the limit
+    def __init__(self):
+        self.cache = caches[get_setting("CACHE_ALIAS")]
+
+    def consume(self, key, capacity, refill_rate):
+        # Wall-clock time: every worker has to agree on it
+        state, wait = take_token(self.cache.get(key), capacity, refill_rate, time.time())
+        self.cache.set(key, state, int(capacity / refill_rate) + 1)
+        return wait
+
+    def record_rejection(self, scope):
+        key = f"throttle:rejected:{scope}"
+        # add() then incr() so the first rejection creates the counter without a race
+        self.cache.add(key, 0, None)
+        self.cache.incr(key)
+
+    def rejection_counts(self, scopes):
+        keys = {f"throttle:rejected:{scope}": scope for scope in scopes}
+        found = self.cache.get_many(list(keys))
+        return {scope: found.get(key, 0) for key, scope in keys.items()}
+
+    def reset(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(get_setting("BACKEND"))()
+    return _store
+
+
+def reset_store():
+    # Drop the configured store (e.g. after settings change in tests)
+    global _store
+    with _store_lock:
+        _store = None
+
+
+@receiver(setting_changed)
+def _reload_store(*, setting, **kwargs):
+    if setting == "THROTTLING":
+        reset_store()
+
+
+def rejection_counts():
+    # {scope: rejected requests} for every configured scope
+    return get_store().rejection_counts(sorted(api_settings.DEFAULT_THROTTLE_RATES))
+
+
+class TokenBucketThrottle(BaseThrottle):
+    # One scope per client (user id, else client address); subclasses set scope
+    scope = None
+
+    def get_rate(self, view):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return f"throttle:{self.scope}:{ident}"
+
+    def allow_request(self, request, view):
+        rate = self.get_rate(view)
+        if rate is None:
+            return True
+
+        capacity, refill_rate = parse_rate(rate)
+        store = get_store()
+        self._wait = store.consume(self.get_cache_key(request, view), capacity, refill_rate)
+        if self._wait:
+            store.record_rejection(self.scope)
+            logger.info("Throttled %s request to %s (scope %s)", request.method, request.path, self.scope)
+            return False
+        return True
+
+    def wait(self):
+        return getattr(self, "_wait", None)
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    # Takes its scope from the view's throttle_scope, like DRF's ScopedRateThrottle
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scope", None)
+        if self.scope is None:
+            return True
+        return super().allow_request(request, view)
@@ -0,0 +1,12 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .throttling import rejection_counts
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def throttle_stats_view(request):
+    # Requests rejected per throttle scope (per process with the local backend)
+    return Response({"rejected": rejection_counts()})
@@ -18,7 +18,8 @@ class MessageThreadAdmin(admin.ModelAdmin):
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ("id", "thread", "sender", "body_preview", "created_at", "is_read")  # columns to show
-    list_filter = ("created_at", "read_at")  # filter sidebar
+    list_filter = ("created_at",)  # filter sidebar
+    list_select_related = ("thread", "sender")  # read status is derived from the thread's watermarks
     search_fields = ("sender__email", "body")  # search by sender email or message content
     readonly_fields = ("created_at", "thread", "sender")  # cannot edit timestamps, thread, sender
 
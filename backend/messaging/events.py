@@ -0,0 +1,99 @@
+# Per-user event bus behind the messaging event stream; the backend is set by
+# MESSAGING_EVENTS["BACKEND"] (LocalEventBackend is one process only)
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "BACKEND": "messaging.events.LocalEventBackend",
+    "KEEPALIVE_SECONDS": 15,
+    "QUEUE_SIZE": 100,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "MESSAGING_EVENTS", {}).get(name, DEFAULTS[name])
+
+
+class Subscription:
+    # One open stream's queue; lives on the event loop that serves the stream
+    def __init__(self, backend, user_id, loop, maxsize):
+        self.backend = backend
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event):
+        # Runs on the subscriber's loop. A client too slow to keep up gets its
+        # backlog replaced by one "resync" event and refetches with ?since_id=
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class LocalEventBackend:
+    # In-process fan-out: publishers may be any thread, subscribers are asyncio tasks
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        sub = Subscription(self, user_id, asyncio.get_running_loop(), get_setting("QUEUE_SIZE"))
+        with self._lock:
+            self._subscriptions[user_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscriptions.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscriptions[sub.user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subs = list(self._subscriptions.get(user_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:
+                # The stream's loop has shut down; drop the stale subscription
+                self.unsubscribe(sub)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(get_setting("BACKEND"))()
+    return _backend
+
+
+def publish(user_id, event):
+    # Never let a broken bus fail the request that triggered the event;
+    # clients recover anything they miss through ?since_id= sync
+    try:
+        get_backend().publish(user_id, event)
+    except Exception:
+        logger.exception("Failed to publish %s event to user %s", event.get("type"), user_id)
@@ -0,0 +1,69 @@
+# messaging/management/commands/message_partitions.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from messaging import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Maintains the monthly partitions of the messages table: creates the '
+        'current and upcoming months (and any month stranded in the default '
+        'partition), detaches months older than the retention window and '
+        'optionally archives detached months into a compressed cold table. '
+        'Run it daily or monthly (e.g. from cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Create partitions this many months past the current one (default: 3)'
+        )
+        parser.add_argument(
+            '--retain-months',
+            type=int,
+            default=None,
+            help='Detach partitions older than this many months (default: keep everything)'
+        )
+        parser.add_argument(
+            '--archive',
+            action='store_true',
+            help=f'Move detached months into {partitions.ARCHIVE_TABLE} and drop them'
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError('The messages table is not partitioned (PostgreSQL only, see migration 0009).')
+
+        current = partitions.month_start(timezone.now())
+        attached = partitions.attached_partitions()
+
+        # Upcoming months, plus any month whose rows landed in the default partition
+        wanted = {partitions.add_months(current, n) for n in range(options['months_ahead'] + 1)}
+        wanted.update(partitions.default_partition_months())
+        for month in sorted(wanted - attached.keys()):
+            attached[month] = partitions.create_partition(month)
+            self.stdout.write(f'Created {attached[month]}')
+
+        if options['retain_months'] is not None:
+            cutoff = partitions.add_months(current, -options['retain_months'])
+            for month, name in sorted(attached.items()):
+                if month < cutoff:
+                    partitions.detach_partition(name)
+                    self.stdout.write(f'Detached {name}')
+
+        archived = 0
+        if options['archive']:
+            for name in partitions.detached_partitions():
+                moved = partitions.archive_partition(name)
+                archived += moved
+                self.stdout.write(f'Archived {name} ({moved} message(s))')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{len(partitions.attached_partitions())} monthly partition(s) attached, '
+                f'{archived} message(s) archived'
+            )
+        )
@@ -0,0 +1,39 @@
+# messaging/management/commands/reconcile_unread.py
+from django.core.management.base import BaseCommand
+
+from messaging.unread import recalculate_unread
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes each thread's user_a_unread/user_b_unread from the read "
+        "watermarks and each participant's inbox unread_total from those, one "
+        "batch of threads per transaction, fixing drift left by bulk deletes, "
+        "raw SQL or archived message partitions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--thread',
+            type=int,
+            action='append',
+            dest='thread_ids',
+            help='Only reconcile this thread id (repeatable)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Threads recalculated per transaction (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        corrected = recalculate_unread(
+            options['thread_ids'],
+            batch_size=options['batch_size'],
+            progress=self.report_progress if options['verbosity'] >= 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Corrected unread counts for {corrected} thread(s)'))
+
+    def report_progress(self, done, total, corrected):
+        self.stdout.write(f'  {done}/{total} thread(s) processed, {corrected} corrected')
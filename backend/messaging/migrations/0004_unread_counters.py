@@ -0,0 +1,90 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counters(apps, schema_editor):
+    # Set-based backfill: one UPDATE for thread counters, one INSERT for inbox totals
+    MessageThread = apps.get_model("messaging", "MessageThread")
+    Message = apps.get_model("messaging", "Message")
+    InboxState = apps.get_model("messaging", "InboxState")
+
+    def unread_from(sender_field):
+        # Unread messages in the thread sent by the participant in sender_field
+        return Coalesce(
+            Subquery(
+                Message.objects.filter(
+                    thread=OuterRef("pk"),
+                    read_at__isnull=True,
+                    sender=OuterRef(sender_field),
+                )
+                .values("thread")
+                .annotate(c=Count("pk"))
+                .values("c")
+            ),
+            Value(0),
+        )
+
+    MessageThread.objects.update(
+        user_a_unread=unread_from("user_b"),
+        user_b_unread=unread_from("user_a"),
+    )
+
+    totals = {}
+    rows = MessageThread.objects.filter(Q(user_a_unread__gt=0) | Q(user_b_unread__gt=0))
+    for user_field, count_field in (("user_a", "user_a_unread"), ("user_b", "user_b_unread")):
+        grouped = rows.values(user_field).annotate(total=Sum(count_field)).values_list(user_field, "total")
+        for user_id, total in grouped:
+            totals[user_id] = totals.get(user_id, 0) + total
+    InboxState.objects.bulk_create(
+        [InboxState(user_id=user_id, unread_total=total) for user_id, total in totals.items() if total]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0003_messagethread_different_participants"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="messagethread",
+            name="user_a_unread",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="messagethread",
+            name="user_b_unread",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="InboxState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("unread_total", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inbox_state",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_last_activity(apps, schema_editor):
+    # One UPDATE: point each thread at its newest message, falling back to created_at
+    MessageThread = apps.get_model("messaging", "MessageThread")
+    Message = apps.get_model("messaging", "Message")
+    newest = Message.objects.filter(thread=OuterRef("pk")).order_by("-created_at", "-pk")
+    MessageThread.objects.update(
+        last_message_id=Subquery(newest.values("pk")[:1]),
+        last_message_at=Coalesce(Subquery(newest.values("created_at")[:1]), F("created_at")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0005_booking_expired_status_sweep_indexes"),
+        ("messaging", "0004_unread_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="messagethread",
+            name="last_message",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="messaging.message",
+            ),
+        ),
+        migrations.AddField(
+            model_name="messagethread",
+            name="last_message_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_last_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="messagethread",
+            index=models.Index(
+                fields=["user_a", "-last_message_at"], name="thread_user_a_activity"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="messagethread",
+            index=models.Index(
+                fields=["user_b", "-last_message_at"], name="thread_user_b_activity"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0005_thread_last_activity"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["thread", "id"], name="message_thread_id"),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:56
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_read_watermarks(apps, schema_editor):
+    # One UPDATE: each participant's watermark is the newest message they had read
+    MessageThread = apps.get_model("messaging", "MessageThread")
+    Message = apps.get_model("messaging", "Message")
+
+    def read_from(sender_field):
+        # Read messages in the thread sent by the participant in sender_field
+        return Message.objects.filter(
+            thread=OuterRef("pk"), read_at__isnull=False, sender=OuterRef(sender_field)
+        )
+
+    MessageThread.objects.update(
+        user_a_last_read_message_id=Coalesce(
+            Subquery(read_from("user_b").order_by("-pk").values("pk")[:1]), Value(0)
+        ),
+        user_a_last_read_at=Subquery(read_from("user_b").order_by("-read_at").values("read_at")[:1]),
+        user_b_last_read_message_id=Coalesce(
+            Subquery(read_from("user_a").order_by("-pk").values("pk")[:1]), Value(0)
+        ),
+        user_b_last_read_at=Subquery(read_from("user_a").order_by("-read_at").values("read_at")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0006_message_thread_id_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="messagethread",
+            name="user_a_last_read_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="messagethread",
+            name="user_a_last_read_message_id",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="messagethread",
+            name="user_b_last_read_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="messagethread",
+            name="user_b_last_read_message_id",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_read_watermarks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="message",
+            name="read_at",
+        ),
+    ]
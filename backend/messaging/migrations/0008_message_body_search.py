@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:02
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0007_read_watermarks"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector("body", config="english"),
+                name="message_body_search",
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COLUMNS = "id, body, created_at, sender_id, thread_id"
+
+
+def _rebuild_message_table(connection, partitioned):
+    # Swap messaging_message for a partitioned (or, in reverse, a plain) copy of itself,
+    # keeping rows, ids, index names and foreign keys so the ORM state is unchanged.
+    # A partitioned table's primary key must include the partition key: (id, created_at).
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() "
+            "AND tablename = 'messaging_message' AND indexname <> 'messaging_message_pkey'"
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'messaging_message'::regclass AND contype = 'f'"
+        )
+        foreign_keys = cursor.fetchall()
+
+        if partitioned:
+            primary_key, partitioning = "PRIMARY KEY (id, created_at)", "PARTITION BY RANGE (created_at)"
+        else:
+            primary_key, partitioning = "PRIMARY KEY (id)", ""
+        cursor.execute(
+            f"""
+            CREATE TABLE messaging_message_new (
+                id bigint GENERATED BY DEFAULT AS IDENTITY,
+                body text NOT NULL,
+                created_at timestamp with time zone NOT NULL,
+                sender_id bigint NOT NULL,
+                thread_id bigint NOT NULL,
+                CONSTRAINT messaging_message_pkey_new {primary_key}
+            ) {partitioning}
+            """
+        )
+        if partitioned:
+            # Catch-all until `manage.py message_partitions` splits rows out into months
+            cursor.execute("CREATE TABLE messaging_message_default PARTITION OF messaging_message_new DEFAULT")
+
+        cursor.execute(f"INSERT INTO messaging_message_new ({COLUMNS}) SELECT {COLUMNS} FROM messaging_message")
+        cursor.execute("DROP TABLE messaging_message CASCADE")
+        cursor.execute("ALTER TABLE messaging_message_new RENAME TO messaging_message")
+        cursor.execute("ALTER TABLE messaging_message RENAME CONSTRAINT messaging_message_pkey_new TO messaging_message_pkey")
+        cursor.execute("ALTER SEQUENCE messaging_message_new_id_seq RENAME TO messaging_message_id_seq")
+        cursor.execute(
+            "SELECT setval('messaging_message_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM messaging_message"
+        )
+        for indexdef in indexes:
+            cursor.execute(indexdef)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE messaging_message ADD CONSTRAINT "{name}" {definition}')
+
+
+def partition_messages(apps, schema_editor):
+    _rebuild_message_table(schema_editor.connection, partitioned=True)
+
+
+def unpartition_messages(apps, schema_editor):
+    _rebuild_message_table(schema_editor.connection, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0008_message_body_search"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="messagethread",
+            name="last_message",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="messaging.message",
+            ),
+        ),
+        migrations.RunPython(partition_messages, unpartition_messages),
+    ]
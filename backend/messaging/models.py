@@ -1,4 +1,6 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from django.db.models import Q
 from django.utils import timezone
@@ -20,6 +22,21 @@ class MessageThread(models.Model):
     user_b = models.ForeignKey(User, on_delete=models.CASCADE, related_name="threads_as_b")
     # Timestamp when the thread was created
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized unread message counts for each participant (see messaging/signals.py)
+    user_a_unread = models.IntegerField(default=0)
+    user_b_unread = models.IntegerField(default=0)
+    # Denormalized latest activity, maintained on message insert; drives inbox ordering
+    # No DB constraint: messages are partitioned by month, and old months may be archived
+    last_message = models.ForeignKey(
+        "Message", on_delete=models.SET_NULL, null=True, blank=True, related_name="+", db_constraint=False
+    )
+    last_message_at = models.DateTimeField(default=timezone.now)
+    # Read watermarks: each participant has read every message up to this id
+    # Marking a thread read moves the watermark instead of touching message rows
+    user_a_last_read_message_id = models.BigIntegerField(default=0)
+    user_a_last_read_at = models.DateTimeField(null=True, blank=True)
+    user_b_last_read_message_id = models.BigIntegerField(default=0)
+    user_b_last_read_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         constraints = [
@@ -37,8 +54,13 @@ class MessageThread(models.Model):
                 name='different_participants'
             )
         ]
-        # Index on created_at for faster ordering / queries
-        indexes = [models.Index(fields=["created_at"])]
+        indexes = [
+            # Index on created_at for faster ordering / queries
+            models.Index(fields=["created_at"]),
+            # Inbox listing: a participant's threads by latest activity
+            models.Index(fields=["user_a", "-last_message_at"], name="thread_user_a_activity"),
+            models.Index(fields=["user_b", "-last_message_at"], name="thread_user_b_activity"),
+        ]
 
     def save(self, *args, **kwargs):
         # Ensure user_a_id is always less than user_b_id to maintain consistency
@@ -50,10 +72,32 @@ class MessageThread(models.Model):
         # Display thread ID and participants
         return f"Thread #{self.pk} ({self.user_a} ↔ {self.user_b})"
 
+    def participant_prefix(self, user_id):
+        # Column prefix ("user_a"/"user_b") of user_id's per-participant fields
+        return "user_a" if user_id == self.user_a_id else "user_b"
+
+    def other_participant_id(self, user_id):
+        return self.user_b_id if user_id == self.user_a_id else self.user_a_id
+
+    def unread_field_for(self, user_id):
+        # Name of the unread counter column belonging to user_id
+        return f"{self.participant_prefix(user_id)}_unread"
+
+    def unread_count_for(self, user_id):
+        return getattr(self, self.unread_field_for(user_id))
+
+    def last_read_for(self, user_id):
+        # (watermark message id, when it was last moved) for user_id
+        prefix = self.participant_prefix(user_id)
+        return getattr(self, f"{prefix}_last_read_message_id"), getattr(self, f"{prefix}_last_read_at")
+
 
 # -----------------------------
 # Message model
 # -----------------------------
+# On PostgreSQL the table is range-partitioned by created_at, one partition per
+# month (migration 0009); `manage.py message_partitions` creates upcoming months
+# and detaches or archives old ones. The ORM sees one ordinary table.
 class Message(models.Model):
     # Link message to its thread
     thread = models.ForeignKey(MessageThread, on_delete=models.CASCADE, related_name="messages")
@@ -63,15 +107,37 @@ class Message(models.Model):
     body = models.TextField()
     # Timestamp when message was created
     created_at = models.DateTimeField(auto_now_add=True)
-    # Timestamp when message was read; null if unread
-    read_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         # Order messages chronologically
         ordering = ["created_at"]
         # Index to speed up queries filtering by thread and creation time
-        indexes = [models.Index(fields=["thread", "created_at"])]
+        # (thread, id) serves ?since_id= incremental sync
+        # GIN over the body's tsvector serves message search (see messaging/search.py)
+        indexes = [
+            models.Index(fields=["thread", "created_at"]),
+            models.Index(fields=["thread", "id"], name="message_thread_id"),
+            GinIndex(SearchVector("body", config="english"), name="message_body_search"),
+        ]
 
     def __str__(self):
         # Short display for message
         return f"Msg({self.sender}) in T{self.thread_id}: {self.body[:30]}"
+
+    @property
+    def read_at(self):
+        # Derived from the recipient's read watermark on the thread; null if unread
+        last_read_id, last_read_at = self.thread.last_read_for(self.thread.other_participant_id(self.sender_id))
+        return last_read_at if self.pk <= last_read_id else None
+
+
+# -----------------------------
+# InboxState model
+# -----------------------------
+class InboxState(models.Model):
+    # Per-user total of unread messages across all threads, for cheap badge polling
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="inbox_state")
+    unread_total = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Inbox({self.user_id}): {self.unread_total} unread"
@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+
+
+class MessageCursorPagination(CursorPagination):
+    # Keyset pagination that walks a thread backwards from its newest message
+    # Rides the (thread, created_at) index, so each page costs O(page_size)
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "-created_at"
+
+    # Pages are fetched newest-first but returned oldest-first for display
+    # `next` points at older history, `previous` back towards the present
+    def get_paginated_response(self, data):
+        return super().get_paginated_response(list(reversed(data)))
+
+
+class MessageSearchPagination(CursorPagination):
+    # Search hits, most recent first
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-created_at"
@@ -0,0 +1,131 @@
+# Monthly range partitions of messaging_message (PostgreSQL only, migration 0009):
+# create months, detach months past retention and archive detached ones
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import DatabaseError, connection, transaction
+
+PARENT = "messaging_message"
+DEFAULT_PARTITION = "messaging_message_default"
+ARCHIVE_TABLE = "messaging_message_archive"
+_PARTITION_NAME = re.compile(r"^messaging_message_p(\d{4})_(\d{2})$")
+
+
+def month_start(value):
+    # First instant (UTC) of the month containing value
+    return value.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + years, month=month_index + 1)
+
+
+def partition_name(month):
+    return f"{PARENT}_p{month:%Y_%m}"
+
+
+def _month_from_name(name):
+    match = _PARTITION_NAME.match(name)
+    if match:
+        return datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)
+    return None
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [PARENT])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def attached_partitions():
+    # {month: table name} for the month partitions currently attached to the parent
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [PARENT],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return {month: name for name in names if (month := _month_from_name(name))}
+
+
+def detached_partitions():
+    # Month tables left standalone by an earlier detach, not yet archived
+    attached = set(attached_partitions().values())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() AND tablename LIKE %s",
+            [f"{PARENT}\\_p%"],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return sorted(name for name in names if _month_from_name(name) and name not in attached)
+
+
+def default_partition_months():
+    # Months that currently have rows sitting in the default partition
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM {DEFAULT_PARTITION}"
+        )
+        return sorted(row[0].replace(tzinfo=dt_timezone.utc) for row in cursor.fetchall())
+
+
+@transaction.atomic
+def create_partition(month):
+    # Build the month as a standalone table, move its rows out of the default
+    # partition, then attach it. The default partition is locked first, so no
+    # insert can land a row for this month there between the move and the
+    # attach (which would make the attach fail); inserts wait until commit.
+    name, start, end = partition_name(month), month, add_months(month, 1)
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [start, end])
+    return name
+
+
+@transaction.atomic
+def detach_partition(name):
+    # The table stays as-is, out of reach of the application, until archived or
+    # dropped: its messages leave thread history, sync and search
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+
+
+def ensure_archive_table():
+    # One cold table for all archived months. toast_tuple_target makes Postgres
+    # compress (and move out of line) even short message bodies; lz4 is used
+    # when the server was built with it, otherwise the default pglz.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (LIKE {PARENT} INCLUDING DEFAULTS) "
+            "WITH (toast_tuple_target = 128)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {ARCHIVE_TABLE}_thread_created ON {ARCHIVE_TABLE} (thread_id, created_at)"
+        )
+        try:
+            with transaction.atomic():
+                cursor.execute(f"ALTER TABLE {ARCHIVE_TABLE} ALTER COLUMN body SET COMPRESSION lz4")
+        except DatabaseError:
+            pass
+
+
+@transaction.atomic
+def archive_partition(name):
+    # Move a detached month into the archive table and drop it; returns rows moved
+    ensure_archive_table()
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {ARCHIVE_TABLE} SELECT * FROM {name}")
+        moved = cursor.rowcount
+        cursor.execute(f"DROP TABLE {name}")
+    return moved
@@ -10,5 +10,5 @@ class IsThreadParticipant(BasePermission):
         # Determine the thread object: obj is thread if it has user_a, else it's a message
         thread = obj if hasattr(obj, "user_a") else obj.thread
 
-        # Allow access only if user is one of the participants
-        return user == thread.user_a or user == thread.user_b
+        # Allow access only if user is one of the participants (ids only, no user rows loaded)
+        return user.id in (thread.user_a_id, thread.user_b_id)
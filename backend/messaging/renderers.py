@@ -0,0 +1,14 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    # Lets clients negotiate Accept: text/event-stream for the event stream.
+    # The stream itself bypasses rendering; this only renders error bodies.
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
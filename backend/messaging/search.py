@@ -0,0 +1,39 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchVector
+from django.db.models import Q
+
+from .models import Message
+
+# Text search configuration; must match the expression indexed by message_body_search
+SEARCH_CONFIG = "english"
+
+# Snippet highlight markers. Control characters never appear in message text,
+# so the serializer can HTML-escape the snippet and then swap in <mark> tags.
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+
+def body_search_vector():
+    # Same expression as the GIN index in Message.Meta, so the planner can use it
+    return SearchVector("body", config=SEARCH_CONFIG)
+
+
+def search_messages(user, text):
+    # Messages in the user's threads matching web-search style text ("door code", -gate)
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    return (
+        Message.objects.annotate(search=body_search_vector())
+        .filter(search=query)
+        .filter(Q(thread__user_a=user) | Q(thread__user_b=user))
+        .annotate(
+            snippet=SearchHeadline(
+                "body",
+                query,
+                config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+                max_words=30,
+                min_words=10,
+            )
+        )
+        .select_related("sender")
+    )
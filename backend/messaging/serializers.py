@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.db.models import Q
+from django.utils.html import escape
 from .models import MessageThread, Message
+from .search import HIGHLIGHT_START, HIGHLIGHT_STOP
 
 # Serializer for individual messages
 class MessageSerializer(serializers.ModelSerializer):
@@ -12,6 +14,34 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "sender", "created_at", "read_at", "thread"]  # protect auto fields
 
 
+# Serializer for message search hits: the matching message plus a highlighted snippet
+class MessageSearchResultSerializer(serializers.ModelSerializer):
+    sender = serializers.StringRelatedField(read_only=True)
+    snippet = serializers.SerializerMethodField()  # HTML-safe, matches wrapped in <mark>
+
+    class Meta:
+        model = Message
+        fields = ["id", "thread", "sender", "body", "created_at", "snippet"]
+        read_only_fields = fields
+
+    def get_snippet(self, obj):
+        # escape the message text first, then turn the headline markers into tags
+        return escape(obj.snippet).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
+
+# Input for the thread get-or-create endpoint; the requester is always one participant
+# Plain ids: existence is enforced by the FK constraints on insert
+class ThreadGetOrCreateSerializer(serializers.Serializer):
+    user = serializers.IntegerField(min_value=1)  # the other participant
+    booking = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+
+    def validate_user(self, value):
+        request = self.context.get("request")
+        if request and value == request.user.id:
+            raise serializers.ValidationError("A thread requires two distinct users.")
+        return value
+
+
 # Serializer for message threads
 class MessageThreadSerializer(serializers.ModelSerializer):
     # extra fields for UI
@@ -23,10 +53,10 @@ class MessageThreadSerializer(serializers.ModelSerializer):
         model = MessageThread
         fields = [
             "id", "booking", "user_a", "user_b", 
-            "participants", "created_at", "last_message", 
+            "participants", "created_at", "last_message", "last_message_at",
             "unread_count"
         ]
-        read_only_fields = ["id", "created_at"]  # protect auto fields
+        read_only_fields = ["id", "created_at", "last_message_at"]  # protect auto fields
 
     # helper to normalize user order for uniqueness constraints
     def _normalize_pair(self, a, b):
@@ -56,10 +86,9 @@ class MessageThreadSerializer(serializers.ModelSerializer):
         return attrs
 
     def get_last_message(self, obj):
-        # use prefetched data to avoid N+1 queries
-        messages = getattr(obj, 'last_message_cached', [])
-        if messages:
-            m = messages[0]
+        # denormalized pointer; select_related in the view avoids N+1 queries
+        m = obj.last_message
+        if m:
             return {
                 "id": m.id,
                 "body": m.body,
@@ -73,13 +102,9 @@ class MessageThreadSerializer(serializers.ModelSerializer):
         return [str(obj.user_a), str(obj.user_b)]
 
     def get_unread_count(self, obj):
-        # count unread messages for the requesting user
+        # read the requesting user's denormalized counter; no extra query
         request = self.context.get('request')
         if not request:
             return 0
-        
-        return obj.messages.filter(
-            read_at__isnull=True
-        ).exclude(
-            sender=request.user
-        ).count()
+
+        return max(obj.unread_count_for(request.user.id), 0)
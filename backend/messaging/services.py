@@ -0,0 +1,81 @@
+from django.db import connection
+from django.http import Http404
+from rest_framework.exceptions import PermissionDenied
+
+from .models import MessageThread
+
+
+def resolve_thread(request, pk, lock=False):
+    """
+    Load thread pk once per request and check the requester takes part in it.
+    Participation is an id comparison, so user rows are never loaded. The
+    result is cached on the request, so get_queryset, perform_create and
+    permission checks share one query. lock=True takes a row lock
+    (select_for_update) and must be called inside a transaction.
+    """
+    cache = request.__dict__.setdefault("_resolved_threads", {})
+    key = (int(pk), lock)
+    if key not in cache:
+        queryset = MessageThread.objects.select_for_update() if lock else MessageThread.objects
+        thread = queryset.filter(pk=pk).first()
+        if thread is None:
+            raise Http404("No MessageThread matches the given query.")
+        if request.user.id not in (thread.user_a_id, thread.user_b_id):
+            raise PermissionDenied("Not a thread participant.")
+        cache[key] = thread
+    return cache[key]
+
+
+def _related_table(field_name):
+    related = MessageThread._meta.get_field(field_name).related_model
+    return connection.ops.quote_name(related._meta.db_table)
+
+
+def get_or_create_thread(user_id, other_user_id, booking_id=None):
+    """
+    Return (thread, created) for the two users and optional booking in one
+    statement. The INSERT ... ON CONFLICT DO NOTHING leans on the unique
+    constraints (uniq_thread_per_booking, uniq_thread_pair_when_booking_null)
+    instead of checking first, so concurrent callers can't race each other.
+    Raises MessageThread.DoesNotExist if a user or booking id does not exist.
+    """
+    # Same participant order MessageThread.save() enforces
+    user_a_id, user_b_id = sorted((user_id, other_user_id))
+    thread = MessageThread(user_a_id=user_a_id, user_b_id=user_b_id, booking_id=booking_id)
+
+    table = connection.ops.quote_name(MessageThread._meta.db_table)
+    fields = [f for f in MessageThread._meta.concrete_fields if not f.primary_key]
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+    values = [f.get_db_prep_save(f.pre_save(thread, add=True), connection) for f in fields]
+    # Explicit casts: the values go through a SELECT, which would otherwise type them as text
+    placeholders = ", ".join(f"%s::{f.cast_db_type(connection)}" for f in fields)
+
+    # FK constraints are deferred until commit, so insert only if the referenced rows exist
+    references = [("user_b", other_user_id)] + ([] if booking_id is None else [("booking", booking_id)])
+    exists = [
+        f"EXISTS (SELECT 1 FROM {_related_table(field)} WHERE id = %s)" for field, _ in references
+    ]
+    exists_params = [value for _, value in references]
+    booking_match = "booking_id IS NULL" if booking_id is None else "booking_id = %s"
+    lookup = [user_a_id, user_b_id] + ([] if booking_id is None else [booking_id])
+
+    # A conflicting row committed after this statement's snapshot is invisible
+    # to the SELECT arm, so an empty result means "look again" (or an unknown id)
+    sql = f"""
+        WITH ins AS (
+            INSERT INTO {table} ({columns})
+            SELECT {placeholders} WHERE {" AND ".join(exists)}
+            ON CONFLICT DO NOTHING
+            RETURNING *
+        )
+        SELECT ins.*, TRUE AS created FROM ins
+        UNION ALL
+        SELECT t.*, FALSE AS created FROM {table} t
+        WHERE t.user_a_id = %s AND t.user_b_id = %s AND t.{booking_match}
+    """
+    rows = list(MessageThread.objects.raw(sql, values + exists_params + lookup))
+    if rows:
+        return rows[0], rows[0].created
+
+    existing = MessageThread.objects.filter(user_a_id=user_a_id, user_b_id=user_b_id, booking_id=booking_id).get()
+    return existing, False
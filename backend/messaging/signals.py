@@ -0,0 +1,97 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import events
+from .models import InboxState, Message, MessageThread
+from .serializers import MessageSerializer
+
+
+def adjust_unread(thread, user_id, delta, **thread_updates):
+    # Add delta to user_id's unread counter on the thread and to their inbox total.
+    # Both are F() updates, so concurrent senders and readers never lose counts.
+    # Extra thread_updates are applied in the same UPDATE statement.
+    field = thread.unread_field_for(user_id)
+    MessageThread.objects.filter(pk=thread.pk).update(**{field: F(field) + delta}, **thread_updates)
+    adjust_inbox_total(user_id, delta)
+
+
+def adjust_inbox_total(user_id, delta):
+    # A missing row already counts as zero, so only increments create it
+    # (a decrement may come from the user's own deletion cascade)
+    if not InboxState.objects.filter(user_id=user_id).update(unread_total=F("unread_total") + delta) and delta > 0:
+        state, created = InboxState.objects.get_or_create(user_id=user_id, defaults={"unread_total": delta})
+        if not created:
+            InboxState.objects.filter(pk=state.pk).update(unread_total=F("unread_total") + delta)
+
+
+def unread_total(user_id):
+    total = InboxState.objects.filter(user_id=user_id).values_list("unread_total", flat=True).first()
+    return max(total or 0, 0)
+
+
+def publish_unread(user_id):
+    events.publish(user_id, {"type": "unread", "unread_count": unread_total(user_id)})
+
+
+def publish_new_message(message, recipient_id):
+    payload = {"type": "message", "thread_id": message.thread_id, "message": MessageSerializer(message).data}
+    # Both participants: the sender may have the thread open on another device
+    events.publish(message.sender_id, payload)
+    events.publish(recipient_id, payload)
+    publish_unread(recipient_id)
+
+
+def publish_thread_read(thread, reader_id, read_up_to):
+    other_id = thread.user_b_id if reader_id == thread.user_a_id else thread.user_a_id
+    events.publish(other_id, {"type": "read", "thread_id": thread.pk, "reader_id": reader_id, "read_up_to": read_up_to})
+    publish_unread(reader_id)
+
+
+@receiver(post_save, sender=Message)
+def record_new_message(sender, instance, created, **kwargs):
+    """
+    A new message is unread for the participant who didn't send it and
+    becomes the thread's latest activity, all in one UPDATE on the thread.
+    """
+    if not created:
+        return
+    thread = instance.thread
+    recipient_id = thread.user_b_id if instance.sender_id == thread.user_a_id else thread.user_a_id
+
+    # Only move the pointer forward, in case an older message commits late
+    adjust_unread(
+        thread,
+        recipient_id,
+        1,
+        last_message_id=Case(
+            When(last_message_at__lte=instance.created_at, then=Value(instance.pk)),
+            default=F("last_message_id"),
+            output_field=models.BigIntegerField(),
+        ),
+        last_message_at=Case(
+            When(last_message_at__lte=instance.created_at, then=Value(instance.created_at)),
+            default=F("last_message_at"),
+            output_field=models.DateTimeField(),
+        ),
+    )
+
+    # Stream subscribers only hear about the message once it is durable
+    transaction.on_commit(lambda: publish_new_message(instance, recipient_id))
+
+
+@receiver(post_delete, sender=Message)
+def forget_deleted_message(sender, instance, **kwargs):
+    """
+    A deleted message the recipient hadn't read stops counting, whether it
+    went alone (admin) or with its thread or sender (cascade).
+    """
+    # Row lock, as in mark-read, so the watermark can't move between check and update
+    thread = MessageThread.objects.select_for_update().filter(pk=instance.thread_id).first()
+    if thread is None:
+        return
+    recipient_id = thread.other_participant_id(instance.sender_id)
+    last_read_id, _ = thread.last_read_for(recipient_id)
+    if instance.pk > last_read_id:
+        adjust_unread(thread, recipient_id, -1)
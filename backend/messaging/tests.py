@@ -1,10 +1,25 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.utils import timezone
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from .models import MessageThread, Message
+from accounts.tokens import issue_tokens
+from . import events, partitions
+from .models import InboxState, MessageThread, Message
 User = get_user_model()
 
 class MessagingAPITests(TestCase):
@@ -85,8 +100,8 @@ class MessagingAPITests(TestCase):
         self.auth(self.user_a)
         res_a = self.client.get(url)
         self.assertEqual(res_a.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res_a.data), 1)
-        self.assertEqual(res_a.data[0]["body"], "hello")
+        self.assertEqual(len(res_a.data["results"]), 1)
+        self.assertEqual(res_a.data["results"][0]["body"], "hello")
 
         self.auth(self.user_c)  # outsider
         res_c = self.client.get(url)
@@ -111,8 +126,8 @@ class MessagingAPITests(TestCase):
         url = reverse("thread-messages", kwargs={"pk": self.thread.id})
         self.client.post(url, {"body": "second"}, format="json")
         res = self.client.get(url)
-        bodies = [m["body"] for m in res.data]
-        self.assertEqual(bodies, ["hello", "second"])  # ordering = ["created_at"]
+        bodies = [m["body"] for m in res.data["results"]]
+        self.assertEqual(bodies, ["hello", "second"])  # pages are returned oldest-first
 
 class MessagingModelTests(TestCase):
     def setUp(self):
@@ -130,3 +145,455 @@ class MessagingModelTests(TestCase):
         self.assertIn("Thread #", str(t))
         self.assertIn("Msg(", str(m))
 
+
+class MessagingUnreadCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user_a = User.objects.create_user(username="a", email="a@example.com", password="pass123")
+        self.user_b = User.objects.create_user(username="b", email="b@example.com", password="pass123")
+        self.user_c = User.objects.create_user(username="c", email="c@example.com", password="pass123")
+        self.thread_ab = MessageThread.objects.create(user_a=self.user_a, user_b=self.user_b)
+        self.thread_ac = MessageThread.objects.create(user_a=self.user_a, user_b=self.user_c)
+
+    def auth(self, user):
+        self.client.force_authenticate(user=user)
+
+    def test_counters_follow_inserts_and_mark_read(self):
+        Message.objects.create(thread=self.thread_ab, sender=self.user_b, body="1")
+        Message.objects.create(thread=self.thread_ab, sender=self.user_b, body="2")
+        Message.objects.create(thread=self.thread_ac, sender=self.user_c, body="3")
+        Message.objects.create(thread=self.thread_ab, sender=self.user_a, body="mine")
+
+        self.auth(self.user_a)
+        res = self.client.get(reverse("unread-count"))
+        self.assertEqual(res.data["unread_count"], 3)
+
+        res = self.client.get(reverse("thread-list-create"))
+        counts = {t["id"]: t["unread_count"] for t in res.data}
+        self.assertEqual(counts, {self.thread_ab.id: 2, self.thread_ac.id: 1})
+
+        res = self.client.post(reverse("thread-mark-read", kwargs={"pk": self.thread_ab.id}))
+        self.assertEqual(res.data["messages_marked_read"], 2)
+
+        res = self.client.get(reverse("unread-count"))
+        self.assertEqual(res.data["unread_count"], 1)
+        self.thread_ab.refresh_from_db()
+        self.assertEqual(self.thread_ab.user_a_unread, 0)
+        self.assertEqual(self.thread_ab.user_b_unread, 1)
+
+    def unread_totals(self):
+        totals = {}
+        for user in (self.user_a, self.user_b, self.user_c):
+            self.auth(user)
+            totals[user.username] = self.client.get(reverse("unread-count")).data["unread_count"]
+        return totals
+
+    def test_deleting_messages_releases_their_unread_counts(self):
+        read = Message.objects.create(thread=self.thread_ab, sender=self.user_b, body="read")
+        self.auth(self.user_a)
+        self.client.post(reverse("thread-mark-read", kwargs={"pk": self.thread_ab.id}))
+        unread = Message.objects.create(thread=self.thread_ab, sender=self.user_b, body="unread")
+        Message.objects.create(thread=self.thread_ac, sender=self.user_a, body="to c")
+
+        read.delete()
+        self.assertEqual(self.unread_totals(), {"a": 1, "b": 0, "c": 1})
+        unread.delete()
+        self.thread_ab.refresh_from_db()
+        self.assertEqual(self.thread_ab.user_a_unread, 0)
+        self.assertEqual(self.unread_totals(), {"a": 0, "b": 0, "c": 1})
+
+    def test_thread_and_user_deletes_release_unread_counts(self):
+        Message.objects.create(thread=self.thread_ab, sender=self.user_b, body="1")
+        Message.objects.create(thread=self.thread_ac, sender=self.user_c, body="2")
+        Message.objects.create(thread=self.thread_ac, sender=self.user_a, body="3")
+
+        self.thread_ab.delete()
+        self.assertEqual(self.unread_totals(), {"a": 1, "b": 0, "c": 1})
+        self.user_a.delete()
+        self.auth(self.user_c)
+        self.assertEqual(self.client.get(reverse("unread-count")).data["unread_count"], 0)
+
+    def test_reconcile_unread_fixes_drift(self):
+        Message.objects.create(thread=self.thread_ab, sender=self.user_b, body="1")
+        Message.objects.create(thread=self.thread_ac, sender=self.user_c, body="2")
+        # Drift the way raw SQL or a detached partition would
+        MessageThread.objects.filter(pk=self.thread_ab.pk).update(user_a_unread=7, user_b_unread=2)
+        InboxState.objects.filter(user=self.user_a).update(unread_total=40)
+        InboxState.objects.filter(user=self.user_c).delete()
+
+        out = StringIO()
+        call_command("reconcile_unread", "--batch-size", "1", stdout=out)
+        self.assertIn("Corrected unread counts for 1 thread(s)", out.getvalue())
+        self.thread_ab.refresh_from_db()
+        self.assertEqual((self.thread_ab.user_a_unread, self.thread_ab.user_b_unread), (1, 0))
+        self.assertEqual(self.unread_totals(), {"a": 2, "b": 0, "c": 0})
+
+    def test_thread_list_query_count_independent_of_thread_count(self):
+        for t in (self.thread_ab, self.thread_ac):
+            Message.objects.create(thread=t, sender=t.user_b, body="hi")
+        self.auth(self.user_a)
+        url = reverse("thread-list-create")
+
+        with CaptureQueriesContext(connection) as two_threads:
+            self.client.get(url)
+
+        for i in range(3):
+            other = User.objects.create_user(username=f"x{i}", password="pass123")
+            t = MessageThread.objects.create(user_a=self.user_a, user_b=other)
+            Message.objects.create(thread=t, sender=other, body="hi")
+
+        with CaptureQueriesContext(connection) as five_threads:
+            res = self.client.get(url)
+        self.assertEqual(len(res.data), 5)
+        self.assertEqual(len(two_threads.captured_queries), len(five_threads.captured_queries))
+
+    def test_thread_list_ordered_by_last_activity(self):
+        # thread_ac is newer, but a message in thread_ab moves it to the top
+        Message.objects.create(thread=self.thread_ac, sender=self.user_c, body="older")
+        latest = Message.objects.create(thread=self.thread_ab, sender=self.user_b, body="newest")
+
+        self.auth(self.user_a)
+        res = self.client.get(reverse("thread-list-create"))
+        self.assertEqual([t["id"] for t in res.data], [self.thread_ab.id, self.thread_ac.id])
+        self.assertEqual(res.data[0]["last_message"]["id"], latest.id)
+        self.assertEqual(res.data[0]["last_message"]["body"], "newest")
+
+
+class MessagingSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user_a = User.objects.create_user(username="a", email="a@example.com", password="pass123")
+        self.user_b = User.objects.create_user(username="b", email="b@example.com", password="pass123")
+        self.thread = MessageThread.objects.create(user_a=self.user_a, user_b=self.user_b)
+        self.messages = [
+            Message.objects.create(thread=self.thread, sender=self.user_a, body=f"m{i}")
+            for i in range(5)
+        ]
+        self.url = reverse("thread-messages", kwargs={"pk": self.thread.id})
+        self.client.force_authenticate(user=self.user_a)
+
+    def test_cursor_pages_walk_backwards_from_newest(self):
+        res = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual([m["body"] for m in res.data["results"]], ["m3", "m4"])
+        self.assertIsNotNone(res.data["next"])
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual([m["body"] for m in res.data["results"]], ["m1", "m2"])
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual([m["body"] for m in res.data["results"]], ["m0"])
+        self.assertIsNone(res.data["next"])
+
+    def test_since_id_returns_only_new_messages(self):
+        newest = self.messages[-1]
+        res = self.client.get(self.url, {"since_id": newest.id})
+        self.assertEqual(res.data["results"], [])
+        self.assertFalse(res.data["has_more"])
+
+        reply = Message.objects.create(thread=self.thread, sender=self.user_b, body="reply")
+        res = self.client.get(self.url, {"since_id": newest.id})
+        self.assertEqual([m["id"] for m in res.data["results"]], [reply.id])
+
+        res = self.client.get(self.url, {"since_id": self.messages[0].id, "page_size": 2})
+        self.assertEqual([m["body"] for m in res.data["results"]], ["m1", "m2"])
+        self.assertTrue(res.data["has_more"])
+
+    def test_since_id_reports_read_receipts(self):
+        res = self.client.get(self.url, {"since_id": self.messages[-1].id})
+        self.assertIsNone(res.data["read_up_to"])
+
+        self.client.force_authenticate(user=self.user_b)
+        self.client.post(reverse("thread-mark-read", kwargs={"pk": self.thread.id}))
+
+        self.client.force_authenticate(user=self.user_a)
+        res = self.client.get(self.url, {"since_id": self.messages[-1].id})
+        self.assertEqual(res.data["read_up_to"], self.messages[-1].id)
+
+    def test_mark_read_moves_watermark_without_touching_messages(self):
+        for i in range(3):
+            Message.objects.create(thread=self.thread, sender=self.user_b, body=f"r{i}")
+        self.client.force_authenticate(user=self.user_b)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(reverse("thread-mark-read", kwargs={"pk": self.thread.id}))
+        self.assertEqual(res.data["messages_marked_read"], 5)
+        message_writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "messaging_message" ')]
+        self.assertEqual(message_writes, [])
+
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.user_b_last_read_message_id, self.thread.last_message_id)
+        self.assertEqual(self.thread.user_b_unread, 0)
+
+        # read_at is derived per message from the recipient's watermark
+        res = self.client.get(self.url)
+        read = {m["body"]: m["read_at"] is not None for m in res.data["results"]}
+        self.assertEqual(read, {"m0": True, "m1": True, "m2": True, "m3": True, "m4": True,
+                                "r0": False, "r1": False, "r2": False})
+
+        # Marking again is a no-op
+        res = self.client.post(reverse("thread-mark-read", kwargs={"pk": self.thread.id}))
+        self.assertEqual(res.data["messages_marked_read"], 0)
+
+    def test_since_id_must_be_integer(self):
+        res = self.client.get(self.url, {"since_id": "abc"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MessagingEventStreamTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user_a = User.objects.create_user(username="a", email="a@example.com", password="pass123")
+        self.user_b = User.objects.create_user(username="b", email="b@example.com", password="pass123")
+        self.thread = MessageThread.objects.create(user_a=self.user_a, user_b=self.user_b)
+
+    def test_local_backend_delivers_events_published_from_other_threads(self):
+        backend = events.LocalEventBackend()
+
+        async def run():
+            sub = backend.subscribe(self.user_a.id)
+            publisher = threading.Thread(target=backend.publish, args=(self.user_a.id, {"type": "ping"}))
+            publisher.start()
+            event = await sub.get(timeout=5)
+            publisher.join()
+            sub.close()
+            return event
+
+        self.assertEqual(asyncio.run(run()), {"type": "ping"})
+        self.assertEqual(backend._subscriptions, {})
+
+    @override_settings(MESSAGING_EVENTS={"QUEUE_SIZE": 2})
+    def test_slow_subscriber_is_told_to_resync(self):
+        backend = events.LocalEventBackend()
+
+        async def run():
+            sub = backend.subscribe(self.user_a.id)
+            for i in range(3):
+                backend.publish(self.user_a.id, {"type": "message", "n": i})
+            await asyncio.sleep(0)
+            return await sub.get(timeout=5)
+
+        self.assertEqual(asyncio.run(run()), {"type": "resync"})
+
+    def test_message_and_mark_read_publish_after_commit(self):
+        self.client.force_authenticate(user=self.user_b)
+        with mock.patch.object(events, "publish") as publish, self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("thread-messages", kwargs={"pk": self.thread.id}), {"body": "hi"}, format="json"
+            )
+        sent = [(call.args[0], call.args[1]["type"]) for call in publish.call_args_list]
+        self.assertEqual(sent, [(self.user_b.id, "message"), (self.user_a.id, "message"), (self.user_a.id, "unread")])
+        self.assertEqual(publish.call_args_list[2].args[1]["unread_count"], 1)
+
+        self.client.force_authenticate(user=self.user_a)
+        with mock.patch.object(events, "publish") as publish, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("thread-mark-read", kwargs={"pk": self.thread.id}))
+        receipt = publish.call_args_list[0].args
+        self.assertEqual(receipt[0], self.user_b.id)
+        self.assertEqual(receipt[1]["read_up_to"], res.data["id"])
+        self.assertEqual(publish.call_args_list[1].args[1], {"type": "unread", "unread_count": 0})
+
+    async def test_stream_writes_published_events(self):
+        access = (await sync_to_async(issue_tokens)(self.user_a))["access"]
+        response = await AsyncClient().get(
+            reverse("messaging-events"),
+            headers={"Accept": "text/event-stream", "Authorization": f"Bearer {access}"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        stream = response.streaming_content
+        first = await anext(stream)
+        events.publish(self.user_a.id, {"type": "unread", "unread_count": 3})
+        second = await anext(stream)
+        await stream.aclose()
+
+        self.assertTrue(first.startswith(b"retry:"))
+        event_line, data_line = second.decode().strip().split("\n")
+        self.assertEqual(event_line, "event: unread")
+        self.assertEqual(json.loads(data_line[len("data: "):]), {"type": "unread", "unread_count": 3})
+
+    def test_stream_refused_under_wsgi(self):
+        # The sync test client is a WSGI request, like runserver
+        self.client.force_authenticate(user=self.user_a)
+        res = self.client.get(reverse("messaging-events"), HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(res.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertFalse(res.streaming)
+
+    def test_stream_requires_authentication(self):
+        res = self.client.get(reverse("messaging-events"), HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class MessageSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user_a = User.objects.create_user(username="a", email="a@example.com", password="pass123")
+        self.user_b = User.objects.create_user(username="b", email="b@example.com", password="pass123")
+        self.user_c = User.objects.create_user(username="c", email="c@example.com", password="pass123")
+        self.thread_ab = MessageThread.objects.create(user_a=self.user_a, user_b=self.user_b)
+        self.thread_bc = MessageThread.objects.create(user_a=self.user_b, user_b=self.user_c)
+        self.hit = Message.objects.create(
+            thread=self.thread_ab, sender=self.user_b, body="The door code is 4321, feed Rex & Max twice"
+        )
+        Message.objects.create(thread=self.thread_ab, sender=self.user_a, body="Thanks, see you Monday")
+        Message.objects.create(thread=self.thread_bc, sender=self.user_c, body="Garage door code is 9999")
+        self.url = reverse("message-search")
+
+    def test_search_is_limited_to_own_threads_and_highlights(self):
+        self.client.force_authenticate(user=self.user_a)
+        res = self.client.get(self.url, {"q": "door codes"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([m["id"] for m in res.data["results"]], [self.hit.id])
+        snippet = res.data["results"][0]["snippet"]
+        self.assertIn("<mark>door</mark>", snippet)
+        self.assertIn("<mark>code</mark>", snippet)
+        self.assertIn("Rex &amp; Max", snippet)  # message text is escaped
+
+    def test_search_paginates_and_filters_by_thread(self):
+        for i in range(3):
+            Message.objects.create(thread=self.thread_bc, sender=self.user_b, body=f"door number {i}")
+        self.client.force_authenticate(user=self.user_b)
+
+        # user_b sees the hits from both of their threads
+        res = self.client.get(self.url, {"q": "door", "page_size": 3})
+        self.assertEqual(len(res.data["results"]), 3)
+        res = self.client.get(res.data["next"])
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNone(res.data["next"])
+
+        res = self.client.get(self.url, {"q": "door", "thread": self.thread_ab.id})
+        self.assertEqual([m["id"] for m in res.data["results"]], [self.hit.id])
+
+    def test_search_requires_query(self):
+        self.client.force_authenticate(user=self.user_a)
+        res = self.client.get(self.url, {"q": "  "})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ThreadGetOrCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user_a = User.objects.create_user(username="a", email="a@example.com", password="pass123")
+        self.user_b = User.objects.create_user(username="b", email="b@example.com", password="pass123")
+        self.url = reverse("thread-get-or-create")
+        self.client.force_authenticate(user=self.user_b)
+
+    def test_creates_once_then_returns_existing(self):
+        res = self.client.post(self.url, {"user": self.user_a.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((res.data["user_a"], res.data["user_b"]), (self.user_a.id, self.user_b.id))
+
+        self.client.force_authenticate(user=self.user_a)
+        again = self.client.post(self.url, {"user": self.user_b.id}, format="json")
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data["id"], res.data["id"])
+        self.assertEqual(MessageThread.objects.count(), 1)
+
+    def test_existing_thread_found_with_single_statement(self):
+        thread = MessageThread.objects.create(user_a=self.user_a, user_b=self.user_b)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(self.url, {"user": self.user_a.id}, format="json")
+        self.assertEqual(res.data["id"], thread.id)
+        self.assertEqual(len([q for q in ctx.captured_queries if "INSERT" in q["sql"]]), 1)
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith('SELECT "messaging_messagethread"')])
+
+    def test_rejects_self_and_unknown_users(self):
+        res = self.client.post(self.url, {"user": self.user_b.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(self.url, {"user": 999999}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(self.url, {"user": self.user_a.id, "booking": 999999}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(MessageThread.objects.count(), 0)
+
+
+class ThreadResolverTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user_a = User.objects.create_user(username="a", email="a@example.com", password="pass123")
+        self.user_b = User.objects.create_user(username="b", email="b@example.com", password="pass123")
+        self.user_c = User.objects.create_user(username="c", email="c@example.com", password="pass123")
+        self.thread = MessageThread.objects.create(user_a=self.user_a, user_b=self.user_b)
+        Message.objects.create(thread=self.thread, sender=self.user_b, body="hello")
+        self.client.force_authenticate(user=self.user_a)
+
+    def thread_selects(self, ctx):
+        return [q for q in ctx.captured_queries if q["sql"].startswith('SELECT "messaging_messagethread"')]
+
+    def user_selects(self, ctx):
+        return [q for q in ctx.captured_queries if q["sql"].startswith('SELECT "accounts_user"')]
+
+    def test_thread_loaded_once_per_request(self):
+        url = reverse("thread-messages", kwargs={"pk": self.thread.id})
+        for method, kwargs in (("get", {}), ("get", {"data": {"since_id": 0}}), ("post", {"data": {"body": "hi"}})):
+            with CaptureQueriesContext(connection) as ctx:
+                getattr(self.client, method)(url, format="json", **kwargs)
+            self.assertEqual(len(self.thread_selects(ctx)), 1, method)
+
+    def test_mark_read_checks_participation_without_loading_users(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(reverse("thread-mark-read", kwargs={"pk": self.thread.id}))
+        self.assertEqual(res.data["messages_marked_read"], 1)
+        self.assertEqual(len(self.thread_selects(ctx)), 1)
+        self.assertEqual(self.user_selects(ctx), [])
+
+    def test_outsiders_and_missing_threads_are_rejected(self):
+        self.client.force_authenticate(user=self.user_c)
+        res = self.client.post(reverse("thread-mark-read", kwargs={"pk": self.thread.id}))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        res = self.client.post(reverse("thread-mark-read", kwargs={"pk": 999999}))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MessagePartitionTests(TestCase):
+    def setUp(self):
+        self.user_a = User.objects.create_user(username="a", email="a@example.com", password="pass123")
+        self.user_b = User.objects.create_user(username="b", email="b@example.com", password="pass123")
+        self.thread = MessageThread.objects.create(user_a=self.user_a, user_b=self.user_b)
+
+    def partition_of(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM messaging_message WHERE id = %s", [message.id])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def run_command(self, *args):
+        call_command("message_partitions", *args, stdout=StringIO())
+
+    def test_creates_upcoming_months_and_moves_rows_out_of_default(self):
+        message = Message.objects.create(thread=self.thread, sender=self.user_a, body="hi")
+        self.assertEqual(self.partition_of(message), partitions.DEFAULT_PARTITION)
+
+        self.run_command("--months-ahead", "2")
+        current = partitions.month_start(timezone.now())
+        expected = {partitions.add_months(current, n) for n in range(3)}
+        self.assertTrue(expected <= partitions.attached_partitions().keys())
+        self.assertEqual(self.partition_of(message), partitions.partition_name(current))
+
+        # Reads through the parent span partitions transparently
+        old = Message.objects.create(thread=self.thread, sender=self.user_b, body="old")
+        Message.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=70))
+        self.run_command("--months-ahead", "0")
+        self.assertEqual(self.thread.messages.count(), 2)
+
+    def test_create_partition_locks_default_before_moving_rows(self):
+        message = Message.objects.create(thread=self.thread, sender=self.user_a, body="stranded")
+        month = partitions.month_start(message.created_at)
+        with CaptureQueriesContext(connection) as ctx:
+            name = partitions.create_partition(month)
+        statements = [q["sql"].split()[0] for q in ctx.captured_queries if not q["sql"].startswith(("SAVEPOINT", "RELEASE"))]
+        self.assertEqual(statements, ["LOCK", "CREATE", "WITH", "ALTER"])
+        self.assertEqual(self.partition_of(message), name)
+
+    def test_archives_months_past_retention(self):
+        keep = Message.objects.create(thread=self.thread, sender=self.user_a, body="recent")
+        old = Message.objects.create(thread=self.thread, sender=self.user_b, body="ancient")
+        Message.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=500))
+
+        self.run_command("--retain-months", "12", "--archive")
+
+        self.assertEqual(list(self.thread.messages.values_list("id", flat=True)), [keep.id])
+        self.assertEqual(partitions.detached_partitions(), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id, body FROM {partitions.ARCHIVE_TABLE}")
+            self.assertEqual(cursor.fetchall(), [(old.id, "ancient")])
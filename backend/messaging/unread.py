@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import InboxState, Message, MessageThread
+
+
+def reconcile_unread(thread_ids):
+    # Recompute the given threads' unread counters from their read watermarks,
+    # then their participants' inbox totals. Thread and inbox rows are locked
+    # first (in the same order mark-read and senders take them), so concurrent
+    # messages wait rather than being miscounted. Returns threads corrected.
+    threads = list(MessageThread.objects.filter(pk__in=thread_ids).order_by("pk").select_for_update())
+    if not threads:
+        return 0
+
+    # Unread for a participant: the other participant's messages past their watermark
+    counts = {
+        row["thread_id"]: row
+        for row in Message.objects.filter(thread__in=threads)
+        .values("thread_id")
+        .annotate(
+            user_a_unread=Count("pk", filter=Q(
+                sender_id=F("thread__user_b_id"), pk__gt=F("thread__user_a_last_read_message_id")
+            )),
+            user_b_unread=Count("pk", filter=Q(
+                sender_id=F("thread__user_a_id"), pk__gt=F("thread__user_b_last_read_message_id")
+            )),
+        )
+    }
+    drifted = []
+    for thread in threads:
+        row = counts.get(thread.pk, {})
+        expected = (row.get("user_a_unread", 0), row.get("user_b_unread", 0))
+        if (thread.user_a_unread, thread.user_b_unread) != expected:
+            thread.user_a_unread, thread.user_b_unread = expected
+            drifted.append(thread)
+    MessageThread.objects.bulk_update(drifted, ["user_a_unread", "user_b_unread"])
+
+    reconcile_inbox_totals({user_id for thread in threads for user_id in (thread.user_a_id, thread.user_b_id)})
+    return len(drifted)
+
+
+def reconcile_inbox_totals(user_ids):
+    # Set each user's unread_total to the sum of their threads' counters
+    user_ids = sorted(user_ids)
+    states = {
+        state.user_id: state
+        for state in InboxState.objects.filter(user_id__in=user_ids).order_by("user_id").select_for_update()
+    }
+    totals = dict.fromkeys(user_ids, 0)
+    for prefix in ("user_a", "user_b"):
+        rows = (
+            MessageThread.objects.filter(**{f"{prefix}_id__in": user_ids})
+            .values_list(f"{prefix}_id")
+            .annotate(total=Sum(f"{prefix}_unread"))
+        )
+        for user_id, total in rows:
+            totals[user_id] += total
+
+    changed, missing = [], []
+    for user_id, total in totals.items():
+        state = states.get(user_id)
+        if state is None:
+            if total:
+                missing.append(InboxState(user_id=user_id, unread_total=total))
+        elif state.unread_total != total:
+            state.unread_total = total
+            changed.append(state)
+    InboxState.objects.bulk_update(changed, ["unread_total"])
+    InboxState.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+def recalculate_unread(thread_ids=None, batch_size=1000, progress=None):
+    # Walk the threads (the given ids, or all of them by primary key) in
+    # batches, each reconciled in its own short transaction;
+    # progress(done, total, corrected) is called after every batch.
+    # Returns the number of threads corrected.
+    if thread_ids is not None:
+        pending = sorted(set(thread_ids))
+        total = len(pending)
+        batches = (pending[i:i + batch_size] for i in range(0, total, batch_size))
+    else:
+        total = MessageThread.objects.count()
+        batches = _all_thread_batches(batch_size)
+
+    done = corrected = 0
+    for batch in batches:
+        with transaction.atomic():
+            corrected += reconcile_unread(batch)
+        done += len(batch)
+        if progress:
+            progress(done, total, corrected)
+    return corrected
+
+
+def _all_thread_batches(batch_size):
+    # Keyset walk over thread ids; threads added mid-run are picked up at the end
+    last_id = 0
+    while True:
+        batch = list(
+            MessageThread.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
@@ -2,7 +2,11 @@ from django.urls import path
 from .views import (
     ThreadListCreateView, 
     ThreadMessagesListCreateView,
-    mark_thread_as_read  # endpoint to mark all messages in a thread as read
+    get_or_create_thread_view,
+    MessageSearchView,
+    mark_thread_as_read,  # endpoint to mark all messages in a thread as read
+    unread_count,
+    event_stream
 )
 
 urlpatterns = [
@@ -11,12 +15,28 @@ urlpatterns = [
     # POST /api/messaging/threads/
     path("threads/", ThreadListCreateView.as_view(), name="thread-list-create"),
 
+    # Get or create the requester's thread with another user in one statement
+    # POST /api/messaging/threads/get-or-create/  {"user": <id>, "booking": <id|null>}
+    path("threads/get-or-create/", get_or_create_thread_view, name="thread-get-or-create"),
+
     # List messages in a specific thread or send a message to the thread
     # GET  /api/messaging/threads/<id>/messages/
     # POST /api/messaging/threads/<id>/messages/
     path("threads/<int:pk>/messages/", ThreadMessagesListCreateView.as_view(), name="thread-messages"),
     
+    # Full-text search over messages in the user's threads
+    # GET /api/messaging/search/?q=<text>
+    path("search/", MessageSearchView.as_view(), name="message-search"),
+
     # Mark all unread messages in a thread as read for the current user
     # POST /api/messaging/threads/<id>/mark-read/
     path("threads/<int:pk>/mark-read/", mark_thread_as_read, name="thread-mark-read"),
+
+    # Total unread messages for the current user across all threads
+    # GET /api/messaging/unread-count/
+    path("unread-count/", unread_count, name="unread-count"),
+
+    # Server-sent events: new messages, read receipts and unread counts (serve under ASGI)
+    # GET /api/messaging/events/
+    path("events/", event_stream, name="messaging-events"),
 ]
@@ -1,15 +1,33 @@
-from django.shortcuts import render, get_object_or_404
-from django.db.models import Prefetch, Q
+import asyncio
+import json
+
+from django.shortcuts import render
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.db.models import Q
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
 
-from .models import MessageThread, Message
-from .serializers import MessageThreadSerializer, MessageSerializer
+from core.idempotency import IdempotentCreateMixin
+from core.throttling import ScopedTokenBucketThrottle
+from . import events
+from .models import MessageThread
+from .pagination import MessageCursorPagination, MessageSearchPagination
+from .search import search_messages
+from .serializers import (
+    MessageThreadSerializer, MessageSerializer, MessageSearchResultSerializer, ThreadGetOrCreateSerializer
+)
+from .services import get_or_create_thread, resolve_thread
 from .permissions import IsThreadParticipant
+from .renderers import EventStreamRenderer
+from .signals import adjust_inbox_total, publish_thread_read, unread_total
 
 
 # List all threads for the authenticated user or create a new thread
@@ -17,24 +35,16 @@ class ThreadListCreateView(generics.ListCreateAPIView):
     serializer_class = MessageThreadSerializer
     permission_classes = [IsAuthenticated]
 
-    # Get threads for the current user
+    # Get threads for the current user, most recently active first
     def get_queryset(self):
         u = self.request.user
-        
-        # Prefetch only the last message to avoid N+1 queries
-        last_message_prefetch = Prefetch(
-            'messages',
-            queryset=Message.objects.select_related('sender').order_by('-created_at')[:1],
-            to_attr='last_message_cached'
-        )
-        
+
+        # last_message is denormalized on the thread, so a join replaces the per-thread subquery
         return MessageThread.objects.filter(
             Q(user_a=u) | Q(user_b=u)
         ).select_related(
-            'user_a', 'user_b', 'booking'
-        ).prefetch_related(
-            last_message_prefetch
-        ).order_by("-created_at")
+            'user_a', 'user_b', 'booking', 'last_message__sender'
+        ).order_by("-last_message_at", "-id")
 
     # Ensure requester is one of the participants when creating a thread
     def perform_create(self, serializer):
@@ -46,49 +56,182 @@ class ThreadListCreateView(generics.ListCreateAPIView):
         serializer.save()
 
 
+# Return the requester's thread with another user (optionally for a booking), creating it if needed
+# 201 when created, 200 when it already existed; safe to call on every "message this sitter" click
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def get_or_create_thread_view(request):
+    params = ThreadGetOrCreateSerializer(data=request.data, context={"request": request})
+    params.is_valid(raise_exception=True)
+
+    try:
+        thread, created = get_or_create_thread(
+            request.user.id, params.validated_data["user"], params.validated_data.get("booking")
+        )
+    except MessageThread.DoesNotExist:
+        raise ValidationError("Unknown user or booking.")
+
+    data = MessageThreadSerializer(thread, context={"request": request}).data
+    return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
 # List messages in a thread or send a message to the thread
-class ThreadMessagesListCreateView(generics.ListCreateAPIView):
+# History covers the attached monthly partitions only: months detached or
+# archived by `manage.py message_partitions` no longer appear here or in search
+class ThreadMessagesListCreateView(IdempotentCreateMixin, generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated, IsThreadParticipant]
+    pagination_class = MessageCursorPagination
+    throttle_scope = "message_post"
 
-    # Retrieve the thread and check object-level permissions
+    # Only posting is rate limited; reading history and syncing are not
+    def get_throttles(self):
+        if self.request.method == "POST":
+            return [ScopedTokenBucketThrottle()]
+        return super().get_throttles()
+
+    # The request's thread, loaded and participation-checked once (see resolve_thread)
     def get_thread(self):
-        thread = get_object_or_404(MessageThread, pk=self.kwargs["pk"])
-        for perm in self.permission_classes:
-            if hasattr(perm, "has_object_permission"):
-                if not perm().has_object_permission(self.request, self, thread):
-                    self.permission_denied(self.request, message="Not a thread participant.")
-        return thread
+        return resolve_thread(self.request, self.kwargs["pk"])
 
     # Return messages for the thread
+    # Going through thread.messages caches the thread on each message for read_at
     def get_queryset(self):
         thread = self.get_thread()
-        return Message.objects.filter(thread=thread).select_related("sender")
+        return thread.messages.select_related("sender")
+
+    # ?since_id=<id> switches to incremental sync; otherwise page backwards from the newest
+    def list(self, request, *args, **kwargs):
+        since_id = request.query_params.get("since_id")
+        if since_id is None:
+            return super().list(request, *args, **kwargs)
+
+        try:
+            since_id = int(since_id)
+        except ValueError:
+            raise ValidationError({"since_id": "Must be an integer message id."})
+
+        # Only messages newer than the client's last seen id, walked via the (thread, id) index
+        limit = self.paginator.get_page_size(request)
+        thread = self.get_thread()
+        new_messages = list(
+            thread.messages.select_related("sender").filter(id__gt=since_id).order_by("id")[:limit + 1]
+        )
+        has_more = len(new_messages) > limit
+        new_messages = new_messages[:limit]
+
+        # Read receipts: the other participant's watermark; every message up to it is read
+        read_up_to, _ = thread.last_read_for(thread.other_participant_id(request.user.id))
+
+        return Response({
+            "results": self.get_serializer(new_messages, many=True).data,
+            "has_more": has_more,
+            "read_up_to": read_up_to or None,
+        })
 
     # Assign sender and thread when creating a new message
+    # Atomic so the message and its unread counter bumps commit together
+    @transaction.atomic
     def perform_create(self, serializer):
         thread = self.get_thread()
         serializer.save(thread=thread, sender=self.request.user)
 
 
+# Full-text search over messages in the user's threads
+# GET /api/messaging/search/?q=door code[&thread=<id>]
+# Like thread history, skips months detached or archived past retention
+class MessageSearchView(generics.ListAPIView):
+    serializer_class = MessageSearchResultSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = MessageSearchPagination
+
+    def get_queryset(self):
+        text = self.request.query_params.get("q", "").strip()
+        if not text:
+            raise ValidationError({"q": "A search query is required."})
+
+        queryset = search_messages(self.request.user, text)
+
+        # Optional: narrow the search to one thread
+        thread_id = self.request.query_params.get("thread")
+        if thread_id:
+            if not thread_id.isdigit():
+                raise ValidationError({"thread": "Must be a thread id."})
+            queryset = queryset.filter(thread_id=thread_id)
+        return queryset
+
+
 # Mark all unread messages in a thread as read for the current user
+# Moves the participant's read watermark in one thread-row UPDATE; message rows are untouched
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_thread_as_read(request, pk):
-    thread = get_object_or_404(MessageThread, pk=pk)
-    
-    # Check that the user is a participant
-    if request.user not in [thread.user_a, thread.user_b]:
-        raise PermissionDenied("You are not a participant in this thread.")
-    
-    # Update unread messages not sent by the current user
-    updated = thread.messages.filter(
-        read_at__isnull=True
-    ).exclude(
-        sender=request.user
-    ).update(read_at=timezone.now())
-    
+    with transaction.atomic():
+        # Row lock: senders bumping the counter wait, so the unread count read here is exact
+        # The resolver also checks the user is a participant
+        thread = resolve_thread(request, pk, lock=True)
+
+        unread = thread.unread_count_for(request.user.id)
+        last_read_id, _ = thread.last_read_for(request.user.id)
+        watermark = max(last_read_id, thread.last_message_id or 0)
+
+        if unread or watermark > last_read_id:
+            prefix = thread.participant_prefix(request.user.id)
+            MessageThread.objects.filter(pk=thread.pk).update(**{
+                f"{prefix}_unread": 0,
+                f"{prefix}_last_read_message_id": watermark,
+                f"{prefix}_last_read_at": timezone.now(),
+            })
+            if unread:
+                adjust_inbox_total(request.user.id, -unread)
+            transaction.on_commit(lambda: publish_thread_read(thread, request.user.id, watermark))
+
     return Response({
         'status': 'success',
-        'messages_marked_read': updated
+        'messages_marked_read': max(unread, 0)
     })
+
+
+# Total unread messages across all of the user's threads (for badge polling)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def unread_count(request):
+    return Response({'unread_count': unread_total(request.user.id)})
+
+
+# Server-sent event stream of new messages, read receipts and unread counts
+# The view itself is sync (DRF auth); the body is an async generator, so under
+# ASGI an idle connection costs a queue and a parked coroutine, not a thread.
+# A WSGI server would instead read the whole (endless) generator into memory
+# before sending a byte while holding a worker thread, so it is refused there;
+# those clients poll ?since_id= and /unread-count/ instead.
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+@permission_classes([IsAuthenticated])
+def event_stream(request):
+    if not isinstance(request._request, ASGIRequest):
+        return Response(
+            {'detail': 'The event stream needs an ASGI server; poll for new messages with ?since_id= instead.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    response = StreamingHttpResponse(stream_events(request.user.id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # stop nginx from buffering the stream
+    return response
+
+
+async def stream_events(user_id):
+    subscription = events.get_backend().subscribe(user_id)
+    keepalive = events.get_setting("KEEPALIVE_SECONDS")
+    try:
+        # Reconnect delay for EventSource; also flushes headers straight away
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await subscription.get(timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,40 @@
+# profiles/management/commands/reconcile_sitter_ratings.py
+from django.core.management.base import BaseCommand
+
+from profiles.ratings import recalculate_sitter_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes sitters' review_count, rating_sum, star histogram and "
+        "avg_rating from the review table, one batch of sitters per "
+        "transaction, fixing any drift left by bulk edits that bypass the review "
+        "signals. Each batch locks its sitter rows while it runs, so reviews "
+        "posted for those sitters wait for it rather than being miscounted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sitter',
+            type=int,
+            action='append',
+            dest='sitter_ids',
+            help='Only reconcile this sitter profile id (repeatable)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Sitters recalculated per transaction (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        corrected = recalculate_sitter_ratings(
+            options['sitter_ids'],
+            batch_size=options['batch_size'],
+            progress=self.report_progress if options['verbosity'] >= 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Corrected ratings for {corrected} sitter(s)'))
+
+    def report_progress(self, done, total, corrected):
+        self.stdout.write(f'  {done}/{total} sitter(s) processed, {corrected} corrected')
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:15
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Round
+
+
+def backfill_rating_counters(apps, schema_editor):
+    # Set-based: one UPDATE for the totals, one for the averages derived from them
+    SitterProfile = apps.get_model("profiles", "SitterProfile")
+    Review = apps.get_model("review", "Review")
+    per_sitter = Review.objects.filter(sitter=OuterRef("pk")).values("sitter")
+
+    SitterProfile.objects.update(
+        review_count=Coalesce(Subquery(per_sitter.annotate(c=Count("pk")).values("c")), Value(0)),
+        rating_sum=Coalesce(Subquery(per_sitter.annotate(s=Sum("rating")).values("s")), Value(0)),
+    )
+    SitterProfile.objects.filter(review_count__gt=0).update(
+        avg_rating=Cast(
+            Round(Cast(F("rating_sum"), DecimalField(max_digits=12, decimal_places=2)) / F("review_count"), 2),
+            FloatField(),
+        )
+    )
+    SitterProfile.objects.filter(review_count=0).update(avg_rating=0.0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0007_alter_ownerprofile_name_alter_ownerprofile_phone_and_more"),
+        ("review", "0002_alter_review_unique_together_alter_review_booking_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sitterprofile",
+            name="rating_sum",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="sitterprofile",
+            name="review_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_counters, migrations.RunPython.noop),
+    ]
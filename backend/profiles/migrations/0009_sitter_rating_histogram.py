@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_histogram(apps, schema_editor):
+    # One UPDATE filling all five star counters from correlated counts
+    SitterProfile = apps.get_model("profiles", "SitterProfile")
+    Review = apps.get_model("review", "Review")
+    per_sitter = Review.objects.filter(sitter=OuterRef("pk")).values("sitter")
+
+    SitterProfile.objects.update(
+        **{
+            f"rating_{star}_count": Coalesce(
+                Subquery(per_sitter.filter(rating=star).annotate(c=Count("pk")).values("c")),
+                Value(0),
+            )
+            for star in range(1, 6)
+        }
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0008_sitter_rating_counters"),
+        ("review", "0003_review_rating_check"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sitterprofile",
+            name="rating_1_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="sitterprofile",
+            name="rating_2_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="sitterprofile",
+            name="rating_3_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="sitterprofile",
+            name="rating_4_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="sitterprofile",
+            name="rating_5_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_histogram, migrations.RunPython.noop),
+    ]
@@ -147,6 +147,16 @@ class SitterProfile(models.Model):
     service_radius_km = models.IntegerField(default=5)
     home_zip = models.CharField(max_length=20, blank=True, default='')
     avg_rating = models.FloatField(default=0.0)
+    # Running review totals, kept in step by F() updates (see profiles/ratings.py);
+    # avg_rating is derived from them in the same UPDATE
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    # Star histogram: number of reviews with each rating
+    rating_1_count = models.IntegerField(default=0)
+    rating_2_count = models.IntegerField(default=0)
+    rating_3_count = models.IntegerField(default=0)
+    rating_4_count = models.IntegerField(default=0)
+    rating_5_count = models.IntegerField(default=0)
     verification_status = models.CharField(max_length=20, default="PENDING")
     phone = models.CharField(max_length=20, blank=True, null=True)
 
@@ -163,7 +173,23 @@ class SitterProfile(models.Model):
     def __str__(self):
         return f"{self.display_name} (Sitter)"
 
+    def rating_histogram(self):
+        # {star: review count} from the maintained counters
+        return {star: getattr(self, f"rating_{star}_count") for star in range(1, 6)}
+
+    # Only written by profiles/ratings.py; full saves of a stale instance must not clobber them
+    RATING_FIELDS = (
+        "avg_rating", "review_count", "rating_sum",
+        "rating_1_count", "rating_2_count", "rating_3_count", "rating_4_count", "rating_5_count",
+    )
+
     def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.RATING_FIELDS
+            ]
+
         # Delete old profile/banner images if replaced to prevent orphaned files
         if self.pk:
             old = SitterProfile.objects.filter(pk=self.pk).first()
@@ -0,0 +1,202 @@
+from django.db import connection, transaction
+from django.db.models import Case, Count, DecimalField, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Round
+
+from .models import SitterProfile
+
+STARS = (1, 2, 3, 4, 5)
+
+
+def star_field(star):
+    # Histogram counter column for a star rating, e.g. rating_5_count
+    return f"rating_{star}_count"
+
+
+# Columns reconcile_sitter_ratings recomputes
+RATING_COLUMNS = ["review_count", "rating_sum", "avg_rating"] + [star_field(star) for star in STARS]
+
+
+def rating_updates(count_delta, sum_delta, star_deltas=None):
+    """
+    UPDATE ... SET values adding the deltas to a sitter's review_count,
+    rating_sum and star histogram, with avg_rating derived from the new
+    totals in the same statement. Every F() reads the pre-update row, so
+    concurrent reviews for one sitter serialize on the row lock and never
+    lose a count.
+    """
+    count = F("review_count") + count_delta
+    total = F("rating_sum") + sum_delta
+    # numeric division: PostgreSQL only rounds numeric values to a precision
+    average = Round(Cast(total, DecimalField(max_digits=12, decimal_places=2)) / count, 2)
+    updates = {
+        "review_count": count,
+        "rating_sum": total,
+        "avg_rating": Case(
+            When(review_count__gt=-count_delta, then=Cast(average, FloatField())),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    }
+    for star, delta in (star_deltas or {}).items():
+        if delta:
+            updates[star_field(star)] = F(star_field(star)) + delta
+    return updates
+
+
+def apply_review_change(sitter_id, added=None, removed=None):
+    """
+    Constant-time rating maintenance: move one review's rating into (added)
+    and/or out of (removed) a sitter's totals with a single-row UPDATE.
+    """
+    if sitter_id is None or added == removed:
+        return
+    count_delta = (added is not None) - (removed is not None)
+    sum_delta = (added or 0) - (removed or 0)
+    star_deltas = {}
+    if added is not None:
+        star_deltas[added] = star_deltas.get(added, 0) + 1
+    if removed is not None:
+        star_deltas[removed] = star_deltas.get(removed, 0) - 1
+    SitterProfile.objects.filter(pk=sitter_id).update(**rating_updates(count_delta, sum_delta, star_deltas))
+
+
+@transaction.atomic
+def reconcile_sitter_ratings(sitter_ids=None):
+    """
+    Recompute review_count, rating_sum, the star histogram and avg_rating from
+    the review table for the given sitters (or all of them). Only rows that
+    drifted are written; returns how many were corrected.
+
+    The sitter rows are locked (in id order) before the reviews are counted.
+    apply_review_change takes the same row lock, so a review committing
+    concurrently is either already visible to the count or applies its delta
+    after the corrected totals are written, never lost in between.
+    """
+    locked = SitterProfile.objects.order_by("pk").select_for_update()
+    if sitter_ids is not None:
+        sitter_ids = list(sitter_ids)
+        locked = locked.filter(pk__in=sitter_ids)
+    list(locked.values_list("pk", flat=True))
+
+    if connection.vendor == "postgresql":
+        return _reconcile_grouped_update(sitter_ids)
+    return _reconcile_orm(sitter_ids)
+
+
+def _reconcile_grouped_update(sitter_ids):
+    # PostgreSQL: one grouped UPDATE ... FROM (aggregate FILTER, = ANY(array))
+    from review.models import Review
+
+    sitters = connection.ops.quote_name(SitterProfile._meta.db_table)
+    reviews = connection.ops.quote_name(Review._meta.db_table)
+    params = []
+    review_filter = sitter_filter = ""
+    if sitter_ids is not None:
+        review_filter = "WHERE sitter_id = ANY(%s)"
+        sitter_filter = "AND s.id = ANY(%s)"
+        params = [sitter_ids, sitter_ids]
+
+    columns = RATING_COLUMNS
+    star_aggregates = "".join(
+        f", COUNT(*) FILTER (WHERE rating = {star}) AS {star_field(star)}" for star in STARS
+    )
+    star_values = "".join(f", COALESCE(agg.{star_field(star)}, 0) AS {star_field(star)}" for star in STARS)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {sitters} AS sp
+            SET {", ".join(f"{column} = fresh.{column}" for column in columns)}
+            FROM (
+                SELECT s.id,
+                       COALESCE(agg.review_count, 0) AS review_count,
+                       COALESCE(agg.rating_sum, 0) AS rating_sum,
+                       COALESCE(ROUND(agg.rating_sum::numeric / agg.review_count, 2), 0)::float8 AS avg_rating
+                       {star_values}
+                FROM {sitters} AS s
+                LEFT JOIN (
+                    SELECT sitter_id, COUNT(*) AS review_count, SUM(rating) AS rating_sum {star_aggregates}
+                    FROM {reviews} {review_filter}
+                    GROUP BY sitter_id
+                ) AS agg ON agg.sitter_id = s.id
+                WHERE TRUE {sitter_filter}
+            ) AS fresh
+            WHERE sp.id = fresh.id
+              AND ({", ".join(f"sp.{column}" for column in columns)})
+                  IS DISTINCT FROM ({", ".join(f"fresh.{column}" for column in columns)})
+            """,
+            params,
+        )
+        return cursor.rowcount
+
+
+def _reconcile_orm(sitter_ids):
+    # Other databases: one grouped aggregate query, then bulk_update of the drifted rows
+    from review.models import Review
+
+    reviews = Review.objects.all()
+    sitters = SitterProfile.objects.only("pk", *RATING_COLUMNS)
+    if sitter_ids is not None:
+        reviews = reviews.filter(sitter_id__in=sitter_ids)
+        sitters = sitters.filter(pk__in=sitter_ids)
+    aggregates = {
+        row.pop("sitter_id"): row
+        for row in reviews.values("sitter_id").order_by().annotate(
+            review_count=Count("pk"),
+            rating_sum=Sum("rating"),
+            **{star_field(star): Count("pk", filter=Q(rating=star)) for star in STARS},
+        )
+    }
+
+    drifted = []
+    for sitter in sitters:
+        fresh = aggregates.get(sitter.pk, {})
+        values = {column: fresh.get(column, 0) for column in RATING_COLUMNS if column != "avg_rating"}
+        count = values["review_count"]
+        values["avg_rating"] = round(values["rating_sum"] / count, 2) if count else 0.0
+        if any(getattr(sitter, column) != value for column, value in values.items()):
+            for column, value in values.items():
+                setattr(sitter, column, value)
+            drifted.append(sitter)
+    SitterProfile.objects.bulk_update(drifted, RATING_COLUMNS)
+    return len(drifted)
+
+
+def recalculate_sitter_ratings(sitter_ids=None, batch_size=1000, progress=None):
+    """
+    Bulk form of reconcile_sitter_ratings for large tables: walk the sitters
+    (the given ids, or all of them by primary key) in batches of batch_size,
+    each locked and reconciled in its own short transaction, so row locks
+    are never held across the whole run. progress, if given, is
+    called after every batch as progress(done, total, corrected). Returns
+    the number of sitters corrected.
+    """
+    if sitter_ids is not None:
+        pending = sorted(set(sitter_ids))
+        total = len(pending)
+        batches = (pending[i:i + batch_size] for i in range(0, total, batch_size))
+    else:
+        total = SitterProfile.objects.count()
+        batches = _all_sitter_batches(batch_size)
+
+    done = corrected = 0
+    for batch in batches:
+        with transaction.atomic():
+            corrected += reconcile_sitter_ratings(batch)
+        done += len(batch)
+        if progress:
+            progress(done, total, corrected)
+    return corrected
+
+
+def _all_sitter_batches(batch_size):
+    # Keyset walk over sitter ids; rows added mid-run are picked up at the end
+    last_id = 0
+    while True:
+        batch = list(
+            SitterProfile.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
@@ -1,18 +1,35 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import Avg
 from django.apps import apps
 
+from . import ratings
+
 SitterProfile = apps.get_model('profiles', 'SitterProfile')
 Review = apps.get_model('review', 'Review')
 
-@receiver([post_save, post_delete], sender=Review)
-def update_sitter_avg_rating(sender, instance, **kwargs):
+@receiver(post_save, sender=Review)
+def apply_review_to_sitter_rating(sender, instance, created, **kwargs):
+    """
+    Adjust the sitter's review totals, star histogram and derived avg_rating
+    by exactly what this save changed, in the review's transaction.
+    """
+    old_sitter_id, old_rating = getattr(instance, "_stored_rating", (None, None))
+    if created:
+        ratings.apply_review_change(instance.sitter_id, added=instance.rating)
+    elif old_sitter_id is None or old_rating is None:
+        # Saved without being loaded from the DB; the old values are unknown
+        ratings.reconcile_sitter_ratings([instance.sitter_id])
+    elif old_sitter_id != instance.sitter_id:
+        ratings.apply_review_change(old_sitter_id, removed=old_rating)
+        ratings.apply_review_change(instance.sitter_id, added=instance.rating)
+    else:
+        ratings.apply_review_change(instance.sitter_id, added=instance.rating, removed=old_rating)
+    instance._stored_rating = (instance.sitter_id, instance.rating)
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_sitter_rating(sender, instance, **kwargs):
     """
-    Update the sitter's avg_rating whenever a review is created, updated, or deleted.
+    Take a deleted review back out of the sitter's totals.
     """
-    sitter = instance.sitter
-    avg = sitter.reviews.aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0
-    sitter.avg_rating = round(avg, 2)
-    sitter.save(update_fields=['avg_rating'])
- 
\ No newline at end of file
+    sitter_id, rating = getattr(instance, "_stored_rating", (instance.sitter_id, instance.rating))
+    ratings.apply_review_change(sitter_id, removed=rating)
@@ -5,6 +5,8 @@ from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticate
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from accounts.roles import role_profile
+from core.throttling import ScopedTokenBucketThrottle
 from .models import SitterProfile, OwnerProfile, Pet, Tag, Specialty
 from .serializers import (
     PublicSitterCardSerializer,
@@ -51,6 +53,14 @@ class SitterProfileViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAuthenticated()]
 
+    # Public search is the scrapers' favourite endpoint, so it is rate limited
+    throttle_scope = "sitter_search"
+
+    def get_throttles(self):
+        if self.action == "list":
+            return [ScopedTokenBucketThrottle()]
+        return super().get_throttles()
+
     # ---------- CREATE / UPDATE / DELETE ----------
     def perform_create(self, serializer):
         # Assign the authenticated user to the profile on create
@@ -193,38 +203,23 @@ class PetViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # Return pets only for the authenticated owner
-        owner_id = self.kwargs.get("owner_pk")
-
-        try:
-            owner = OwnerProfile.objects.get(pk=owner_id)
-        except OwnerProfile.DoesNotExist:
-            raise PermissionDenied("Owner profile not found.")
-
-        try:
-            request_owner_profile = self.request.user.owner_profile
-        except AttributeError:
+        # The URL's owner is compared by id with the request's profile; no lookup needed
+        owner = role_profile(self.request, "OWNER")
+        if owner is None:
             raise PermissionDenied("You must have an owner profile to access pets.")
 
-        if owner != request_owner_profile:
+        if str(owner.pk) != str(self.kwargs.get("owner_pk")):
             raise PermissionDenied("You cannot access pets of another owner.")
 
         return owner.pets.all()
 
     def perform_create(self, serializer):
         # Assign pet to the authenticated owner
-        owner_id = self.kwargs.get("owner_pk")
-
-        try:
-            owner = OwnerProfile.objects.get(pk=owner_id)
-        except OwnerProfile.DoesNotExist:
-            raise PermissionDenied("Owner profile not found.")
-
-        try:
-            request_owner_profile = self.request.user.owner_profile
-        except AttributeError:
+        owner = role_profile(self.request, "OWNER")
+        if owner is None:
             raise PermissionDenied("You must have an owner profile to add pets.")
 
-        if owner != request_owner_profile:
+        if str(owner.pk) != str(self.kwargs.get("owner_pk")):
             raise PermissionDenied("You cannot add pets to another owner.")
 
         serializer.save(owner=owner)
@@ -232,10 +227,8 @@ class PetViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_pets(self, request):
         # Return the authenticated user's pets
-        try:
-            owner = request.user.owner_profile
-            pets = owner.pets.all()
-            serializer = self.get_serializer(pets, many=True)
-            return Response(serializer.data)
-        except OwnerProfile.DoesNotExist:
+        owner = role_profile(request, "OWNER")
+        if owner is None:
             return Response({"detail": "You do not have an associated owner profile."}, status=400)
+        serializer = self.get_serializer(owner.pets.all(), many=True)
+        return Response(serializer.data)
@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from django.db.models import Avg
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from profiles.ratings import recalculate_sitter_ratings
 from .models import Review
 
 
@@ -85,8 +87,8 @@ class ReviewAdmin(admin.ModelAdmin):
 
     def sitter_link(self, obj):
         url = reverse("admin:profiles_sitterprofile_change", args=[obj.sitter.id])
-        avg = obj.sitter.reviews.aggregate(avg=Avg('rating'))['avg'] or 0
-        avg_rounded = round(avg, 1)
+        # Maintained on the sitter row, so no per-row aggregate
+        avg_rounded = round(obj.sitter.avg_rating or 0, 1)
         return format_html(
             '<a href="{}">{}</a><br><small style="color: #6c757d;">Avg: {} ⭐</small>',
             url, obj.sitter.display_name, avg_rounded
@@ -96,7 +98,9 @@ class ReviewAdmin(admin.ModelAdmin):
 
     def owner_link(self, obj):
         url = reverse("admin:profiles_ownerprofile_change", args=[obj.owner.id])
-        review_count = obj.owner.reviews.count()
+        review_count = getattr(obj, 'owner_review_count', None)
+        if review_count is None:
+            review_count = obj.owner.reviews.count()
         return format_html(
             '<a href="{}">{}</a><br><small style="color: #6c757d;">{} reviews</small>',
             url, obj.owner.name, review_count
@@ -148,13 +152,13 @@ class ReviewAdmin(admin.ModelAdmin):
 
     def sitter_rating_impact(self, obj):
         """Show how this review impacts the sitter's average rating"""
-        reviews = obj.sitter.reviews.all()
-        total_reviews = reviews.count()
-        avg_rating = reviews.aggregate(avg=Avg('rating'))['avg'] or 0
+        # Derived from the sitter's maintained totals instead of aggregating its reviews
+        sitter = obj.sitter
+        total_reviews = sitter.review_count
+        avg_rating = sitter.avg_rating or 0
         
         if total_reviews > 1:
-            other_reviews = reviews.exclude(pk=obj.pk)
-            avg_without = other_reviews.aggregate(avg=Avg('rating'))['avg'] or 0
+            avg_without = (sitter.rating_sum - obj.rating) / (total_reviews - 1)
             impact = avg_rating - avg_without
             impact_color = '#28a745' if impact >= 0 else '#dc3545'
             impact_sign = '+' if impact >= 0 else ''
@@ -164,81 +168,78 @@ class ReviewAdmin(admin.ModelAdmin):
             impact_color = '#007bff'
             impact_sign = ''
         
+        # format_html escapes its arguments to strings, so numbers are formatted first
         return format_html(
             '<div style="padding: 10px; background: #f8f9fa; border-radius: 4px;">'
             '<p><strong>Total Reviews:</strong> {}</p>'
-            '<p><strong>Current Average:</strong> {:.2f} ⭐</p>'
-            '<p><strong>Without This Review:</strong> {:.2f} ⭐</p>'
-            '<p><strong>Impact:</strong> <span style="color: {}; font-weight: bold;">{}{:.2f}</span></p>'
+            '<p><strong>Current Average:</strong> {} ⭐</p>'
+            '<p><strong>Without This Review:</strong> {} ⭐</p>'
+            '<p><strong>Impact:</strong> <span style="color: {}; font-weight: bold;">{}{}</span></p>'
             '</div>',
             total_reviews,
-            avg_rating,
-            avg_without,
+            f'{avg_rating:.2f}',
+            f'{avg_without:.2f}',
             impact_color,
             impact_sign,
-            impact
+            f'{impact:.2f}'
         )
     sitter_rating_impact.short_description = "Rating Impact"
 
     def recalculate_sitter_ratings(self, request, queryset):
         """Recalculate average ratings for all affected sitters"""
-        sitters = set(review.sitter for review in queryset)
-        updated_count = 0
-        
-        for sitter in sitters:
-            avg = sitter.reviews.aggregate(avg=Avg('rating'))['avg'] or 0.0
-            sitter.avg_rating = round(avg, 1)
-            sitter.save()
-            updated_count += 1
-        
+        sitter_ids = set(queryset.values_list('sitter_id', flat=True))
+        corrected = recalculate_sitter_ratings(sitter_ids)
+
         self.message_user(
             request,
-            "Recalculated ratings for {} sitter(s).".format(updated_count)
+            "Recalculated ratings for {} sitter(s), {} corrected.".format(len(sitter_ids), corrected)
         )
     recalculate_sitter_ratings.short_description = "Recalculate sitter ratings from selected reviews"
 
     def get_queryset(self, request):
-        # Optimize queries
+        # Optimize queries: related rows are joined and the owner's review
+        # count comes from one correlated subquery instead of a query per row
         qs = super().get_queryset(request)
+        owner_reviews = (
+            Review.objects.filter(owner=OuterRef('owner'))
+            .order_by()
+            .values('owner')
+            .annotate(c=Count('pk'))
+            .values('c')
+        )
         return qs.select_related(
             'booking',
             'owner',
             'owner__user',
             'sitter',
             'sitter__user'
-        ).prefetch_related('sitter__reviews')
+        ).annotate(
+            owner_review_count=Coalesce(Subquery(owner_reviews, output_field=IntegerField()), Value(0))
+        )
 
     list_per_page = 25
 
     def save_model(self, request, obj, form, change):
-        """After saving, update the sitter's average rating"""
+        """After saving, report the sitter's average rating (kept current by the review signals)"""
         super().save_model(request, obj, form, change)
-        
-        avg = obj.sitter.reviews.aggregate(avg=Avg('rating'))['avg'] or 0.0
-        obj.sitter.avg_rating = round(avg, 1)
-        obj.sitter.save()
-        
-        avg_display = round(avg, 1)
+        obj.sitter.refresh_from_db(fields=['avg_rating'])
+
         self.message_user(
             request,
             "Review saved. {}'s average rating updated to {} ⭐".format(
-                obj.sitter.display_name, avg_display
+                obj.sitter.display_name, round(obj.sitter.avg_rating, 1)
             )
         )
 
     def delete_model(self, request, obj):
-        """After deleting, update the sitter's average rating"""
+        """After deleting, report the sitter's average rating (kept current by the review signals)"""
         sitter = obj.sitter
         super().delete_model(request, obj)
-        
-        avg = sitter.reviews.aggregate(avg=Avg('rating'))['avg'] or 0.0
-        sitter.avg_rating = round(avg, 1)
-        sitter.save()
-        
-        avg_display = round(avg, 1)
+        sitter.refresh_from_db(fields=['avg_rating'])
+
         self.message_user(
             request,
             "Review deleted. {}'s average rating updated to {} ⭐".format(
-                sitter.display_name, avg_display
+                sitter.display_name, round(sitter.avg_rating, 1)
             )
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0005_booking_expired_status_sweep_indexes"),
+        ("profiles", "0008_sitter_rating_counters"),
+        ("review", "0002_alter_review_unique_together_alter_review_booking_and_more"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="review",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("rating__gte", 1), ("rating__lte", 5)),
+                name="review_rating_1_to_5",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0005_booking_expired_status_sweep_indexes"),
+        ("profiles", "0009_sitter_rating_histogram"),
+        ("review", "0003_review_rating_check"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["sitter", "-created_at"], name="review_sitter_created"
+            ),
+        ),
+    ]
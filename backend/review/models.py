@@ -1,7 +1,6 @@
 # review/models.py
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.db.models import Avg
 from booking.models import Booking
 from profiles.models import SitterProfile, OwnerProfile
 
@@ -27,30 +26,40 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ('booking', 'sitter')
+        indexes = [
+            # Public sitter feed: filter by sitter, keyset-paginate by created_at
+            models.Index(fields=['sitter', '-created_at'], name='review_sitter_created'),
+        ]
+        constraints = [
+            # Rating bounds are enforced by the database
+            models.CheckConstraint(condition=models.Q(rating__gte=1, rating__lte=5), name='review_rating_1_to_5'),
+        ]
 
     def clean(self):
+        # Compare ids so only the booking row is needed (the API passes it pre-joined)
         # Booking must belong to owner
-        if self.booking.owner != self.owner:
+        if self.booking.owner_id != self.owner_id:
             raise ValidationError("This booking does not belong to the owner.")
 
         # Booking must have the correct sitter
-        if self.booking.sitter != self.sitter:
+        if self.booking.sitter_id != self.sitter_id:
             raise ValidationError("This sitter does not match the booking.")
 
         # Booking must be completed
         if self.booking.status != "completed":
             raise ValidationError("You can only review completed bookings.")
 
-        # Rating bounds
-        if not (1 <= self.rating <= 5):
-            raise ValidationError("Rating must be between 1 and 5.")
-
-        # Check for duplicate review
-        if self.booking_id and Review.objects.exclude(pk=self.pk).filter(booking=self.booking).exists():
-            raise ValidationError("A review for this booking already exists.")
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored sitter and rating so the rating counters can apply exact deltas
+        instance._stored_rating = (instance.__dict__.get("sitter_id"), instance.__dict__.get("rating"))
+        return instance
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        # FK existence, the one-review-per-booking rule and rating bounds are left to
+        # the database constraints; only the cross-row booking rules are checked here
+        self.full_clean(exclude=['booking', 'owner', 'sitter'], validate_unique=False, validate_constraints=False)
         super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class SitterReviewCursorPagination(CursorPagination):
+    # Keyset pagination over one sitter's reviews, newest first
+    # Rides the (sitter, created_at) index, so each page costs O(page_size)
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-created_at"
@@ -1,8 +1,15 @@
 # review/serializers.py
+from django.db import IntegrityError, transaction
+from django.utils.text import Truncator
 from rest_framework import serializers
+from accounts.roles import role_profile
+from booking.models import Booking
 from .models import Review
 
 class ReviewSerializer(serializers.ModelSerializer):
+    # One pre-joined fetch covers ownership, completion and the owner/sitter shown in the response
+    # Declared explicitly so DRF adds no duplicate-review UniqueValidator (the constraint catches it)
+    booking = serializers.PrimaryKeyRelatedField(queryset=Booking.objects.select_related('owner', 'sitter'))
     owner_name = serializers.CharField(source='owner.name', read_only=True)
     sitter_name = serializers.CharField(source='sitter.display_name', read_only=True)
     owner_id = serializers.IntegerField(source='owner.id', read_only=True)
@@ -26,36 +33,26 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'owner_id', 'owner_name', 'sitter_id', 'sitter_name', 'created_at']
 
     def validate(self, attrs):
-        user = self.context['request'].user
         
         # Only validate booking-related stuff on create
         if not self.instance:
-            # Get owner profile (role already checked in view)
-            try:
-                owner = user.owner_profile
-            except AttributeError:
-                raise serializers.ValidationError("Owner profile not found.")
-            
             booking = attrs.get('booking')
             
             # Validate booking exists
             if not booking:
                 raise serializers.ValidationError("Booking is required.")
             
-            # Validate booking belongs to this owner
-            if booking.owner != owner:
+            # Validate booking belongs to this owner (role already checked in view)
+            owner_profile = role_profile(self.context['request'], 'OWNER')
+            if owner_profile is None or booking.owner_id != owner_profile.pk:
                 raise serializers.ValidationError("This booking does not belong to you.")
             
             # Validate booking is completed
             if booking.status != 'completed':
                 raise serializers.ValidationError("You can only review completed bookings.")
             
-            # Validate no duplicate review
-            if Review.objects.filter(booking=booking).exists():
-                raise serializers.ValidationError("A review for this booking already exists.")
-            
             # Auto-assign owner and sitter
-            attrs['owner'] = owner
+            attrs['owner'] = booking.owner
             attrs['sitter'] = booking.sitter
         
         # Validate rating bounds (for both create and update)
@@ -66,7 +63,12 @@ class ReviewSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        return super().create(validated_data)
+        # Duplicates are caught by the unique constraint on booking instead of a pre-check
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError("A review for this booking already exists.")
     
     def get_owner_profile_picture_url(self, obj):
         try:
@@ -76,3 +78,17 @@ class ReviewSerializer(serializers.ModelSerializer):
         except:
             pass
         return None
+
+
+class ReviewSnippetSerializer(serializers.ModelSerializer):
+    # Compact read-only review for the sitter rating summary
+    owner_name = serializers.CharField(source='owner.name', read_only=True)
+    snippet = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Review
+        fields = ['id', 'rating', 'snippet', 'owner_name', 'created_at']
+        read_only_fields = fields
+
+    def get_snippet(self, obj):
+        return Truncator(obj.comment or '').chars(140)
@@ -1,4 +1,9 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework.test import APIClient
@@ -7,6 +12,7 @@ from datetime import timedelta
 from decimal import Decimal
 from review.models import Review
 from booking.models import Booking
+from profiles import ratings
 from profiles.models import SitterProfile, OwnerProfile
 from availability.models import AvailabilitySlot
 
@@ -297,6 +303,19 @@ class ReviewAPITests(TestCase):
         self.assertEqual(response2.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('already exists', str(response2.data).lower())
     
+    def test_create_review_query_count(self):
+        """Test that a review POST validates with one booking fetch and no duplicate pre-checks"""
+        self.client.force_authenticate(user=self.owner_user)
+        data = {'booking': self.booking.id, 'rating': 5, 'comment': 'Great!'}
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/reviews/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['sitter_name'], 'Test Sitter')
+        # booking (joined with owner and sitter), review insert, sitter rating update
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 3)
+
     def test_rating_must_be_between_1_and_5(self):
         """Test that rating validation works"""
         self.client.force_authenticate(user=self.owner_user)
@@ -363,8 +382,61 @@ class ReviewAPITests(TestCase):
         
         response = self.client.get(f'/api/reviews/?sitter={self.sitter_profile.id}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
     
+    def add_reviews(self, count):
+        start = timezone.now() - timedelta(days=30)
+        for i in range(Review.objects.count(), Review.objects.count() + count):
+            owner_user = User.objects.create_user(username=f'feedowner{i}', password='testpass123', role='OWNER')
+            owner = OwnerProfile.objects.create(user=owner_user, name=f'Feed Owner {i}')
+            booking = Booking.objects.create(
+                owner=owner,
+                sitter=self.sitter_profile,
+                service_type='pet_walking',
+                start_ts=start + timedelta(days=i),
+                end_ts=start + timedelta(days=i, hours=2),
+                price_quote=Decimal('50.00'),
+                status='completed'
+            )
+            Review.objects.create(booking=booking, owner=owner, sitter=self.sitter_profile, rating=4)
+
+    def test_sitter_feed_is_public_and_cursor_paginated(self):
+        """Test that anyone can page through a sitter's reviews newest-first"""
+        self.add_reviews(5)
+        response = self.client.get('/api/reviews/', {'sitter': self.sitter_profile.id, 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['previous'])
+
+        seen = [r['id'] for r in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = self.client.get(next_url)
+            seen += [r['id'] for r in response.data['results']]
+            next_url = response.data['next']
+        expected = list(
+            Review.objects.filter(sitter=self.sitter_profile).order_by('-created_at').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_sitter_feed_query_count_is_constant(self):
+        """Test that the feed joins owner and sitter instead of loading them per review"""
+        url = f'/api/reviews/?sitter={self.sitter_profile.id}'
+        self.add_reviews(1)
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(url)
+        self.add_reviews(5)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(len(many.captured_queries), len(one.captured_queries))
+        self.assertEqual(len(many.captured_queries), 1)
+
+    def test_own_review_list_requires_login(self):
+        """Test that only the per-sitter feed is open to anonymous users"""
+        response = self.client.get('/api/reviews/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
     def test_owner_can_update_own_review(self):
         """Test that owner can update their own review"""
         review = Review.objects.create(
@@ -586,4 +658,197 @@ class ReviewSignalTests(TestCase):
         )
         
         self.sitter_profile.refresh_from_db()
-        self.assertEqual(self.sitter_profile.avg_rating, 4.0)  # (5+3)/2 = 4.0
\ No newline at end of file
+        self.assertEqual(self.sitter_profile.avg_rating, 4.0)  # (5+3)/2 = 4.0
+
+class SitterRatingCounterTests(TestCase):
+    """Test that review changes maintain the sitter's running rating totals"""
+
+    def setUp(self):
+        self.sitter_user = User.objects.create_user(username='testsitter', password='testpass123', role='SITTER')
+        self.sitter_profile = SitterProfile.objects.create(
+            user=self.sitter_user, display_name='Test Sitter', rate_hourly=25.00, home_zip='12345'
+        )
+        self.owner_user = User.objects.create_user(username='testowner', password='testpass123', role='OWNER')
+        self.owner_profile = OwnerProfile.objects.create(user=self.owner_user, name='Test Owner', phone='1234567890')
+        start = timezone.now() - timedelta(days=10)
+        self.bookings = [
+            Booking.objects.create(
+                owner=self.owner_profile,
+                sitter=self.sitter_profile,
+                service_type='pet_walking',
+                start_ts=start + timedelta(days=i),
+                end_ts=start + timedelta(days=i, hours=2),
+                price_quote=Decimal('50.00'),
+                status='completed'
+            )
+            for i in range(3)
+        ]
+
+    def review(self, booking, rating):
+        return Review.objects.create(
+            booking=booking, owner=self.owner_profile, sitter=self.sitter_profile, rating=rating
+        )
+
+    def assertTotals(self, count, total, avg):
+        self.sitter_profile.refresh_from_db()
+        self.assertEqual(
+            (self.sitter_profile.review_count, self.sitter_profile.rating_sum, self.sitter_profile.avg_rating),
+            (count, total, avg)
+        )
+
+    def test_counters_follow_create_update_delete(self):
+        """Test that totals and average track every review change"""
+        first = self.review(self.bookings[0], 5)
+        self.review(self.bookings[1], 4)
+        third = self.review(self.bookings[2], 4)
+        self.assertTotals(3, 13, 4.33)
+
+        third = Review.objects.get(pk=third.pk)
+        third.rating = 1
+        third.save()
+        self.assertTotals(3, 10, 3.33)
+
+        first.delete()
+        self.assertTotals(2, 5, 2.5)
+
+    def test_review_save_does_not_aggregate(self):
+        """Test that a review insert updates the sitter without scanning its reviews"""
+        self.review(self.bookings[0], 5)
+        with CaptureQueriesContext(connection) as ctx:
+            self.review(self.bookings[1], 3)
+        sql = " ".join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('AVG(', sql)
+        self.assertNotIn('COUNT(', sql.split('INSERT INTO "review_review"')[-1])
+        self.assertTotals(2, 8, 4.0)
+
+    def test_stale_profile_save_keeps_totals(self):
+        """Test that saving an outdated sitter instance does not overwrite the totals"""
+        stale = SitterProfile.objects.get(pk=self.sitter_profile.pk)
+        self.review(self.bookings[0], 5)
+        stale.bio = 'Updated bio'
+        stale.save()
+        self.assertTotals(1, 5, 5.0)
+
+    def test_reconcile_command_fixes_drift(self):
+        """Test that the reconcile command repairs totals changed behind the signals' back"""
+        self.review(self.bookings[0], 5)
+        self.review(self.bookings[1], 3)
+        Review.objects.filter(booking=self.bookings[1]).update(rating=1)
+        self.assertTotals(2, 8, 4.0)
+
+        out = StringIO()
+        call_command('reconcile_sitter_ratings', stdout=out)
+        self.assertIn('Corrected ratings for 1 sitter(s)', out.getvalue())
+        self.assertTotals(2, 6, 3.0)
+
+        out = StringIO()
+        call_command('reconcile_sitter_ratings', stdout=out)
+        self.assertIn('Corrected ratings for 0 sitter(s)', out.getvalue())
+
+    def test_reconcile_locks_sitters_before_counting(self):
+        """Test that reconcile locks the sitter rows before it aggregates the reviews"""
+        self.review(self.bookings[0], 5)
+        with CaptureQueriesContext(connection) as ctx:
+            ratings.reconcile_sitter_ratings([self.sitter_profile.id])
+        sql = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertIn('FOR UPDATE', sql[0])
+        self.assertIn('UPDATE', sql[1])
+
+    def test_reconcile_orm_fallback_matches(self):
+        """Test that the portable reconcile path repairs the same drift"""
+        self.review(self.bookings[0], 5)
+        self.review(self.bookings[1], 3)
+        Review.objects.filter(booking=self.bookings[1]).update(rating=1)
+
+        self.assertEqual(ratings._reconcile_orm([self.sitter_profile.id]), 1)
+        self.assertTotals(2, 6, 3.0)
+        self.sitter_profile.refresh_from_db()
+        self.assertEqual(self.sitter_profile.rating_histogram(), {1: 1, 2: 0, 3: 0, 4: 0, 5: 1})
+        self.assertEqual(ratings._reconcile_orm(None), 0)
+
+    def test_histogram_follows_review_changes(self):
+        """Test that the per-star counters move with each create, update, delete and reconcile"""
+        first = self.review(self.bookings[0], 5)
+        second = self.review(self.bookings[1], 4)
+        self.sitter_profile.refresh_from_db()
+        self.assertEqual(self.sitter_profile.rating_histogram(), {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        second = Review.objects.get(pk=second.pk)
+        second.rating = 2
+        second.save()
+        first.delete()
+        self.sitter_profile.refresh_from_db()
+        self.assertEqual(self.sitter_profile.rating_histogram(), {1: 0, 2: 1, 3: 0, 4: 0, 5: 0})
+
+        Review.objects.filter(pk=second.pk).update(rating=3)
+        call_command('reconcile_sitter_ratings', stdout=StringIO())
+        self.sitter_profile.refresh_from_db()
+        self.assertEqual(self.sitter_profile.rating_histogram(), {1: 0, 2: 0, 3: 1, 4: 0, 5: 0})
+
+    def test_summary_endpoint(self):
+        """Test that the public summary serves the histogram, average and recent snippets"""
+        for booking, rating in zip(self.bookings, (5, 4, 5)):
+            Review.objects.create(
+                booking=booking, owner=self.owner_profile, sitter=self.sitter_profile,
+                rating=rating, comment='Great walk! ' * 20
+            )
+        client = APIClient()
+        url = '/api/reviews/summary/'
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, {'sitter': self.sitter_profile.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn('GROUP BY', " ".join(q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(response.data['review_count'], 3)
+        self.assertEqual(response.data['avg_rating'], 4.67)
+        self.assertEqual(response.data['histogram'], {'1': 0, '2': 0, '3': 0, '4': 1, '5': 2})
+        self.assertEqual(len(response.data['recent']), 3)
+        recent = response.data['recent'][0]
+        self.assertEqual(recent['owner_name'], 'Test Owner')
+        self.assertLessEqual(len(recent['snippet']), 140)
+        self.assertTrue(recent['snippet'].endswith('…'))
+
+        self.assertEqual(client.get(url, {'sitter': 999999}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reconcile_command_batches_with_progress(self):
+        """Test that the reconcile command works through sitters in batches and reports progress"""
+        other_user = User.objects.create_user(username='othersitter', password='testpass123', role='SITTER')
+        SitterProfile.objects.create(user=other_user, display_name='Other Sitter', rate_hourly=20.00, home_zip='54321')
+        self.review(self.bookings[0], 5)
+        Review.objects.filter(booking=self.bookings[0]).update(rating=2)
+
+        out = StringIO()
+        call_command('reconcile_sitter_ratings', '--batch-size', '1', stdout=out)
+        self.assertIn('1/2 sitter(s) processed', out.getvalue())
+        self.assertIn('2/2 sitter(s) processed, 1 corrected', out.getvalue())
+        self.assertTotals(1, 2, 2.0)
+
+    def test_admin_changelist_query_count_is_constant(self):
+        """Test that the review admin list shows ratings without a query per row"""
+        admin_user = User.objects.create_superuser(username='admin', password='adminpass123', email='a@example.com')
+        self.client.force_login(admin_user)
+        url = reverse('admin:review_review_changelist')
+
+        self.review(self.bookings[0], 5)
+        with CaptureQueriesContext(connection) as one:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.review(self.bookings[1], 4)
+        self.review(self.bookings[2], 3)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(many.captured_queries), len(one.captured_queries))
+
+    def test_admin_rating_impact_uses_totals(self):
+        """Test that the admin impact panel is computed from the sitter's maintained totals"""
+        from django.contrib.admin.sites import site
+
+        self.review(self.bookings[0], 5)
+        review = self.review(self.bookings[1], 3)
+        review = Review.objects.select_related('sitter').get(pk=review.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            html = site._registry[Review].sitter_rating_impact(review)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertIn('4.00', html)
+        self.assertIn('5.00', html)
+        self.assertIn('-1.00', html)
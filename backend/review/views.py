@@ -1,32 +1,67 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, status
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
+from accounts.roles import role_profile
+from core.idempotency import IdempotentCreateMixin
+from profiles.models import SitterProfile
 from .models import Review
-from .serializers import ReviewSerializer
+from .pagination import SitterReviewCursorPagination
+from .serializers import ReviewSerializer, ReviewSnippetSerializer
 
-class ReviewViewSet(viewsets.ModelViewSet):
+SUMMARY_RECENT_REVIEWS = 3
+
+class ReviewViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Review.objects.all()
 
+    pagination_class = SitterReviewCursorPagination
+
+    # The public per-sitter feed is readable anonymously; everything else needs a login
+    def get_permissions(self):
+        if self.action == 'list' and self.request.query_params.get('sitter'):
+            return [permissions.AllowAny()]
+        return super().get_permissions()
+
     def get_queryset(self):
         user = self.request.user
         sitter_id = self.request.query_params.get('sitter')
-        
+        # owner/sitter are joined in for owner_name, sitter_name and the profile picture
+        reviews = Review.objects.select_related('owner', 'sitter')
+
         # If sitter_id provided, return reviews for that sitter (public view)
         if sitter_id:
-            return Review.objects.filter(sitter_id=sitter_id).order_by('-created_at')
+            if not sitter_id.isdigit():
+                raise ValidationError({'sitter': 'A sitter id is required.'})
+            return reviews.filter(sitter_id=sitter_id).order_by('-created_at')
         
         # Otherwise, filter by role
+        profile = role_profile(self.request)
+        if profile is None:
+            return Review.objects.none()
         if user.role == 'OWNER':
             # Owners see their own reviews
-            return Review.objects.filter(owner=user.owner_profile).order_by('-created_at')
+            return reviews.filter(owner=profile).order_by('-created_at')
         elif user.role == 'SITTER':
             # Sitters see reviews about them
-            return Review.objects.filter(sitter=user.sitter_profile).order_by('-created_at')
+            return reviews.filter(sitter=profile).order_by('-created_at')
         
         return Review.objects.none()
 
+    # Only the public sitter feed is paginated (cursor on created_at); an
+    # owner's or sitter's own review list stays a plain array
+    def paginate_queryset(self, queryset):
+        if not self.request.query_params.get('sitter'):
+            return None
+        return super().paginate_queryset(queryset)
+
+    # Reviews belong to an owner profile; compare ids against the request's one
+    def is_review_owner(self, review):
+        owner = role_profile(self.request, 'OWNER')
+        return owner is not None and review.owner_id == owner.pk
+
     def create(self, request, *args, **kwargs):
         # Check permission BEFORE validation
         if request.user.role != 'OWNER':
@@ -36,20 +71,43 @@ class ReviewViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         # Check permission BEFORE validation
         review = self.get_object()
-        if review.owner.user != request.user:
+        if not self.is_review_owner(review):
             raise PermissionDenied("You can only update your own reviews.")
         return super().update(request, *args, **kwargs)
     
     def partial_update(self, request, *args, **kwargs):
         # Check permission BEFORE validation
         review = self.get_object()
-        if review.owner.user != request.user:
+        if not self.is_review_owner(review):
             raise PermissionDenied("You can only update your own reviews.")
         return super().partial_update(request, *args, **kwargs)
     
     def destroy(self, request, *args, **kwargs):
         # Check permission BEFORE deletion
         review = self.get_object()
-        if review.owner.user != request.user:
+        if not self.is_review_owner(review):
             raise PermissionDenied("You can only delete your own reviews.")
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+        return super().destroy(request, *args, **kwargs)
+
+    # GET /api/reviews/summary/?sitter=<id>
+    # Star histogram and average come straight off the sitter's maintained
+    # counters; only the few recent snippets touch the review table
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
+    def summary(self, request):
+        sitter_id = request.query_params.get('sitter')
+        if not sitter_id or not sitter_id.isdigit():
+            raise ValidationError({'sitter': 'A sitter id is required.'})
+
+        sitter = get_object_or_404(SitterProfile.objects.only(*SitterProfile.RATING_FIELDS), pk=sitter_id)
+        recent = (
+            Review.objects.filter(sitter_id=sitter.pk)
+            .select_related('owner')
+            .order_by('-created_at')[:SUMMARY_RECENT_REVIEWS]
+        )
+        return Response({
+            'sitter_id': sitter.pk,
+            'review_count': sitter.review_count,
+            'avg_rating': sitter.avg_rating,
+            'histogram': {str(star): count for star, count in sitter.rating_histogram().items()},
+            'recent': ReviewSnippetSerializer(recent, many=True).data,
+        })
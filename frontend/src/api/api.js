@@ -7,10 +7,15 @@ const API = axios.create({
 });
 
 // Add a request interceptor to always include the latest token
+// A JWT access token is preferred; the legacy auth token is the fallback
 API.interceptors.request.use(
   (config) => {
+    if (config.headers.Authorization) return config;
+    const access = localStorage.getItem("access");
     const token = localStorage.getItem("token");
-    if (token) {
+    if (access) {
+      config.headers.Authorization = `Bearer ${access}`;
+    } else if (token) {
       config.headers.Authorization = `Token ${token}`;
     }
     return config;
@@ -18,6 +23,34 @@ API.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// Access tokens are short-lived: on a 401, rotate the refresh token once and retry
+// If the refresh is rejected, drop the JWT pair and retry with the legacy token
+let refreshing = null;
+API.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    const refresh = localStorage.getItem("refresh");
+    if (error.response?.status !== 401 || !refresh || original._retried) {
+      return Promise.reject(error);
+    }
+    original._retried = true;
+    try {
+      refreshing = refreshing || axios.post(`${API.defaults.baseURL}token/refresh/`, { refresh });
+      const { data } = await refreshing;
+      localStorage.setItem("access", data.access);
+      localStorage.setItem("refresh", data.refresh);
+    } catch {
+      localStorage.removeItem("access");
+      localStorage.removeItem("refresh");
+    } finally {
+      refreshing = null;
+    }
+    delete original.headers.Authorization;
+    return API(original);
+  }
+);
+
 
 // Set or remove auth token (keep for backward compatibility)
 export const setAuthToken = (token) => {
@@ -41,6 +74,14 @@ export const loginUser = async (credentials) => {
   return res.data;
 };
 
+// Credentials passed explicitly: the caller clears localStorage before the interceptor runs
+export const logoutUser = async ({ access, refresh, token }) => {
+  const res = await API.post("accounts/logout/", refresh ? { refresh } : null, {
+    headers: { Authorization: access ? `Bearer ${access}` : `Token ${token}` },
+  });
+  return res.data;
+};
+
 // ===== Password Reset (No Email) =====
 export const resetPasswordByEmail = async (email, newPassword) => {
   const res = await API.post("accounts/reset-password/", {
@@ -134,8 +175,16 @@ export const getReviews = async (queryParams = {}) => {
   return res.data;
 };
 
-export const getSitterReviews = async (sitterId) => {
-  const res = await API.get("reviews/", { params: { sitter: sitterId } });
+// Cursor-paginated: { results, next, previous }; pass `next` back as the cursor to load older reviews
+export const getSitterReviews = async (sitterId, cursorUrl = null) => {
+  const res = cursorUrl
+    ? await API.get(cursorUrl)
+    : await API.get("reviews/", { params: { sitter: sitterId } });
+  return res.data;
+};
+
+export const getSitterReviewSummary = async (sitterId) => {
+  const res = await API.get("reviews/summary/", { params: { sitter: sitterId } });
   return res.data;
 };
 
@@ -175,11 +224,22 @@ export const setSitterTaxonomy = async ({ tags, specialties }) => {
 };
 
 // ===== Bookings =====
-export const getBookings = async () => {
-  const res = await API.get("bookings/");
+// Bookings are cursor-paginated; follow `next` links to collect every page
+// One page of bookings ({ results, next }); pass the previous page's `next`
+// URL as cursorUrl to load the following page
+export const getBookings = async (queryParams = {}, cursorUrl = null) => {
+  const res = cursorUrl
+    ? await API.get(cursorUrl)
+    : await API.get("bookings/", { params: queryParams });
   return res.data;
 };
 
+// Server-side price quotes for one or many sitters
+export const getBookingQuotes = async (quoteRequest) => {
+  const res = await API.post("bookings/quote/", quoteRequest);
+  return res.data.quotes;
+};
+
 export const getBooking = async (bookingId) => {
   const res = await API.get(`bookings/${bookingId}/`);
   return res.data;
@@ -220,4 +280,14 @@ export const deleteBooking = async (bookingId) => {
   return res.data;
 };
 
+// ===== Messaging =====
+// Existing thread with a user (optionally for a booking), created on first use
+export const getOrCreateThread = async (userId, bookingId = null) => {
+  const res = await API.post("messaging/threads/get-or-create/", {
+    user: userId,
+    booking: bookingId,
+  });
+  return res.data;
+};
+
 export default API;
\ No newline at end of file
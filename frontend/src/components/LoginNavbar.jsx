@@ -4,6 +4,7 @@ import { Link, useLocation, useNavigate } from "react-router-dom";
 import { MdMenu } from "react-icons/md";
 import ResponsiveMenu from "./ResponsiveMenu";
 import logo from "../assets/logo.png";
+import { logoutUser } from "../api/api";
 
 const LoginNavbar = () => {
   const location = useLocation();
@@ -62,6 +63,13 @@ const LoginNavbar = () => {
 
   // Logout clears everything
   const handleLogout = () => {
+    // Revoke the token server-side; local state is cleared regardless
+    const credentials = {
+      access: localStorage.getItem("access"),
+      refresh: localStorage.getItem("refresh"),
+      token: localStorage.getItem("token"),
+    };
+    if (credentials.access || credentials.token) logoutUser(credentials).catch(() => {});
     localStorage.removeItem("access");
     localStorage.removeItem("refresh");
     localStorage.removeItem("token");
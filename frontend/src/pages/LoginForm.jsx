@@ -19,7 +19,9 @@ function LoginForm({ onLogin }) {
     try {
       const data = await loginUser({ username, password });
 
-      // Save token and user
+      // Save tokens and user (JWT pair is preferred; the legacy token is a fallback)
+      localStorage.setItem("access", data.access);
+      localStorage.setItem("refresh", data.refresh);
       localStorage.setItem("token", data.token);
       localStorage.setItem("user", JSON.stringify(data.user));
 
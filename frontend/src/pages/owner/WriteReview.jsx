@@ -50,6 +50,7 @@ const WriteReview = () => {
   const [selectedSitterId, setSelectedSitterId] = useState(sitterId || "");
   const [loading, setLoading] = useState(true);
   const [bookings, setBookings] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [selectedBookingId, setSelectedBookingId] = useState("");
   const [rating, setRating] = useState(5);
   const [comment, setComment] = useState("");
@@ -65,24 +66,30 @@ const WriteReview = () => {
     return () => window.removeEventListener("resize", handleResize);
   }, []);
 
-  // load owner bookings and filter to completed ones with this sitter
+  // keep only bookings with the sitter from ?sitter=, if one was given
+  const forSitter = (list) =>
+    sitterId ? list.filter((b) => String(b.sitter_id) === String(sitterId)) : list;
+
+  const loadMoreBookings = async () => {
+    try {
+      const page = await getBookings({}, nextPage);
+      setBookings((prev) => [...prev, ...forSitter(page.results)]);
+      setNextPage(page.next);
+    } catch (err) {
+      console.error("Error loading bookings for review:", err);
+      setError("Failed to load your completed bookings.");
+    }
+  };
+
+  // load owner's completed bookings, filtered to this sitter
   useEffect(() => {
     const fetchBookings = async () => {
       try {
         setLoading(true);
-        const data = await getBookings(); // assuming this returns owner's bookings
-
-        let list = Array.isArray(data) ? data : data.results || [];
-
-        if (sitterId) {
-          list = list.filter(
-            (b) =>
-              String(b.sitter_id) === String(sitterId) && b.status === "completed"
-          );
-        } else {
-          // if no sitter given, still only show completed bookings
-          list = list.filter((b) => b.status === "completed");
-        }
+        // Newest completed bookings first; older ones load on demand
+        const page = await getBookings({ status: "completed", ordering: "-start_ts" });
+        const list = forSitter(page.results);
+        setNextPage(page.next);
 
         setBookings(list);
 
@@ -199,7 +206,13 @@ const sitterOptions = React.useMemo(() => {
 
         {bookings.length === 0 && (
           <div className="bg-yellow-50 border border-yellow-200 text-yellow-800 rounded-lg p-4 mb-6">
-            You don’t have any completed bookings {sitterId && "with this sitter"} to review yet.
+            {nextPage ? (
+              <button type="button" onClick={loadMoreBookings} className="font-medium underline">
+                Show older bookings
+              </button>
+            ) : (
+              <>You don’t have any completed bookings {sitterId && "with this sitter"} to review yet.</>
+            )}
           </div>
         )}
 
@@ -241,6 +254,15 @@ const sitterOptions = React.useMemo(() => {
                     </option>
                     ))}
                 </select>
+                {nextPage && (
+                  <button
+                    type="button"
+                    onClick={loadMoreBookings}
+                    className="mt-2 text-sm text-primary hover:text-primary/70 font-medium"
+                  >
+                    Show older bookings
+                  </button>
+                )}
                 </div>
 
             {/* Rating */}
@@ -15,6 +15,7 @@ import {
 const Booking = () => {
   const [step, setStep] = useState(1);
   const [bookings, setBookings] = useState([]);
+  const [nextBookingsPage, setNextBookingsPage] = useState(null);
   const [pets, setPets] = useState([]);
   const [sitters, setSitters] = useState([]);
   const [error, setError] = useState("");
@@ -41,13 +42,14 @@ const Booking = () => {
 
   const loadData = async () => {
     try {
-      const [bookingsData, sittersData, ownerData] = await Promise.all([
-        getBookings(),
+      const [bookingsPage, sittersData, ownerData] = await Promise.all([
+        getBookings({ ordering: "-created_at" }),
         getSitters(),
         getMyOwnerProfile(),
       ]);
       
-      setBookings(bookingsData);
+      setBookings(bookingsPage.results);
+      setNextBookingsPage(bookingsPage.next);
       setSitters(sittersData);
       setPets(Array.isArray(ownerData.pets) ? ownerData.pets : []);
       
@@ -57,6 +59,18 @@ const Booking = () => {
     }
   };
 
+  // Append the next page of booking history
+  const loadMoreBookings = async () => {
+    try {
+      const page = await getBookings({}, nextBookingsPage);
+      setBookings((prev) => [...prev, ...page.results]);
+      setNextBookingsPage(page.next);
+    } catch (err) {
+      console.error("Error loading bookings:", err);
+      setError("Failed to load more bookings.");
+    }
+  };
+
   // Handle form input
   const handleInputChange = (field, value) => {
     setFormData((prev) => ({ ...prev, [field]: value }));
@@ -137,7 +151,8 @@ const Booking = () => {
       
       const newBooking = await createBooking(bookingData);
 
-      setBookings([...bookings, newBooking]);
+      // Newest first, matching the history ordering
+      setBookings([newBooking, ...bookings]);
       setSuccessMessage("Booking created successfully!");
       setFormData({
         selectedPets: [],
@@ -297,6 +312,16 @@ const Booking = () => {
         </div>
 
         <BookingsTable bookings={bookings} />
+        {nextBookingsPage && (
+          <div className="flex justify-center mt-4">
+            <button
+              onClick={loadMoreBookings}
+              className="text-primary hover:text-primary/70 font-medium transition"
+            >
+              Load more
+            </button>
+          </div>
+        )}
       </div>
     </section>
   );
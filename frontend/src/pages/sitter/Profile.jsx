@@ -158,7 +158,7 @@ const Profile = () => {
           if (data?.id) {
             const reviewData = await getSitterReviews(data.id);
             console.log("Review payload →", reviewData);
-            setReviews(reviewData);
+            setReviews(reviewData.results);
           }
         } catch (reviewErr) {
           console.error("Error fetching sitter reviews:", reviewErr);
@@ -314,10 +314,30 @@ const ScheduleDetails = ({ booking, onClose, error, handleUpdateStatus }) => {
   );
 };
 
+// Server-side filters for each booking list; "now" is taken per load
+const bookingListQueries = () => {
+  const now = new Date().toISOString();
+  return {
+    upcoming: { status: "requested", start_after: now, ordering: "start_ts" },
+    active: { status: "confirmed", end_after: now, ordering: "start_ts" },
+    completed: { status: "completed", ordering: "-start_ts" },
+  };
+};
+
+/* LOAD MORE */
+const LoadMoreButton = ({ onClick }) => (
+  <div className="flex justify-center mt-4">
+    <button onClick={onClick} className="text-primary hover:text-primary/70 font-medium transition">
+      Load more
+    </button>
+  </div>
+);
+
 /* MAIN PAGE */
 const Schedule = () => {
   const [activeTab, setActiveTab] = useState("active");
   const [bookings, setBookings] = useState({ upcoming: [], active: [], completed: [] });
+  const [nextPages, setNextPages] = useState({ upcoming: null, active: null, completed: null });
   const [selectedBooking, setSelectedBooking] = useState(null);
   const [error, setError] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -326,16 +346,15 @@ const Schedule = () => {
     loadBookings();
   }, []);
 
+  // First page of each list, filtered server-side
   const loadBookings = async () => {
     try {
-      const all = await getBookings();
-      const now = new Date();
-
-      setBookings({
-        upcoming: all.filter((b) => b.status === "requested" && new Date(b.start_ts) >= now),
-        active: all.filter((b) => b.status === "confirmed" && new Date(b.end_ts) >= now),
-        completed: all.filter((b) => b.status === "completed"),
-      });
+      const queries = bookingListQueries();
+      const lists = Object.keys(queries);
+      const pages = await Promise.all(lists.map((list) => getBookings(queries[list])));
+
+      setBookings(Object.fromEntries(lists.map((list, i) => [list, pages[i].results])));
+      setNextPages(Object.fromEntries(lists.map((list, i) => [list, pages[i].next])));
     } catch {
       setError("Failed to load bookings.");
     } finally {
@@ -343,6 +362,17 @@ const Schedule = () => {
     }
   };
 
+  // Append the next page of one list
+  const loadMore = async (list) => {
+    try {
+      const page = await getBookings({}, nextPages[list]);
+      setBookings((prev) => ({ ...prev, [list]: [...prev[list], ...page.results] }));
+      setNextPages((prev) => ({ ...prev, [list]: page.next }));
+    } catch {
+      setError("Failed to load bookings.");
+    }
+  };
+
   const handleUpdateStatus = async (id, status) => {
     try {
       if (status === "confirmed") await confirmBooking(id);
@@ -410,6 +440,7 @@ const Schedule = () => {
                     />
                   ))}
                 </div>
+                {nextPages.upcoming && <LoadMoreButton onClick={() => loadMore("upcoming")} />}
               </div>
             )}
 
@@ -434,6 +465,7 @@ const Schedule = () => {
                 ))}
               </div>
             )}
+            {nextPages.active && <LoadMoreButton onClick={() => loadMore("active")} />}
           </>
         )}
 
@@ -448,13 +480,12 @@ const Schedule = () => {
               </div>
             ) : (
               <div className="space-y-3">
-                {bookings.completed
-                  .sort((a, b) => new Date(b.end_ts) - new Date(a.end_ts))
-                  .map((b) => (
-                    <BookingCard key={b.id} booking={b} setSelectedBooking={setSelectedBooking} />
-                  ))}
+                {bookings.completed.map((b) => (
+                  <BookingCard key={b.id} booking={b} setSelectedBooking={setSelectedBooking} />
+                ))}
               </div>
             )}
+            {nextPages.completed && <LoadMoreButton onClick={() => loadMore("completed")} />}
           </div>
         )}
       </div>
@@ -462,5 +493,5 @@ const Schedule = () => {
   );
 };
 
-export { BookingRow, BookingCard, ScheduleDetails };
+export { BookingRow, BookingCard, ScheduleDetails, bookingListQueries };
 export default Schedule;
@@ -7,7 +7,7 @@ import ContactUs from "../../../components/ContactUs";
 import WeekAvailability from "./WeekAvailability";
 
 import { getBookings, confirmBooking, cancelBooking, completeBooking } from "../../../api/api";
-import { BookingRow, ScheduleDetails } from "../Schedule";
+import { BookingRow, ScheduleDetails, bookingListQueries } from "../Schedule";
 
 const SitterDashboard = () => {
   const [open, setOpen] = useState(false);
@@ -32,18 +32,13 @@ const SitterDashboard = () => {
 
   const fetchData = async () => {
     try {
-      const all = await getBookings();
-      const now = new Date();
-
-      const upcoming = all.filter(
-        (b) => b.status === "requested" && new Date(b.start_ts) >= now
-      );
-
-      const active = all.filter(
-        (b) => b.status === "confirmed" && new Date(b.end_ts) >= now
-      );
-
-      setBookings({ upcoming, active });
+      // First page of each list only; "See all bookings" pages through the rest
+      const queries = bookingListQueries();
+      const [upcoming, active] = await Promise.all([
+        getBookings(queries.upcoming),
+        getBookings(queries.active),
+      ]);
+      setBookings({ upcoming: upcoming.results, active: active.results });
     } catch (err) {
       console.error(err);
       setError("Failed to load bookings.");